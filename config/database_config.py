@@ -34,5 +34,26 @@ DATA_EXPORT_CONFIG = {
 PERFORMANCE_CONFIG = {
     'test_iterations': int(os.getenv("PERF_ITER", 5)),
     'warmup_queries': int(os.getenv("PERF_WARMUP", 2)),
-    'timeout_seconds': int(os.getenv("PERF_TIMEOUT", 30))
+    'timeout_seconds': int(os.getenv("PERF_TIMEOUT", 30)),
+    'vectorized_results': os.getenv("VECTORIZED_RESULTS", "0") == "1"
+}
+
+# Customer Profile Cache Configuration
+PROFILE_CACHE_CONFIG = {
+    'max_size': int(os.getenv("PROFILE_CACHE_SIZE", 10000)),
+    'ttl_seconds': int(os.getenv("PROFILE_CACHE_TTL", 300))
+}
+
+# Customer ID Bloom Filter Configuration
+BLOOM_FILTER_CONFIG = {
+    'false_positive_rate': float(os.getenv("BLOOM_FP_RATE", 0.01)),
+    'path': os.getenv("BLOOM_FILTER_PATH", os.path.join("telco_data_export", "customer_ids.bloom"))
+}
+
+# Query Planner Configuration
+QUERY_PLANNER_CONFIG = {
+    'data_span_days': int(os.getenv("PLANNER_DATA_SPAN_DAYS", 365)),
+    'stats_ttl': int(os.getenv("PLANNER_STATS_TTL", 300)),
+    'result_cache_size': int(os.getenv("RESULT_CACHE_SIZE", 256)),
+    'result_cache_ttl': int(os.getenv("RESULT_CACHE_TTL", 60))
 }
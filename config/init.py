@@ -6,7 +6,10 @@ from .database_config import (
     CASSANDRA_CONFIG,
     MONGODB_CONFIG,
     DATA_EXPORT_CONFIG,
-    PERFORMANCE_CONFIG
+    PERFORMANCE_CONFIG,
+    PROFILE_CACHE_CONFIG,
+    BLOOM_FILTER_CONFIG,
+    QUERY_PLANNER_CONFIG
 )
 
 from .app_config import (
@@ -20,6 +23,9 @@ __all__ = [
     'MONGODB_CONFIG', 
     'DATA_EXPORT_CONFIG',
     'PERFORMANCE_CONFIG',
+    'PROFILE_CACHE_CONFIG',
+    'BLOOM_FILTER_CONFIG',
+    'QUERY_PLANNER_CONFIG',
     'APP_CONFIG',
     'LOGGING_CONFIG',
     'SECURITY_CONFIG'
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Data generation script for Telco NoSQL Platform
+Usage: python scripts/generate_data.py --output-dir telco_data_export --format ndjson --shards 8
+       python scripts/generate_data.py --seed 42 --workers 8 --cdr 10000000 --traffic-model realistic
+       python scripts/generate_data.py --format ndjson --shard-records 5000000 --cdr 1000000000
+"""
+
+import sys
+import os
+import argparse
+import time
+from datetime import datetime
+
+# Add project root to path (loader worker processes import the src package by name)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_generation.telco_data_generator import TelcoDataGenerator
+from src.data_generation.traffic_model import TrafficModel
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic telco data for the platform')
+    parser.add_argument('--output-dir', default='telco_data_export',
+                       help='Directory to write the data files to')
+    parser.add_argument('--format', choices=TelcoDataGenerator.EXPORT_FORMATS, default='json',
+                       help='json: one array per file, ndjson: one record per line, parquet: typed columns')
+    parser.add_argument('--compression', choices=('gz', 'zst'), default=None,
+                       help='Compress json/ndjson files while writing (zst needs the zstandard package)')
+    parser.add_argument('--shards', type=int, default=1,
+                       help='Split every ndjson dataset into this many files')
+    parser.add_argument('--shard-records', type=int, default=None,
+                       help='Write each block as soon as it is generated (constant memory), '
+                            'rolling ndjson shards every this many records')
+    parser.add_argument('--customers', type=int, default=50000,
+                       help='Number of customers (with subscriptions, billing and tickets)')
+    parser.add_argument('--cdr', type=int, default=100000,
+                       help='Number of call detail records')
+    parser.add_argument('--sms', type=int, default=50000,
+                       help='Number of SMS records')
+    parser.add_argument('--data-usage', type=int, default=75000,
+                       help='Number of data usage records')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Seed of every random value; the same seed and counts give byte-identical files')
+    parser.add_argument('--reference-time', type=datetime.fromisoformat, default=None,
+                       help='ISO timestamp the generated time ranges end at (default: 2024-01-01 with --seed, else now)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Processes generating blocks of the datasets in parallel (does not change the output)')
+    parser.add_argument('--traffic-model', default='uniform',
+                       help='uniform, realistic (hot subscribers/cells, daily and weekly peaks, '
+                            'duration mixture) or a JSON file of TrafficModel settings')
+    
+    args = parser.parse_args()
+    
+    print("🚀 Starting Telco Data Generation")
+    start_time = time.time()
+    
+    try:
+        generator = TelcoDataGenerator(seed=args.seed, reference_time=args.reference_time,
+                                       traffic_model=TrafficModel.load(args.traffic_model))
+        counts = {
+            'num_customers': args.customers,
+            'num_cdr': args.cdr,
+            'num_sms': args.sms,
+            'num_data_usage': args.data_usage
+        }
+        if args.shard_records:
+            if args.shards != 1:
+                raise ValueError("--shards and --shard-records cannot be combined")
+            written = generator.export_all_chunked(
+                args.output_dir,
+                format=args.format,
+                compression=args.compression,
+                shard_records=args.shard_records,
+                workers=args.workers,
+                **counts
+            )
+        else:
+            written = generator.export_all(
+                args.output_dir,
+                format=args.format,
+                shards=args.shards,
+                compression=args.compression,
+                workers=args.workers,
+                **counts
+            )
+    except (ValueError, ImportError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    
+    for name, paths in written.items():
+        print(f"📁 {name}: {len(paths)} file(s)")
+    print(f"📋 Manifest: {os.path.join(args.output_dir, 'manifest.json')} (seed {generator.seed})")
+    print(f"🎉 Data generation completed in {time.time() - start_time:.2f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,7 @@
 """
 Data loading script for Telco NoSQL Platform
 Usage: python scripts/load_existing_data.py --data-dir telco_data_export
+       python scripts/load_existing_data.py --generate --cdr 10000000 --batch
 """
 
 import sys
@@ -11,13 +12,18 @@ import logging
 import time
 from datetime import datetime
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+# Add project root to path (loader worker processes import the src package by name)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from database.cassandra_manager import CassandraManager
-from database.mongodb_manager import MongoManager
-from data_generation.data_loader import TelcoDataLoader
-from config.database_config import CASSANDRA_CONFIG, MONGODB_CONFIG
+from src.database.cassandra_manager import CassandraManager
+from src.database.mongodb_manager import MongoManager
+from src.database.bloom_filter import build_customer_filter
+from src.data_generation.data_loader import TelcoDataLoader
+from src.data_generation.load_pipeline import LoadPipeline
+from src.data_generation.stream_loader import GeneratedDataStreamer
+from src.data_generation.telco_data_generator import TelcoDataGenerator
+from src.data_generation.traffic_model import TrafficModel
+from config.database_config import CASSANDRA_CONFIG, MONGODB_CONFIG, BLOOM_FILTER_CONFIG
 
 def setup_logging(verbose=False):
     level = logging.DEBUG if verbose else logging.INFO
@@ -26,7 +32,7 @@ def setup_logging(verbose=False):
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
-def load_data_with_progress(data_loader, cassandra_manager, mongo_manager, batch_mode=False):
+def load_data_with_progress(data_loader, cassandra_manager, mongo_manager, batch_mode=False, pipelined=False):
     """Load data with progress tracking"""
     logger = logging.getLogger(__name__)
     
@@ -61,35 +67,43 @@ def load_data_with_progress(data_loader, cassandra_manager, mongo_manager, batch
                 logger.info("Data loading cancelled by user")
                 return None
         
-        # Load Cassandra data
-        logger.info("🔄 Loading data to Cassandra...")
-        cassandra_start = time.time()
-        
-        if cassandra_manager:
-            cassandra_results = data_loader.load_cassandra_data(cassandra_manager)
-            results['cassandra'] = cassandra_results
-            cassandra_time = time.time() - cassandra_start
-            
-            total_cassandra = sum(cassandra_results.values())
-            logger.info(f"✅ Cassandra loading completed in {cassandra_time:.2f}s")
-            logger.info(f"📊 Total Cassandra records: {total_cassandra:,}")
+        if pipelined:
+            # Both databases at once; each file through reader/decoder/validator/writer threads
+            logger.info("🔄 Loading data to Cassandra and MongoDB (pipelined)...")
+            pipeline_results = LoadPipeline(data_loader).run(cassandra_manager, mongo_manager)
+            results['cassandra'] = pipeline_results['cassandra']
+            results['mongodb'] = pipeline_results['mongodb']
+            results['stages'] = pipeline_results['stages']
         else:
-            logger.warning("⚠️ Cassandra manager not available")
-        
-        # Load MongoDB data
-        logger.info("🔄 Loading data to MongoDB...")
-        mongodb_start = time.time()
-        
-        if mongo_manager:
-            mongodb_results = data_loader.load_mongodb_data(mongo_manager)
-            results['mongodb'] = mongodb_results
-            mongodb_time = time.time() - mongodb_start
+            # Load Cassandra data
+            logger.info("🔄 Loading data to Cassandra...")
+            cassandra_start = time.time()
             
-            total_mongodb = sum(mongodb_results.values())
-            logger.info(f"✅ MongoDB loading completed in {mongodb_time:.2f}s")
-            logger.info(f"📊 Total MongoDB records: {total_mongodb:,}")
-        else:
-            logger.warning("⚠️ MongoDB manager not available")
+            if cassandra_manager:
+                cassandra_results = data_loader.load_cassandra_data(cassandra_manager)
+                results['cassandra'] = cassandra_results
+                cassandra_time = time.time() - cassandra_start
+                
+                total_cassandra = sum(cassandra_results.values())
+                logger.info(f"✅ Cassandra loading completed in {cassandra_time:.2f}s")
+                logger.info(f"📊 Total Cassandra records: {total_cassandra:,}")
+            else:
+                logger.warning("⚠️ Cassandra manager not available")
+            
+            # Load MongoDB data
+            logger.info("🔄 Loading data to MongoDB...")
+            mongodb_start = time.time()
+            
+            if mongo_manager:
+                mongodb_results = data_loader.load_mongodb_data(mongo_manager)
+                results['mongodb'] = mongodb_results
+                mongodb_time = time.time() - mongodb_start
+                
+                total_mongodb = sum(mongodb_results.values())
+                logger.info(f"✅ MongoDB loading completed in {mongodb_time:.2f}s")
+                logger.info(f"📊 Total MongoDB records: {total_mongodb:,}")
+            else:
+                logger.warning("⚠️ MongoDB manager not available")
         
         # Calculate totals
         total_time = time.time() - start_time
@@ -115,6 +129,38 @@ def load_data_with_progress(data_loader, cassandra_manager, mongo_manager, batch
         logger.error(f"💥 Data loading failed: {e}")
         return None
 
+def stream_generated_data(data_loader, cassandra_manager, mongo_manager, args):
+    """Generate records and write them chunk by chunk, without export files"""
+    logger = logging.getLogger(__name__)
+    
+    try:
+        generator = TelcoDataGenerator(seed=args.seed, reference_time=args.reference_time,
+                                       traffic_model=TrafficModel.load(args.traffic_model))
+        streamer = GeneratedDataStreamer(generator, data_loader, chunk_size=args.chunk_size, workers=args.workers)
+        results = streamer.run(
+            cassandra_manager,
+            mongo_manager,
+            num_customers=args.customers,
+            num_cdr=args.cdr,
+            num_sms=args.sms,
+            num_data_usage=args.data_usage
+        )
+    except Exception as e:
+        logger.error(f"💥 Streaming generated data failed: {e}")
+        return None
+    
+    logger.info("=" * 60)
+    logger.info("🎉 GENERATED DATA STREAMED")
+    logger.info("=" * 60)
+    for target, entry in results['throughput'].items():
+        logger.info(f"📊 {target}: {entry['written']:,} records "
+                    f"(generate {entry['generate_seconds']:.2f}s, prepare {entry['prepare_seconds']:.2f}s, "
+                    f"write {entry['write_seconds']:.2f}s)")
+    logger.info(f"⏱️  Total time: {results['total_time']:.2f} seconds")
+    logger.info(f"🚀 Loading rate: {results['records_per_second']:.2f} records/second")
+    logger.info("=" * 60)
+    return results
+
 def verify_loaded_data(cassandra_manager, mongo_manager):
     """Verify that data was loaded correctly"""
     logger = logging.getLogger(__name__)
@@ -202,7 +248,7 @@ def create_sample_queries(cassandra_manager, mongo_manager):
 def main():
     parser = argparse.ArgumentParser(description='Load existing JSON data into Telco platform')
     parser.add_argument('--data-dir', default='telco_data_export', 
-                       help='Directory containing JSON data files')
+                       help='Directory containing JSON or NDJSON data files')
     parser.add_argument('--cassandra-only', action='store_true',
                        help='Load only to Cassandra')
     parser.add_argument('--mongodb-only', action='store_true',
@@ -215,6 +261,33 @@ def main():
                        help='Enable verbose logging')
     parser.add_argument('--test-queries', action='store_true',
                        help='Run test queries after loading')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                       help='Records parsed, validated and inserted per chunk')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Processes converting and validating records in parallel '
+                            '(with --generate: processes generating blocks)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Skip chunks already written according to the load checkpoint in the data directory')
+    parser.add_argument('--pipelined', action='store_true',
+                       help='Load Cassandra and MongoDB concurrently through staged reader/decoder/validator/writer threads')
+    parser.add_argument('--generate', action='store_true',
+                       help='Stream freshly generated records into the databases instead of reading --data-dir')
+    parser.add_argument('--customers', type=int, default=50000,
+                       help='With --generate: number of customers (with subscriptions, billing and tickets)')
+    parser.add_argument('--cdr', type=int, default=100000,
+                       help='With --generate: number of call detail records')
+    parser.add_argument('--sms', type=int, default=50000,
+                       help='With --generate: number of SMS records')
+    parser.add_argument('--data-usage', type=int, default=75000,
+                       help='With --generate: number of data usage records')
+    parser.add_argument('--traffic-model', default='uniform',
+                       help='With --generate: uniform, realistic or a JSON file of TrafficModel settings')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='With --generate: seed of every random value; streams the records '
+                            'generate_data.py --seed writes to files')
+    parser.add_argument('--reference-time', type=datetime.fromisoformat, default=None,
+                       help='With --generate: ISO timestamp the generated time ranges end at '
+                            '(default: 2024-01-01 with --seed, else now)')
     
     args = parser.parse_args()
     
@@ -226,7 +299,8 @@ def main():
     
     try:
         # Initialize data loader
-        data_loader = TelcoDataLoader(args.data_dir)
+        data_loader = TelcoDataLoader(args.data_dir, chunk_size=args.chunk_size, workers=args.workers,
+                                      resume=args.resume)
         
         # Initialize database managers
         cassandra_manager = None
@@ -261,17 +335,30 @@ def main():
             return 0
         
         # Load data
-        results = load_data_with_progress(
-            data_loader, 
-            cassandra_manager, 
-            mongo_manager, 
-            args.batch
-        )
+        if args.generate:
+            results = stream_generated_data(data_loader, cassandra_manager, mongo_manager, args)
+        else:
+            results = load_data_with_progress(
+                data_loader, 
+                cassandra_manager, 
+                mongo_manager, 
+                args.batch,
+                args.pipelined
+            )
         
         if not results:
             logger.error("❌ Data loading failed")
             return 1
         
+        # Rebuild the customer ID bloom filter used by the combined query
+        if mongo_manager:
+            logger.info("🔄 Rebuilding customer ID bloom filter...")
+            try:
+                build_customer_filter(mongo_manager, **BLOOM_FILTER_CONFIG)
+            except Exception as e:
+                # The web app checks a saved filter against MongoDB before using it
+                logger.error(f"❌ Customer ID bloom filter rebuild failed: {e}")
+        
         # Verify loaded data
         verify_loaded_data(cassandra_manager, mongo_manager)
         
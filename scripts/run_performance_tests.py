@@ -14,13 +14,14 @@ import statistics
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+# Add project root to path (src.utils imports src.database relatively)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from database.cassandra_manager import CassandraManager
-from database.mongodb_manager import MongoManager
-from database.query_aggregator import QueryAggregator
-from utils.performance_monitor import PerformanceMonitor
+from src.database.cassandra_manager import CassandraManager
+from src.database.mongodb_manager import MongoManager
+from src.database.query_aggregator import QueryAggregator
+from src.database.query_profiler import flatten_stages
+from src.utils.performance_monitor import PerformanceMonitor
 from config.database_config import CASSANDRA_CONFIG, MONGODB_CONFIG, PERFORMANCE_CONFIG
 
 def setup_logging(verbose=False):
@@ -34,10 +35,13 @@ class PerformanceTester:
     def __init__(self, cassandra_manager, mongo_manager, iterations=5):
         self.cassandra_manager = cassandra_manager
         self.mongo_manager = mongo_manager
-        self.query_aggregator = QueryAggregator(cassandra_manager, mongo_manager)
+        self.performance_monitor = PerformanceMonitor()
+        self.query_aggregator = QueryAggregator(
+            cassandra_manager, mongo_manager, self.performance_monitor,
+            default_timeout=PERFORMANCE_CONFIG['timeout_seconds']
+        )
         self.iterations = iterations
         self.logger = logging.getLogger(__name__)
-        self.performance_monitor = PerformanceMonitor()
         
         # Test parameters
         self.test_params = {
@@ -91,6 +95,7 @@ class PerformanceTester:
                 'success': True,
                 'execution_time': execution_time,
                 'result_count': result.get('record_count', 0),
+                'stages': result.get('stages', []),
                 'error': None
             }
             
@@ -154,11 +159,28 @@ class PerformanceTester:
             'median_time': statistics.median(execution_times),
             'stdev_time': statistics.stdev(execution_times) if len(execution_times) > 1 else 0,
             'total_time': sum(execution_times),
-            'avg_result_count': statistics.mean([r['result_count'] for r in successful_results])
+            'avg_result_count': statistics.mean([r['result_count'] for r in successful_results]),
+            'stage_breakdown': self.analyze_stages(successful_results)
         }
         
         return analysis
     
+    def analyze_stages(self, results):
+        """Mean/median time per query stage across iterations"""
+        stage_durations = {}
+        for result in results:
+            for path, stage in flatten_stages(result.get('stages', [])).items():
+                stage_durations.setdefault(path, []).append(stage['duration'])
+        
+        return {
+            path: {
+                'mean_time': statistics.mean(durations),
+                'median_time': statistics.median(durations),
+                'max_time': max(durations)
+            }
+            for path, durations in stage_durations.items()
+        }
+    
     def run_index_comparison_test(self, query_type):
         """Run comparison test with and without indexes"""
         self.logger.info(f"🧪 Running index comparison for {query_type}")
@@ -377,6 +399,10 @@ def print_summary_report(results):
             logger.info(f"✅ {query_type}: {improvement:.2f}% improvement ({speedup:.2f}x speedup)")
         else:
             logger.info(f"⚠️ {query_type}: No improvement data")
+        
+        stage_breakdown = result.get('with_index', {}).get('stage_breakdown', {})
+        for path, stage in stage_breakdown.items():
+            logger.info(f"   ⏱️  {path}: {stage['mean_time'] * 1000:.2f} ms")
     
     logger.info("=" * 60)
 
@@ -0,0 +1,116 @@
+from decimal import Decimal
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+from uuid import UUID
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for the parquet export format
+    pa = None
+    pq = None
+
+# Typed columns of the Cassandra datasets, matching the CQL table definitions.
+# MongoDB datasets are nested documents; their schema is inferred from the records.
+COLUMN_TYPES = {
+    'cdr_data': [
+        ('call_id', 'uuid'), ('caller_id', 'string'), ('callee_id', 'string'),
+        ('call_start_time', 'timestamp'), ('call_end_time', 'timestamp'),
+        ('duration_seconds', 'int32'), ('call_type', 'string'), ('location_cell_id', 'string'),
+        ('location_lat', 'float64'), ('location_lon', 'float64'), ('cost_amount', 'decimal'),
+        ('network_type', 'string'), ('quality_score', 'int32'), ('created_at', 'timestamp')
+    ],
+    'sms_data': [
+        ('sms_id', 'uuid'), ('sender_id', 'string'), ('receiver_id', 'string'),
+        ('message_length', 'int32'), ('sent_time', 'timestamp'), ('delivery_status', 'string'),
+        ('cost_amount', 'decimal'), ('network_type', 'string'), ('created_at', 'timestamp')
+    ],
+    'data_usage': [
+        ('usage_id', 'uuid'), ('customer_id', 'string'), ('session_start', 'timestamp'),
+        ('session_end', 'timestamp'), ('data_consumed_mb', 'int64'), ('app_category', 'string'),
+        ('network_type', 'string'), ('cost_amount', 'decimal'), ('created_at', 'timestamp')
+    ]
+}
+
+# Cassandra DECIMAL columns hold currency amounts with two decimals
+DECIMAL_PLACES = Decimal('0.01')
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("The parquet format needs pyarrow: pip install pyarrow")
+
+def _arrow_field(name: str, kind: str):
+    if kind == 'uuid':
+        return pa.field(name, pa.binary(16), metadata={'logical_type': 'uuid'})
+    types = {
+        'string': pa.string(),
+        'int32': pa.int32(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'timestamp': pa.timestamp('us'),
+        'decimal': pa.decimal128(12, 2)
+    }
+    return pa.field(name, types[kind])
+
+def _to_column_value(value: Any, kind: str):
+    if value is None:
+        return None
+    if kind == 'uuid':
+        return value.bytes if isinstance(value, UUID) else UUID(value).bytes
+    if kind == 'decimal':
+        return Decimal(str(value)).quantize(DECIMAL_PLACES)
+    if kind == 'timestamp' and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+def dataset_schema(name: str):
+    """Arrow schema of a Cassandra dataset, or None when it is inferred"""
+    require_pyarrow()
+    columns = COLUMN_TYPES.get(name)
+    return pa.schema([_arrow_field(column, kind) for column, kind in columns]) if columns else None
+
+def _typed_table(records: List[Dict], name: str):
+    columns = COLUMN_TYPES[name]
+    arrays = [
+        pa.array([_to_column_value(record.get(column), kind) for record in records], type=_arrow_field(column, kind).type)
+        for column, kind in columns
+    ]
+    return pa.Table.from_arrays(arrays, schema=dataset_schema(name))
+
+def write_parquet(records: List[Dict], path: str, name: str, row_group_size: int = 50000) -> int:
+    """
+    Write records as parquet with one row group per row_group_size records
+    Cassandra datasets get typed columns (UUID as 16-byte binary, timestamps,
+    decimal(12, 2)); columns outside COLUMN_TYPES are not written
+    """
+    require_pyarrow()
+    if name not in COLUMN_TYPES:
+        pq.write_table(pa.Table.from_pylist(records), path, row_group_size=row_group_size)
+        return len(records)
+    
+    with pq.ParquetWriter(path, dataset_schema(name)) as writer:
+        for start in range(0, len(records), row_group_size):
+            writer.write_table(_typed_table(records[start:start + row_group_size], name))
+    return len(records)
+
+def iter_parquet_row_groups(path: str) -> Iterator[List[Dict]]:
+    """Yield the records of a parquet file one row group at a time, UUID columns as UUID objects"""
+    require_pyarrow()
+    parquet_file = pq.ParquetFile(path)
+    uuid_columns = [
+        field.name for field in parquet_file.schema_arrow
+        if field.metadata and field.metadata.get(b'logical_type') == b'uuid'
+    ]
+    
+    for index in range(parquet_file.num_row_groups):
+        records = parquet_file.read_row_group(index).to_pylist()
+        for record in records:
+            for column in uuid_columns:
+                if record[column] is not None:
+                    record[column] = UUID(bytes=record[column])
+        yield records
+
+def parquet_row_count(path: str) -> int:
+    """Number of records, read from the parquet footer"""
+    require_pyarrow()
+    return pq.ParquetFile(path).metadata.num_rows
@@ -0,0 +1,60 @@
+import gzip
+import io
+from typing import IO, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst exports
+    zstandard = None
+
+# Suffix -> compression name, as accepted by export_dataset(compression=...)
+COMPRESSION_SUFFIXES = {'.gz': 'gz', '.zst': 'zst'}
+COMPRESSIONS = tuple(COMPRESSION_SUFFIXES.values())
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def require_zstandard():
+    if zstandard is None:
+        raise ImportError("The .zst format needs zstandard: pip install zstandard")
+
+def split_compression(path: str) -> Tuple[str, Optional[str]]:
+    """('cdr_data.json', 'gz') for 'cdr_data.json.gz'; (path, None) for uncompressed files"""
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return path[:-len(suffix)], compression
+    return path, None
+
+def is_ndjson(path: str) -> bool:
+    return split_compression(path)[0].endswith('.ndjson')
+
+def open_binary(path: str) -> IO[bytes]:
+    """
+    Open a possibly compressed file for reading; decompression happens block by
+    block as the caller reads, so no decompressed copy is ever written or held
+    """
+    compression = split_compression(path)[1]
+    if compression == 'gz':
+        return gzip.open(path, 'rb')
+    if compression == 'zst':
+        require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+def open_text(path: str) -> IO[str]:
+    """Streaming UTF-8 text reader over a possibly compressed file"""
+    if split_compression(path)[1] is None:
+        return open(path, 'r', encoding='utf-8')
+    return io.TextIOWrapper(open_binary(path), encoding='utf-8')
+
+def open_text_output(path: str) -> IO[str]:
+    """UTF-8 text writer, compressing according to the path's suffix"""
+    compression = split_compression(path)[1]
+    if compression == 'gz':
+        # mtime=0: the header carries no timestamp, so equal data gives byte-identical files
+        return io.TextIOWrapper(gzip.GzipFile(path, 'wb', compresslevel=GZIP_LEVEL, mtime=0), encoding='utf-8')
+    if compression == 'zst':
+        require_zstandard()
+        writer = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, 'wb'), closefd=True)
+        return io.TextIOWrapper(writer, encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
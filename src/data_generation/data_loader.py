@@ -1,25 +1,86 @@
 import json
 import os
+import glob
+import hashlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from itertools import islice
+from typing import Callable, Dict, List, Any, Iterator, Optional
 import time
 import logging
-from uuid import UUID
+from bson import ObjectId
+from .json_stream import iter_json_array, iter_chunks, iter_ndjson, split_line_ranges, read_ndjson_range, json_default
+from .columnar_format import iter_parquet_row_groups, parquet_row_count
+from .column_decoder import ColumnDecoder
+from .load_checkpoint import LoadCheckpoint
+from .export_manifest import read_manifest, manifest_entry
+from .compression import COMPRESSION_SUFFIXES, is_ndjson, open_binary, open_text
+from ..database.cassandra_manager import CassandraManager
+from ..utils.record_schemas import get_schema, format_rejections
+
+def _prepare_chunk(records: List[Dict], kind: str, target: str, decoder: ColumnDecoder) -> tuple:
+    """Process pool worker: convert and validate one chunk, returning compact rows and per-rule rejections"""
+    loader = TelcoDataLoader()
+    rows = loader.prepare_records(records, kind, target, compact=True, decoder=decoder)
+    return rows, loader.rejections.get(target, {})
+
+def _hash_default(value: Any):
+    try:
+        return json_default(value)
+    except TypeError:
+        return str(value)
+
+def document_id(record: Dict) -> ObjectId:
+    """
+    Deterministic _id: a 12-byte digest of the record's canonical JSON
+    Reloading the same record replaces its document instead of duplicating it
+    """
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'), default=_hash_default)
+    return ObjectId(hashlib.blake2b(canonical.encode('utf-8'), digest_size=12).digest())
+
+def _parse_ndjson_range(path: str, start: int, end: int, kind: str, target: str, decoder: ColumnDecoder) -> tuple:
+    """Process pool worker: parse, convert and validate one byte range of an NDJSON file"""
+    return _prepare_chunk(read_ndjson_range(path, start, end), kind, target, decoder)
 
 class TelcoDataLoader:
-    def __init__(self, data_directory='telco_data_export'):
+    # Export file -> Cassandra table / MongoDB collection, in load order
+    CASSANDRA_FILES = {
+        'cdr_data.json': 'call_records',
+        'sms_data.json': 'sms_records',
+        'data_usage.json': 'data_usage'
+    }
+    MONGODB_FILES = {
+        'customers.json': 'customers',
+        'subscriptions.json': 'subscriptions',
+        'billing_records.json': 'billing',
+        'support_tickets.json': 'customer_support'
+    }
+    
+    def __init__(self, data_directory='telco_data_export', chunk_size: int = 10000,
+                 workers: int = 1, range_bytes: int = 8 * 1024 * 1024, resume: bool = False):
         self.data_directory = data_directory
+        # Records converted, validated and inserted together; bounds loader memory
+        self.chunk_size = chunk_size
+        # Processes converting and validating chunks (NDJSON: parsing byte ranges of
+        # about range_bytes each) in parallel
+        self.workers = workers
+        self.range_bytes = range_bytes
+        # Chunks written per target; with resume=True chunks already written are skipped
+        self.checkpoint = LoadCheckpoint(data_directory, resume)
+        # Records rejected per target and schema rule (see record_schemas)
+        self.rejections = {}
         self.logger = logging.getLogger(__name__)
         
     def load_json_file(self, filename: str) -> List[Dict]:
-        """Load data from JSON file with error handling"""
+        """Load a whole JSON file into memory (small files only; loading streams via iter_json_chunks)"""
         filepath = os.path.join(self.data_directory, filename)
         
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"File not found: {filepath}")
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
+            with open_text(filepath) as f:
                 data = json.load(f)
             
             self.logger.info(f"Successfully loaded {len(data)} records from {filename}")
@@ -32,170 +93,295 @@ class TelcoDataLoader:
             self.logger.error(f"Error loading {filename}: {e}")
             raise
     
-    def convert_datetime_strings(self, data: List[Dict]) -> List[Dict]:
-        """Convert ISO datetime strings back to datetime objects"""
-        datetime_fields = [
-            'call_start_time', 'call_end_time', 'created_at', 'sent_time',
-            'session_start', 'session_end', 'registration_date', 'start_date',
-            'end_date', 'payment_date', 'ticket_date', 'resolution_date',
-            'updated_at'
-        ]
-        
-        converted_data = []
-        for record in data:
-            converted_record = {}
-            for key, value in record.items():
-                if key in datetime_fields and isinstance(value, str):
-                    try:
-                        # Handle different datetime formats
-                        if 'T' in value:
-                            # ISO format with T separator
-                            if value.endswith('Z'):
-                                value = value[:-1] + '+00:00'
-                            converted_record[key] = datetime.fromisoformat(value)
-                        else:
-                            # Keep as string if not proper ISO format
-                            converted_record[key] = value
-                    except ValueError:
-                        # If conversion fails, keep original value
-                        converted_record[key] = value
-                elif key == 'call_id' or key == 'sms_id' or key == 'usage_id':
-                    # Convert UUID strings to UUID objects for Cassandra
-                    try:
-                        converted_record[key] = UUID(value) if isinstance(value, str) else value
-                    except ValueError:
-                        converted_record[key] = value
-                else:
-                    converted_record[key] = value
-            converted_data.append(converted_record)
+    def dataset_files(self, filename: str) -> List[str]:
+        """
+        Paths holding a dataset, named by its JSON export filename
+        For 'cdr_data.json' the typed cdr_data.parquet is preferred; then the
+        JSON array itself; then newline-delimited JSON: cdr_data.ndjson or
+        shards cdr_data-00000.ndjson, ... Each JSON form may also be gzip or
+        zstd compressed (cdr_data.json.gz, cdr_data-00000.ndjson.zst, ...)
+        """
+        filepath = os.path.join(self.data_directory, filename)
+        stem = os.path.splitext(filepath)[0]
+        if os.path.exists(stem + '.parquet'):
+            return [stem + '.parquet']
         
-        return converted_data
+        suffixes = [''] + list(COMPRESSION_SUFFIXES)
+        for candidate in [filepath + suffix for suffix in suffixes] + [stem + '.ndjson' + suffix for suffix in suffixes]:
+            if os.path.exists(candidate):
+                return [candidate]
+        for suffix in suffixes:
+            shards = sorted(glob.glob(glob.escape(stem) + '-*.ndjson' + suffix))
+            if shards:
+                return shards
+        return []
     
-    def validate_cassandra_data(self, data: List[Dict], table_name: str) -> List[Dict]:
-        """Validate and clean data for Cassandra tables"""
-        valid_data = []
+    def iter_json_records(self, filename: str) -> Iterator[Dict]:
+        """Stream the records of a dataset (JSON array or NDJSON shards) without reading it whole"""
+        paths = self.dataset_files(filename)
+        if not paths:
+            raise FileNotFoundError(f"File not found: {os.path.join(self.data_directory, filename)}")
         
-        required_fields = {
-            'call_records': ['call_id', 'caller_id', 'callee_id', 'call_start_time', 'call_end_time'],
-            'sms_records': ['sms_id', 'sender_id', 'receiver_id', 'sent_time'],
-            'data_usage': ['usage_id', 'customer_id', 'session_start', 'session_end']
-        }
+        for path in paths:
+            if path.endswith('.parquet'):
+                for records in iter_parquet_row_groups(path):
+                    yield from records
+                continue
+            
+            # Compressed files are decompressed block by block as the parser reads
+            with open_text(path) as f:
+                if is_ndjson(path):
+                    yield from iter_ndjson(f)
+                else:
+                    yield from iter_json_array(f)
+    
+    def iter_json_chunks(self, filename: str) -> Iterator[List[Dict]]:
+        """Stream a dataset as lists of at most chunk_size records"""
+        return iter_chunks(self.iter_json_records(filename), self.chunk_size)
+    
+    def to_rows(self, records: List[Dict], table_name: str) -> List[tuple]:
+        """Validated records as tuples in CassandraManager.TABLE_COLUMNS order"""
+        columns = CassandraManager.TABLE_COLUMNS[table_name]
+        rows = []
+        for record in records:
+            try:
+                rows.append(tuple(record[column] for column in columns))
+            except KeyError:
+                continue
         
-        required = required_fields.get(table_name, [])
+        if len(rows) < len(records):
+            self.logger.warning(f"⚠️ Dropped {len(records) - len(rows)} {table_name} records with missing columns")
+        return rows
+    
+    def prepare_records(self, records: List[Dict], kind: str, target: str, convert: bool = True,
+                        compact: bool = False, decoder: Optional[ColumnDecoder] = None) -> List:
+        """
+        Convert (unless already typed) and validate raw records for a Cassandra table or MongoDB collection
+        compact=True returns Cassandra rows as tuples (see to_rows), which pickle
+        far smaller than dicts when sent back from a worker process
+        """
+        if kind == 'mongodb':
+            self.assign_document_ids(records)
+        converted_data = self.convert_datetime_strings(records, decoder) if convert else records
+        if kind == 'cassandra':
+            validated_data = self.validate_cassandra_data(converted_data, target)
+            return self.to_rows(validated_data, target) if compact else validated_data
+        return self.validate_mongodb_data(converted_data, target)
+    
+    def assign_document_ids(self, records: List[Dict]) -> List[Dict]:
+        """Give raw MongoDB records without an _id their deterministic document_id"""
+        for record in records:
+            if '_id' not in record:
+                record['_id'] = document_id(record)
+        return records
+    
+    def chunk_layout(self, filename: str, pooled: Optional[bool] = None) -> Dict:
+        """What one chunk of iter_prepared_chunks is, as recorded in the load checkpoint"""
+        paths = self.dataset_files(filename)
+        if pooled is None:
+            pooled = self.workers > 1
+        if pooled and self._ranges_splittable(paths):
+            return {'unit': 'ndjson_range', 'range_bytes': self.range_bytes}
+        return {'unit': 'records', 'chunk_size': self.chunk_size}
+    
+    def _ranges_splittable(self, paths: List[str]) -> bool:
+        """Byte ranges need plain NDJSON; compressed shards are parsed here and converted by the pool"""
+        return bool(paths) and all(path.endswith('.ndjson') for path in paths)
+    
+    def _ordered_pool_map(self, executor: ProcessPoolExecutor, fn, arguments) -> Iterator:
+        """executor.map in submission order with at most 2 * workers tasks in flight"""
+        pending = deque()
+        for args in arguments:
+            pending.append(executor.submit(fn, *args))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    
+    def iter_prepared_chunks(self, filename: str, kind: str, target: str, skip_chunks: int = 0) -> Iterator[List]:
+        """
+        Converted and validated chunks of a dataset, in file order
+        Cassandra chunks are tuples in TABLE_COLUMNS order, MongoDB chunks documents.
+        With workers > 1 a process pool converts and validates the chunks; NDJSON
+        files are split at line boundaries into byte ranges that the workers also parse.
+        One ColumnDecoder serves the whole dataset, so datetime formats are detected once.
+        The first skip_chunks chunks (see chunk_layout) are read past without being
+        converted; NDJSON ranges are skipped without being read at all
+        """
+        paths = self.dataset_files(filename)
+        if paths and paths[0].endswith('.parquet'):
+            # Parquet columns are already typed: no text parsing or datetime conversion
+            chunks = (chunk for row_group in iter_parquet_row_groups(paths[0])
+                      for chunk in iter_chunks(row_group, self.chunk_size))
+            for chunk in islice(chunks, skip_chunks, None):
+                yield self.prepare_records(chunk, kind, target, convert=False, compact=True)
+            return
         
-        for record in data:
-            # Check required fields
-            if all(field in record and record[field] is not None for field in required):
-                # Additional validation
-                if table_name == 'call_records':
-                    if isinstance(record.get('duration_seconds'), (int, float)) and record['duration_seconds'] >= 0:
-                        valid_data.append(record)
-                elif table_name == 'sms_records':
-                    if isinstance(record.get('message_length'), (int, float)) and record['message_length'] > 0:
-                        valid_data.append(record)
-                elif table_name == 'data_usage':
-                    if isinstance(record.get('data_consumed_mb'), (int, float)) and record['data_consumed_mb'] > 0:
-                        valid_data.append(record)
-                else:
-                    valid_data.append(record)
+        decoder = ColumnDecoder()
+        if self.workers <= 1:
+            for raw_chunk in islice(self.iter_json_chunks(filename), skip_chunks, None):
+                yield self.prepare_records(raw_chunk, kind, target, compact=True, decoder=decoder)
+            return
         
-        self.logger.info(f"Validated {len(valid_data)}/{len(data)} records for {table_name}")
-        return valid_data
+        # Workers get a copy of the decoder, so detect the formats before submitting
+        decoder.detect(next(iter_chunks(self.iter_json_records(filename), 100), []))
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            if self._ranges_splittable(paths):
+                ranges = (
+                    (path, start, end, kind, target, decoder)
+                    for path in paths for start, end in split_line_ranges(path, self.range_bytes)
+                )
+                results = self._ordered_pool_map(executor, _parse_ndjson_range, islice(ranges, skip_chunks, None))
+            else:
+                # JSON arrays are parsed here; workers take the per-field conversion and validation
+                chunks = ((raw_chunk, kind, target, decoder)
+                          for raw_chunk in islice(self.iter_json_chunks(filename), skip_chunks, None))
+                results = self._ordered_pool_map(executor, _prepare_chunk, chunks)
+            for rows, rejections in results:
+                self.count_rejections(target, rejections)
+                yield rows
+    
+    def convert_datetime_strings(self, data: List[Dict], decoder: Optional[ColumnDecoder] = None) -> List[Dict]:
+        """
+        Convert ISO datetime strings back to datetime objects and ID strings to UUIDs
+        Decoding is column-wise (see ColumnDecoder); pass the same decoder for every
+        chunk of a file so each field's format is detected only once
+        """
+        return (decoder or ColumnDecoder()).decode(data)
+    
+    def validate_cassandra_data(self, data: List[Dict], table_name: str) -> List[Dict]:
+        """Validate and clean data for Cassandra tables"""
+        return self.validate_records(data, table_name)
     
     def validate_mongodb_data(self, data: List[Dict], collection_name: str) -> List[Dict]:
         """Validate and clean data for MongoDB collections"""
-        valid_data = []
+        return self.validate_records(data, collection_name)
+    
+    def validate_records(self, data: List[Dict], target: str) -> List[Dict]:
+        """
+        Keep the records that pass the target's compiled schema (see record_schemas)
+        Rejections are counted per rule; targets without a schema keep every record
+        """
+        schema = get_schema(target)
+        if schema is None:
+            return data
         
-        required_fields = {
-            'customers': ['customer_id', 'personal_info'],
-            'subscriptions': ['customer_id', 'plan_type'],
-            'billing': ['customer_id', 'billing_month'],
-            'customer_support': ['customer_id', 'ticket_id']
-        }
+        valid_data, rejections = schema.filter(data)
+        self.count_rejections(target, rejections)
+        if rejections:
+            self.logger.info(f"Validated {len(valid_data)}/{len(data)} records for {target} "
+                             f"(rejected: {format_rejections(rejections)})")
+        else:
+            self.logger.info(f"Validated {len(valid_data)}/{len(data)} records for {target}")
+        return valid_data
+    
+    def count_rejections(self, target: str, rejections: Dict[str, int]):
+        self.rejections.setdefault(target, Counter()).update(rejections)
+    
+    def log_rejections(self, target: str):
+        """Per-rule totals of the records rejected while loading target"""
+        rejections = self.rejections.get(target)
+        if rejections:
+            self.logger.warning(f"⚠️ {sum(rejections.values())} {target} records rejected: {format_rejections(rejections)}")
+    
+    def suspend_rollups(self, cassandra_manager, table_name: str) -> Optional[tuple]:
+        """
+        Mark the call rollups stale before call_records is loaded
+        Returns the state restore_rollups needs (None for other tables)
+        """
+        if table_name != 'call_records':
+            return None
+        # The rollup counters are bumped on every insert while call_records inserts
+        # are upserts, so a reload over existing rows would count them twice; the
+        # rollups only stay usable when the load starts from an empty table. A resumed
+        # load restarts at the first unfinished chunk, whose written rows were counted
+        # already, so it leaves them stale as well
+        entry = self.checkpoint.get(table_name)
+        resumed = self.checkpoint.resume and bool(entry and entry['chunks_done'])
+        rollups_valid = not resumed and cassandra_manager.is_table_empty(table_name)
+        rollup_failures = cassandra_manager.rollup_failures
+        cassandra_manager.set_rollup_state(False)
+        return rollups_valid, rollup_failures
+    
+    def restore_rollups(self, cassandra_manager, rollup_state: Optional[tuple]):
+        """Mark the rollups valid again if no rollup update failed during the load"""
+        if rollup_state is None:
+            return
+        rollups_valid, rollup_failures = rollup_state
+        cassandra_manager.set_rollup_state(rollups_valid and cassandra_manager.rollup_failures == rollup_failures)
+    
+    def load_target(self, filename: str, kind: str, target: str, write_chunk: Callable[[List], int]) -> int:
+        """
+        Convert, validate and write one dataset chunk by chunk, checkpointing each
+        written chunk; returns the records written by this run. On failure the
+        checkpoint keeps every chunk written so far and the target stays incomplete
+        """
+        entry = self.checkpoint.start(target, self.dataset_files(filename), self.chunk_layout(filename))
+        if entry['completed']:
+            self.logger.info(f"⏭️ {target} already loaded ({entry['records_written']:,} records), skipping")
+            return 0
         
-        required = required_fields.get(collection_name, [])
+        inserted_count = 0
+        self.rejections.pop(target, None)
+        try:
+            self.logger.info(f"Loading {filename} to {target}...")
+            for chunk in self.iter_prepared_chunks(filename, kind, target, skip_chunks=entry['chunks_done']):
+                written = write_chunk(chunk)
+                inserted_count += written
+                self.check_chunk_written(chunk, written)
+                self.checkpoint.chunk_done(target, written)
+            
+            self.checkpoint.complete(target)
+            self.logger.info(f"✅ Successfully loaded {inserted_count} records to {target}")
+            self.log_rejections(target)
         
-        for record in data:
-            # Check required fields
-            if all(field in record and record[field] is not None for field in required):
-                # Additional validation for specific collections
-                if collection_name == 'customers':
-                    if isinstance(record.get('personal_info'), dict):
-                        valid_data.append(record)
-                elif collection_name == 'billing':
-                    if isinstance(record.get('amount'), (int, float)) and record['amount'] > 0:
-                        valid_data.append(record)
-                else:
-                    valid_data.append(record)
+        except Exception as e:
+            self.logger.error(f"❌ Failed to load {filename} after {inserted_count} records: {e}")
         
-        self.logger.info(f"Validated {len(valid_data)}/{len(data)} records for {collection_name}")
-        return valid_data
+        return inserted_count
+    
+    def check_chunk_written(self, chunk: List, written: int):
+        """A chunk is checkpointed only if all of it was written; otherwise stop so a resume rewrites it"""
+        if written < len(chunk):
+            raise RuntimeError(f"only {written} of {len(chunk)} records in the chunk were written")
     
     def load_cassandra_data(self, cassandra_manager) -> Dict[str, int]:
-        """Load all Cassandra data from JSON files"""
+        """
+        Load all Cassandra data from JSON files
+        INSERTs are upserts, so resumed chunks are idempotent for the tables; the rollup
+        counters are not, so a resumed load leaves them stale (see suspend_rollups)
+        """
         results = {}
         
-        cassandra_files = {
-            'cdr_data.json': 'call_records',
-            'sms_data.json': 'sms_records',
-            'data_usage.json': 'data_usage'
-        }
-        
-        for filename, table_name in cassandra_files.items():
-            try:
-                self.logger.info(f"Loading {filename} to {table_name}...")
-                
-                # Load and convert data
-                raw_data = self.load_json_file(filename)
-                converted_data = self.convert_datetime_strings(raw_data)
-                validated_data = self.validate_cassandra_data(converted_data, table_name)
-                
-                # Insert data
-                inserted_count = cassandra_manager.insert_batch_data(table_name, validated_data)
-                results[table_name] = inserted_count
-                
-                self.logger.info(f"✅ Successfully loaded {inserted_count} records to {table_name}")
-                
-            except Exception as e:
-                self.logger.error(f"❌ Failed to load {filename}: {e}")
-                results[table_name] = 0
+        for filename, table_name in self.CASSANDRA_FILES.items():
+            rollup_state = self.suspend_rollups(cassandra_manager, table_name)
+            
+            results[table_name] = self.load_target(
+                filename, 'cassandra', table_name,
+                lambda rows, table_name=table_name: cassandra_manager.insert_rows(table_name, rows)
+            )
+            
+            if self.checkpoint.get(table_name)['completed']:
+                self.restore_rollups(cassandra_manager, rollup_state)
         
         return results
     
     def load_mongodb_data(self, mongo_manager) -> Dict[str, int]:
-        """Load all MongoDB data from JSON files"""
+        """Load all MongoDB data from JSON files, upserting on deterministic _ids so reloads do not duplicate"""
         results = {}
         
-        mongodb_files = {
-            'customers.json': 'customers',
-            'subscriptions.json': 'subscriptions',
-            'billing_records.json': 'billing',
-            'support_tickets.json': 'customer_support'
-        }
-        
-        for filename, collection_name in mongodb_files.items():
-            try:
-                self.logger.info(f"Loading {filename} to {collection_name}...")
-                
-                # Load and convert data
-                raw_data = self.load_json_file(filename)
-                converted_data = self.convert_datetime_strings(raw_data)
-                validated_data = self.validate_mongodb_data(converted_data, collection_name)
-                
-                # Insert data
-                inserted_count = mongo_manager.insert_batch_data(collection_name, validated_data)
-                results[collection_name] = inserted_count
-                
-                self.logger.info(f"✅ Successfully loaded {inserted_count} records to {collection_name}")
-                
-            except Exception as e:
-                self.logger.error(f"❌ Failed to load {filename}: {e}")
-                results[collection_name] = 0
+        for filename, collection_name in self.MONGODB_FILES.items():
+            results[collection_name] = self.load_target(
+                filename, 'mongodb', collection_name,
+                lambda documents, collection_name=collection_name: mongo_manager.upsert_batch_data(
+                    collection_name, documents
+                )
+            )
         
         return results
     
     def verify_data_directory(self) -> Dict[str, bool]:
-        """Verify that all required JSON files exist"""
+        """Verify that all required datasets exist (as JSON arrays or NDJSON files/shards)"""
         required_files = [
             'cdr_data.json',
             'sms_data.json', 
@@ -208,14 +394,18 @@ class TelcoDataLoader:
         
         verification = {}
         for filename in required_files:
-            filepath = os.path.join(self.data_directory, filename)
-            verification[filename] = os.path.exists(filepath)
+            verification[filename] = bool(self.dataset_files(filename))
         
         return verification
     
     def get_data_summary(self) -> Dict[str, Any]:
-        """Get comprehensive summary of data in the export directory"""
+        """
+        Get comprehensive summary of data in the export directory
+        Datasets described by an up-to-date manifest.json are summarized from it
+        without opening the data; others fall back to a streaming count
+        """
         verification = self.verify_data_directory()
+        manifest = read_manifest(self.data_directory)
         summary = {
             'directory': self.data_directory,
             'files_found': sum(verification.values()),
@@ -223,28 +413,43 @@ class TelcoDataLoader:
             'file_status': verification,
             'estimated_records': {},
             'file_sizes': {},
-            'data_quality': {}
+            'data_quality': {},
+            'summary_source': {}
         }
         
         # Get detailed information for existing files
         for filename, exists in verification.items():
             if exists:
                 try:
-                    filepath = os.path.join(self.data_directory, filename)
+                    paths = self.dataset_files(filename)
                     
-                    # Get file size
-                    file_size = os.path.getsize(filepath)
+                    # Get file size (all shards together)
+                    file_size = sum(os.path.getsize(path) for path in paths)
                     summary['file_sizes'][filename] = file_size
                     
-                    # Get record count and basic validation
-                    data = self.load_json_file(filename)
-                    summary['estimated_records'][filename] = len(data)
+                    entry = manifest_entry(manifest, os.path.splitext(filename)[0], paths)
+                    if entry:
+                        summary['estimated_records'][filename] = entry['record_count']
+                        summary['summary_source'][filename] = 'manifest'
+                        if entry['record_count']:
+                            summary['data_quality'][filename] = {
+                                'has_data': True,
+                                'sample_fields': list(entry['fields']),
+                                'field_count': len(entry['fields']),
+                                'field_types': entry['fields'],
+                                'time_ranges': entry['time_ranges'],
+                                'checksums': {file['name']: file['checksum'] for file in entry['files']}
+                            }
+                        continue
+                    
+                    record_count, sample_record = self._scan_dataset(filename, paths)
+                    summary['estimated_records'][filename] = record_count
+                    summary['summary_source'][filename] = 'scan'
                     
                     # Basic data quality check
-                    if data:
-                        sample_record = data[0]
+                    if record_count:
                         summary['data_quality'][filename] = {
-                            'has_data': len(data) > 0,
+                            'has_data': record_count > 0,
                             'sample_fields': list(sample_record.keys()) if isinstance(sample_record, dict) else [],
                             'field_count': len(sample_record) if isinstance(sample_record, dict) else 0
                         }
@@ -255,6 +460,23 @@ class TelcoDataLoader:
         
         return summary
     
+    def _scan_dataset(self, filename: str, paths: List[str]) -> tuple:
+        """Record count and first record of a dataset without a manifest, streaming through it"""
+        sample_record = next(self.iter_json_records(filename), None)
+        if paths[0].endswith('.parquet'):
+            return parquet_row_count(paths[0]), sample_record
+        
+        if all(is_ndjson(path) for path in paths):
+            # One record per non-blank line; only the sample is decoded
+            record_count = 0
+            for path in paths:
+                with open_binary(path) as f:
+                    record_count += sum(1 for line in f if line.strip())
+            return record_count, sample_record
+        
+        record_count = sum(1 for _ in self.iter_json_records(filename))
+        return record_count, sample_record
+    
     def create_data_backup(self, backup_directory: str = None) -> bool:
         """Create backup of current data directory"""
         if not backup_directory:
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from .column_decoder import DATETIME_FIELDS
+from .compression import split_compression
+
+MANIFEST_FILENAME = 'manifest.json'
+
+logger = logging.getLogger(__name__)
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, float):
+        return 'number'
+    if isinstance(value, datetime):
+        return 'datetime'
+    if isinstance(value, date):
+        return 'date'
+    if isinstance(value, UUID):
+        return 'uuid'
+    if isinstance(value, dict):
+        return 'object'
+    if isinstance(value, list):
+        return 'array'
+    if isinstance(value, str):
+        return 'string'
+    return type(value).__name__
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and len(value) > 10 and value[10] == 'T':
+        try:
+            return datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+        except ValueError:
+            return None
+    return None
+
+def file_checksum(path: str, block_size: int = 1 << 20) -> str:
+    """sha256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return 'sha256:' + digest.hexdigest()
+
+class DatasetDescriber:
+    """
+    Builds a dataset's manifest entry from its records, fed chunk by chunk:
+    only the counts, field types and time ranges are kept, not the records
+    """
+    
+    def __init__(self):
+        self.record_count = 0
+        self.fields: Dict[str, set] = {}
+        self.time_ranges: Dict[str, List[datetime]] = {}
+    
+    def add(self, records: Iterable[Dict]):
+        fields = self.fields
+        time_ranges = self.time_ranges
+        for record in records:
+            self.record_count += 1
+            for field, value in record.items():
+                fields.setdefault(field, set()).add(_type_name(value))
+                if field in DATETIME_FIELDS:
+                    moment = _as_datetime(value)
+                    if moment is None:
+                        continue
+                    current = time_ranges.get(field)
+                    if current is None:
+                        time_ranges[field] = [moment, moment]
+                    elif moment < current[0]:
+                        current[0] = moment
+                    elif moment > current[1]:
+                        current[1] = moment
+    
+    def entry(self, paths: List[str], format: str) -> Dict:
+        return {
+            'format': format,
+            'compression': split_compression(paths[0])[1] if paths else None,
+            'record_count': self.record_count,
+            'fields': {field: sorted(types) for field, types in self.fields.items()},
+            'time_ranges': {field: [low.isoformat(), high.isoformat()] for field, (low, high) in self.time_ranges.items()},
+            'files': [
+                {'name': os.path.basename(path), 'bytes': os.path.getsize(path), 'checksum': file_checksum(path)}
+                for path in paths
+            ]
+        }
+
+def describe_dataset(records: Iterable[Dict], paths: List[str], format: str) -> Dict:
+    """
+    Manifest entry for an exported dataset: record count, top-level field schema
+    (JSON type names per field; several when values differ), min/max per datetime
+    field and the size and checksum of every written file
+    """
+    describer = DatasetDescriber()
+    describer.add(records)
+    return describer.entry(paths, format)
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    """The directory's manifest, or None if it has none (or an unreadable one)"""
+    path = os.path.join(directory, MANIFEST_FILENAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+        return None
+
+def update_manifest(directory: str, name: str, entry: Dict) -> str:
+    """Add or replace one dataset's entry; the file is replaced atomically"""
+    manifest = read_manifest(directory) or {'version': 1, 'datasets': {}}
+    manifest['datasets'][name] = entry
+    
+    path = os.path.join(directory, MANIFEST_FILENAME)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+def manifest_entry(manifest: Optional[Dict], name: str, paths: List[str]) -> Optional[Dict]:
+    """
+    The manifest entry for a dataset if it still describes the files on disk: same
+    file names and byte sizes (checksums are recorded for integrity checks but not
+    recomputed here, which would mean reading the data again)
+    """
+    if not manifest:
+        return None
+    entry = manifest.get('datasets', {}).get(name)
+    if not entry:
+        return None
+    
+    on_disk = [[os.path.basename(path), os.path.getsize(path)] for path in paths]
+    if on_disk != [[file['name'], file['bytes']] for file in entry['files']]:
+        return None
+    return entry
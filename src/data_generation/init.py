@@ -4,8 +4,19 @@ Data generation and loading module for Telco NoSQL Platform
 
 from .data_loader import TelcoDataLoader
 from .telco_data_generator import TelcoDataGenerator
+from .json_stream import iter_json_array, iter_chunks
+from .column_decoder import ColumnDecoder
+from .load_pipeline import LoadPipeline
+from .stream_loader import GeneratedDataStreamer
+from .traffic_model import TrafficModel
 
 __all__ = [
     'TelcoDataLoader',
-    'TelcoDataGenerator'
+    'TelcoDataGenerator',
+    'ColumnDecoder',
+    'LoadPipeline',
+    'GeneratedDataStreamer',
+    'TrafficModel',
+    'iter_json_array',
+    'iter_chunks'
 ]
@@ -0,0 +1,158 @@
+import json
+import os
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Dict, IO, Iterable, Iterator, List, Tuple
+from uuid import UUID
+
+# Characters JSON allows between tokens
+_WHITESPACE = ' \t\n\r'
+
+class _ArrayReader:
+    """Incremental tokenizer state: a text buffer refilled from the file as it is consumed"""
+    
+    def __init__(self, fileobj: IO[str], read_size: int):
+        self.fileobj = fileobj
+        self.read_size = read_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+    
+    def fill(self) -> bool:
+        """Read the next block; False once the file is exhausted"""
+        if self.eof:
+            return False
+        block = self.fileobj.read(self.read_size)
+        if not block:
+            self.eof = True
+            return False
+        
+        # Drop what has already been parsed so the buffer stays around one block
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+    
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+def iter_json_array(fileobj: IO[str], read_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one at a time
+    Only the current block and the element being decoded are held in memory,
+    so a multi-gigabyte export is parsed with constant memory
+    """
+    decoder = json.JSONDecoder()
+    reader = _ArrayReader(fileobj, read_size)
+    
+    if reader.peek() != '[':
+        raise reader.error("Expected a JSON array")
+    reader.pos += 1
+    
+    expect_value = True
+    count = 0
+    while True:
+        char = reader.peek()
+        if char == '':
+            raise reader.error("Unterminated JSON array")
+        if char == ']':
+            if expect_value and count:
+                raise reader.error("Trailing ',' in JSON array")
+            reader.pos += 1
+            break
+        if not expect_value:
+            if char != ',':
+                raise reader.error("Expected ',' or ']' between array elements")
+            reader.pos += 1
+            expect_value = True
+            continue
+        
+        while True:
+            try:
+                value, end = decoder.raw_decode(reader.buffer, reader.pos)
+            except json.JSONDecodeError:
+                # The element may continue in the next block
+                if reader.fill():
+                    continue
+                raise
+            # A scalar that ends exactly at the block boundary may be cut short
+            if end == len(reader.buffer) and reader.fill():
+                continue
+            break
+        
+        reader.pos = end
+        expect_value = False
+        count += 1
+        yield value
+    
+    if reader.peek() != '':
+        raise reader.error("Extra data after JSON array")
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most chunk_size items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_ndjson(fileobj: IO[str]) -> Iterator[Any]:
+    """Yield one decoded value per non-blank line of a newline-delimited JSON file"""
+    for line in fileobj:
+        if line.strip():
+            yield json.loads(line)
+
+def json_default(value: Any):
+    """json.dump fallback: ISO 8601 for datetimes (the loader converts them back), str for UUIDs"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def write_ndjson(records: Iterable[Dict], fileobj: IO[str]) -> int:
+    """Write one compact JSON document per line; returns the number of records"""
+    count = 0
+    for record in records:
+        fileobj.write(json.dumps(record, default=json_default, ensure_ascii=False))
+        fileobj.write('\n')
+        count += 1
+    return count
+
+def split_line_ranges(path: str, target_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into [start, end) byte ranges of about target_bytes each
+    Every boundary is moved forward to just after a newline, so each range
+    holds whole NDJSON lines and can be parsed independently
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    
+    with open(path, 'rb') as f:
+        while start < size:
+            end = start + max(target_bytes, 1)
+            if end < size:
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            end = min(end, size)
+            ranges.append((start, end))
+            start = end
+    
+    return ranges
+
+def read_ndjson_range(path: str, start: int, end: int) -> List[Any]:
+    """Decode the NDJSON lines in bytes [start, end) of a file"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
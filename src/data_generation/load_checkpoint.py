@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+CHECKPOINT_FILENAME = '.load_checkpoint.json'
+
+class LoadCheckpoint:
+    """
+    Local manifest of load progress, one entry per Cassandra table / MongoDB collection
+    An entry counts the chunks written in file order together with the layout that
+    defines a chunk (records per chunk or NDJSON range size) and a fingerprint of the
+    source files. A resumed load skips that many chunks only if layout and fingerprint
+    still match; otherwise the target starts over
+    """
+    
+    def __init__(self, data_directory: str, resume: bool = False):
+        self.path = os.path.join(data_directory, CHECKPOINT_FILENAME)
+        self.resume = resume
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.targets: Dict[str, Dict] = self._read() if resume else {}
+    
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('targets', {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️ Ignoring unreadable checkpoint {self.path}: {e}")
+            return {}
+    
+    def _save(self):
+        """Write atomically so a crash mid-write leaves the previous checkpoint intact"""
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'targets': self.targets}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"⚠️ Failed to write checkpoint {self.path}: {e}")
+    
+    @staticmethod
+    def fingerprint(paths: List[str]) -> List[List]:
+        """Name, size and modification time of each source file"""
+        fingerprint = []
+        for path in paths:
+            stat = os.stat(path)
+            fingerprint.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+        return fingerprint
+    
+    def start(self, target: str, paths: List[str], layout: Dict) -> Dict:
+        """
+        Begin loading a target; returns its entry. entry['chunks_done'] chunks can be
+        skipped and entry['completed'] means the whole target is already loaded
+        """
+        fingerprint = self.fingerprint(paths)
+        with self._lock:
+            entry = self.targets.get(target)
+            if entry and entry['fingerprint'] == fingerprint and entry['layout'] == layout:
+                if entry['chunks_done']:
+                    self.logger.info(f"⏭️ Resuming {target} after {entry['chunks_done']} chunks "
+                                     f"({entry['records_written']:,} records)")
+                return dict(entry)
+            
+            if entry:
+                self.logger.warning(f"⚠️ Source files or chunk layout of {target} changed; loading it from the start")
+            entry = {'fingerprint': fingerprint, 'layout': layout, 'chunks_done': 0,
+                     'records_written': 0, 'completed': False}
+            self.targets[target] = entry
+            self._save()
+            return dict(entry)
+    
+    def chunk_done(self, target: str, records_written: int):
+        """Record that the next chunk of target is durably written"""
+        with self._lock:
+            entry = self.targets[target]
+            entry['chunks_done'] += 1
+            entry['records_written'] += records_written
+            self._save()
+    
+    def complete(self, target: str):
+        with self._lock:
+            self.targets[target]['completed'] = True
+            self._save()
+    
+    def get(self, target: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self.targets.get(target)
+            return dict(entry) if entry else None
@@ -0,0 +1,282 @@
+import logging
+import queue
+import threading
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .column_decoder import ColumnDecoder
+from .columnar_format import iter_parquet_row_groups
+from .json_stream import iter_chunks
+
+STAGES = ('reader', 'decoder', 'validator', 'writer')
+
+# Marks the end of a stage's output
+_DONE = object()
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage of the same file failed"""
+
+class LoadPipeline:
+    """
+    Pipelined loader: every file flows through reader -> decoder -> validator -> writer
+    threads connected by bounded queues, so reading and parsing the next chunks
+    overlaps with database writes. Cassandra and MongoDB files load concurrently
+    (one thread per database, files of a database in order).
+    Each stage records how long it was busy and each queue how full it was: the
+    stage with the most busy time is the bottleneck, a queue that stays full sits
+    in front of a slow stage and one that stays empty behind a slow stage.
+    Written chunks are recorded in the loader's checkpoint like in load_target
+    """
+    
+    def __init__(self, data_loader, queue_size: int = 4, report_interval: float = 5.0,
+                 progress_callback: Optional[Callable[[Dict], None]] = None):
+        self.data_loader = data_loader
+        # Chunks buffered between two stages (memory bound: about 3 * queue_size chunks per file)
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.progress_callback = progress_callback
+        self.stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    def run(self, cassandra_manager=None, mongo_manager=None) -> Dict:
+        """Load every dataset into the given managers; returns per-target counts and the stage report"""
+        results = {'cassandra': {}, 'mongodb': {}}
+        jobs = []
+        if cassandra_manager:
+            jobs.append(('cassandra', cassandra_manager, self.data_loader.CASSANDRA_FILES))
+        if mongo_manager:
+            jobs.append(('mongodb', mongo_manager, self.data_loader.MONGODB_FILES))
+        
+        start_time = time.time()
+        finished = threading.Event()
+        reporter = threading.Thread(target=self._report_loop, args=(finished,), daemon=True)
+        reporter.start()
+        
+        threads = [
+            threading.Thread(target=self._load_database, args=(kind, manager, files, results[kind]),
+                             name=f"load-{kind}")
+            for kind, manager, files in jobs
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        finished.set()
+        reporter.join()
+        
+        results['total_time'] = time.time() - start_time
+        results['stages'] = self.report()
+        self._log_report(results['stages'])
+        return results
+    
+    def _load_database(self, kind: str, manager, files: Dict[str, str], results: Dict[str, int]):
+        for filename, target in files.items():
+            results[target] = self.load_file(filename, kind, target, manager)
+    
+    def load_file(self, filename: str, kind: str, target: str, manager) -> int:
+        """Run one file through the four stages; returns the number of records written"""
+        checkpoint = self.data_loader.checkpoint
+        entry = checkpoint.start(target, self.data_loader.dataset_files(filename),
+                                 self.data_loader.chunk_layout(filename, pooled=False))
+        if entry['completed']:
+            self.logger.info(f"⏭️ {target} already loaded ({entry['records_written']:,} records), skipping")
+            return 0
+        
+        self.logger.info(f"Loading {filename} to {target} (pipelined)...")
+        stats = self._new_stats(target)
+        self.data_loader.rejections.pop(target, None)
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in STAGES[1:]]
+        abort = threading.Event()
+        errors = []
+        
+        paths = self.data_loader.dataset_files(filename)
+        typed = bool(paths) and paths[0].endswith('.parquet')
+        decoder = ColumnDecoder()
+        
+        def read():
+            if typed:
+                # Parquet columns are already typed; the decoder passes these chunks through
+                chunks = (chunk for row_group in iter_parquet_row_groups(paths[0])
+                          for chunk in iter_chunks(row_group, self.data_loader.chunk_size))
+            else:
+                chunks = self.data_loader.iter_json_chunks(filename)
+            return islice(chunks, entry['chunks_done'], None)
+        
+        def decode(chunk):
+            if kind == 'mongodb':
+                self.data_loader.assign_document_ids(chunk)
+            return chunk if typed else decoder.decode(chunk)
+        
+        def validate(chunk):
+            if kind == 'cassandra':
+                return self.data_loader.to_rows(self.data_loader.validate_cassandra_data(chunk, target), target)
+            return self.data_loader.validate_mongodb_data(chunk, target)
+        
+        def write(chunk):
+            if kind == 'cassandra':
+                written = manager.insert_rows(target, chunk)
+            else:
+                written = manager.upsert_batch_data(target, chunk)
+            self.data_loader.check_chunk_written(chunk, written)
+            checkpoint.chunk_done(target, written)
+            return written
+        
+        rollup_state = self.data_loader.suspend_rollups(manager, target) if kind == 'cassandra' else None
+        threads = [
+            threading.Thread(target=self._run_source, args=(read, queues[0], stats['reader'], abort, errors)),
+            threading.Thread(target=self._run_stage, args=(decode, queues[0], queues[1], stats['decoder'], abort, errors)),
+            threading.Thread(target=self._run_stage, args=(validate, queues[1], queues[2], stats['validator'], abort, errors)),
+            threading.Thread(target=self._run_stage, args=(write, queues[2], None, stats['writer'], abort, errors))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        inserted_count = stats['writer']['written']
+        if errors:
+            self.logger.error(f"❌ Failed to load {filename} after {inserted_count} records: {errors[0]}")
+            return inserted_count
+        
+        checkpoint.complete(target)
+        self.data_loader.restore_rollups(manager, rollup_state)
+        self.logger.info(f"✅ Successfully loaded {inserted_count} records to {target}")
+        self.data_loader.log_rejections(target)
+        return inserted_count
+    
+    def _new_stats(self, target: str) -> Dict[str, Dict]:
+        stats = {
+            stage: {'chunks': 0, 'records': 0, 'busy_seconds': 0.0, 'depth_samples': 0, 'depth_total': 0, 'max_depth': 0}
+            for stage in STAGES
+        }
+        stats['writer']['written'] = 0
+        stats['started_at'] = time.time()
+        with self._lock:
+            self.stats[target] = stats
+        return stats
+    
+    def _put(self, outbox: queue.Queue, item, abort: threading.Event):
+        """Blocking put that gives up once the file is aborted (so a full queue cannot hang a stage)"""
+        while True:
+            if abort.is_set():
+                raise PipelineAborted()
+            try:
+                outbox.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def _get(self, inbox: queue.Queue, stage_stats: Dict, abort: threading.Event):
+        while True:
+            if abort.is_set():
+                raise PipelineAborted()
+            try:
+                depth = inbox.qsize()
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # Depth seen by the consumer: how much work was waiting for this stage
+            stage_stats['depth_samples'] += 1
+            stage_stats['depth_total'] += depth
+            stage_stats['max_depth'] = max(stage_stats['max_depth'], depth)
+            return item
+    
+    def _run_source(self, read: Callable[[], Iterator[List]], outbox: queue.Queue, stage_stats: Dict,
+                    abort: threading.Event, errors: List):
+        try:
+            chunks = read()
+            while True:
+                started = time.perf_counter()
+                chunk = next(chunks, _DONE)
+                stage_stats['busy_seconds'] += time.perf_counter() - started
+                if chunk is _DONE:
+                    break
+                stage_stats['chunks'] += 1
+                stage_stats['records'] += len(chunk)
+                self._put(outbox, chunk, abort)
+            self._put(outbox, _DONE, abort)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            errors.append(e)
+            abort.set()
+    
+    def _run_stage(self, work: Callable, inbox: queue.Queue, outbox: Optional[queue.Queue], stage_stats: Dict,
+                   abort: threading.Event, errors: List):
+        try:
+            while True:
+                chunk = self._get(inbox, stage_stats, abort)
+                if chunk is _DONE:
+                    break
+                started = time.perf_counter()
+                output = work(chunk)
+                stage_stats['busy_seconds'] += time.perf_counter() - started
+                stage_stats['chunks'] += 1
+                stage_stats['records'] += len(chunk)
+                
+                if outbox is None:
+                    stage_stats['written'] += output
+                else:
+                    self._put(outbox, output, abort)
+            if outbox is not None:
+                self._put(outbox, _DONE, abort)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            errors.append(e)
+            abort.set()
+    
+    def report(self) -> Dict[str, Dict]:
+        """Per target and stage: records, busy time, throughput and input queue depth; plus the bottleneck stage"""
+        report = {}
+        with self._lock:
+            snapshot = dict(self.stats)
+        
+        for target, stats in snapshot.items():
+            stages = {}
+            for stage in STAGES:
+                stage_stats = stats[stage]
+                busy = stage_stats['busy_seconds']
+                stages[stage] = {
+                    'chunks': stage_stats['chunks'],
+                    'records': stage_stats['records'],
+                    'busy_seconds': round(busy, 3),
+                    'records_per_second': round(stage_stats['records'] / busy, 1) if busy > 0 else None,
+                    'avg_queue_depth': (
+                        round(stage_stats['depth_total'] / stage_stats['depth_samples'], 2)
+                        if stage_stats['depth_samples'] else None
+                    ),
+                    'max_queue_depth': stage_stats['max_depth'] if stage != 'reader' else None
+                }
+            report[target] = {
+                'stages': stages,
+                'written': stats['writer']['written'],
+                'elapsed_seconds': round(time.time() - stats['started_at'], 3),
+                'bottleneck': max(STAGES, key=lambda stage: stats[stage]['busy_seconds'])
+            }
+        return report
+    
+    def _report_loop(self, finished: threading.Event):
+        """Periodic progress: records through each stage and current bottleneck per target"""
+        while not finished.wait(self.report_interval):
+            report = self.report()
+            for target, target_report in report.items():
+                counts = ' -> '.join(f"{stage} {target_report['stages'][stage]['records']:,}" for stage in STAGES)
+                self.logger.info(f"📊 {target}: {counts} (bottleneck: {target_report['bottleneck']})")
+            if self.progress_callback:
+                self.progress_callback(report)
+    
+    def _log_report(self, report: Dict[str, Dict]):
+        for target, target_report in report.items():
+            self.logger.info(f"📊 {target}: {target_report['written']:,} written in "
+                             f"{target_report['elapsed_seconds']:.2f}s, bottleneck: {target_report['bottleneck']}")
+            for stage, stage_report in target_report['stages'].items():
+                rate = stage_report['records_per_second']
+                depth = stage_report['avg_queue_depth']
+                self.logger.info(
+                    f"   {stage:<9} busy {stage_report['busy_seconds']:>8.3f}s  "
+                    f"{(f'{rate:,.0f} rec/s' if rate else '-'):>14}  "
+                    f"queue avg {depth if depth is not None else '-'} / max {stage_report['max_queue_depth'] or 0}"
+                )
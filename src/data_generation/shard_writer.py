@@ -0,0 +1,109 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+from .compression import COMPRESSIONS, open_text_output
+from .export_manifest import DatasetDescriber
+from .json_stream import json_default, write_ndjson
+
+class RollingShardWriter:
+    """
+    Write a dataset chunk by chunk without holding more than the current chunk
+    format='ndjson' rolls over to a new shard every shard_records records
+    (name-00000.ndjson, name-00001.ndjson, ... as TelcoDataLoader reads them);
+    format='json' writes one name.json array incrementally. Records also pass
+    through a DatasetDescriber, so the manifest entry needs no second read
+    """
+    FORMATS = ('json', 'ndjson')
+    
+    def __init__(self, output_directory: str, name: str, format: str = 'ndjson',
+                 compression: Optional[str] = None, shard_records: int = 1000000):
+        if format not in self.FORMATS:
+            raise ValueError(f"Chunked export writes one of {self.FORMATS}, not {format!r}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}")
+        if shard_records < 1:
+            raise ValueError(f"shard_records must be positive, got {shard_records}")
+        
+        self.output_directory = output_directory
+        self.name = name
+        self.format = format
+        self.suffix = f".{compression}" if compression else ''
+        self.shard_records = shard_records
+        self.describer = DatasetDescriber()
+        self.paths: List[str] = []
+        self._file = None
+        self._in_shard = 0
+        os.makedirs(output_directory, exist_ok=True)
+    
+    def write(self, records: List[Dict]):
+        """Append records, rolling over to the next shard when the current one is full"""
+        self.describer.add(records)
+        if self.format == 'json':
+            self._write_json(records)
+            return
+        
+        start = 0
+        while start < len(records):
+            if self._file is None or self._in_shard == self.shard_records:
+                self._next_shard()
+            end = min(len(records), start + self.shard_records - self._in_shard)
+            write_ndjson(records[start:end], self._file)
+            self._in_shard += end - start
+            start = end
+    
+    def _write_json(self, records: List[Dict]):
+        # Same bytes as json.dump of the whole list: '[' + ', '.join(items) + ']'
+        if self._file is None:
+            self._open(os.path.join(self.output_directory, f"{self.name}.json{self.suffix}"))
+            self._file.write('[')
+        for record in records:
+            if self._in_shard:
+                self._file.write(', ')
+            self._file.write(json.dumps(record, default=json_default, ensure_ascii=False))
+            self._in_shard += 1
+    
+    def _shard_path(self, index: int) -> str:
+        return os.path.join(self.output_directory, f"{self.name}-{index:05d}.ndjson{self.suffix}")
+    
+    def _next_shard(self):
+        if self._file is not None:
+            self._file.close()
+        self._open(self._shard_path(len(self.paths)))
+        self._in_shard = 0
+    
+    def _open(self, path: str):
+        self._file = open_text_output(path)
+        self.paths.append(path)
+    
+    def close(self) -> List[str]:
+        """Finish the last file and return every written path"""
+        if self.format == 'json':
+            if self._file is None:
+                self._open(os.path.join(self.output_directory, f"{self.name}.json{self.suffix}"))
+                self._file.write('[')
+            self._file.write(']')
+        elif self._file is None:
+            # An empty dataset still gets a (empty) first shard
+            self._next_shard()
+        self._file.close()
+        self._file = None
+        
+        if self.format == 'ndjson':
+            # Shards left over from an earlier, larger export would otherwise be loaded too
+            index = len(self.paths)
+            while os.path.exists(self._shard_path(index)):
+                os.remove(self._shard_path(index))
+                index += 1
+        return self.paths
+    
+    def manifest_entry(self) -> Dict:
+        return self.describer.entry(self.paths, self.format)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,178 @@
+import logging
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .column_decoder import ColumnDecoder
+from .data_loader import TelcoDataLoader
+from .telco_data_generator import TelcoDataGenerator
+from .vectorized import columns_to_records
+
+PHASES = ('generate', 'prepare', 'write')
+
+class GeneratedDataStreamer:
+    """
+    Load freshly generated records straight into Cassandra and MongoDB, without
+    writing export files: the generator's blocks (see TelcoDataGenerator.iter_blocks)
+    are split into chunks that are converted and validated by the data loader (like
+    a chunk read from disk) and written through the bulk write paths.
+    Memory is bounded by about 2 * workers blocks whatever the record counts, and a
+    seeded generator streams exactly the records a file export of that seed holds,
+    so rerunning a load rewrites the same rows and documents instead of adding new
+    ones. The call rollup counters are not idempotent: like a file load, streaming
+    into a non-empty call_records leaves them stale (see suspend_rollups).
+    Throughput is tracked per target, split into generate/prepare/write time
+    """
+    
+    def __init__(self, generator: Optional[TelcoDataGenerator] = None,
+                 data_loader: Optional[TelcoDataLoader] = None, chunk_size: int = 10000,
+                 customer_chunk_size: int = 1000, report_interval: float = 5.0, workers: int = 1):
+        self.generator = generator or TelcoDataGenerator()
+        self.data_loader = data_loader or TelcoDataLoader()
+        # Records per Cassandra write
+        self.chunk_size = chunk_size
+        # Customers per MongoDB write, each with its subscription, billing records and tickets
+        self.customer_chunk_size = customer_chunk_size
+        self.report_interval = report_interval
+        # Processes generating blocks (does not change the records)
+        self.workers = workers
+        self.stats: Dict[str, Dict] = {}
+        self._last_report = time.time()
+        self.logger = logging.getLogger(__name__)
+    
+    def run(self, cassandra_manager=None, mongo_manager=None, num_customers: int = 50000,
+            num_cdr: int = 100000, num_sms: int = 50000, num_data_usage: int = 75000) -> Dict:
+        """Generate and load every dataset into the given managers; returns counts and throughput"""
+        results = {'cassandra': {}, 'mongodb': {}}
+        start_time = time.time()
+        
+        if mongo_manager:
+            results['mongodb'] = self.stream_customers(mongo_manager, num_customers)
+        
+        if cassandra_manager:
+            counts = {'cdr_data': num_cdr, 'sms_data': num_sms, 'data_usage': num_data_usage}
+            for filename, table_name in self.data_loader.CASSANDRA_FILES.items():
+                name = filename[:-len('.json')]
+                results['cassandra'][table_name] = self.stream_records(cassandra_manager, name, table_name, counts[name])
+        
+        total_time = time.time() - start_time
+        total_records = sum(results['cassandra'].values()) + sum(results['mongodb'].values())
+        results['total_time'] = total_time
+        results['total_records'] = total_records
+        results['records_per_second'] = total_records / total_time if total_time > 0 else 0
+        results['throughput'] = self.report()
+        self.logger.info(f"🚀 Streamed {total_records:,} generated records in {total_time:.2f}s "
+                         f"({results['records_per_second']:,.0f} records/s)")
+        return results
+    
+    def stream_records(self, cassandra_manager, name: str, table_name: str, num_records: int) -> int:
+        """Generate num_records of a Cassandra dataset chunk by chunk into table_name"""
+        decoder = ColumnDecoder()
+        
+        def write(chunk: List[Dict]) -> int:
+            rows = self._timed(table_name, 'prepare', lambda: self.data_loader.prepare_records(
+                chunk, 'cassandra', table_name, compact=True, decoder=decoder))
+            return self._timed(table_name, 'write', lambda: cassandra_manager.insert_rows(table_name, rows))
+        
+        self.logger.info(f"🔄 Streaming {num_records:,} generated records to {table_name}...")
+        rollup_state = self.data_loader.suspend_rollups(cassandra_manager, table_name)
+        chunks = self._record_chunks(name, num_records)
+        stats = self._stats(table_name)
+        try:
+            for chunk in self._timed_chunks(table_name, chunks):
+                stats['written'] += write(chunk)
+                self._log_progress()
+        except Exception as e:
+            # Rollups stay marked incomplete, like after a failed file load
+            self.logger.error(f"❌ Streaming to {table_name} failed after {stats['written']:,} records: {e}")
+            return stats['written']
+        
+        self.data_loader.restore_rollups(cassandra_manager, rollup_state)
+        self.logger.info(f"✅ Streamed {stats['written']:,} records to {table_name}")
+        return stats['written']
+    
+    def stream_customers(self, mongo_manager, num_customers: int) -> Dict[str, int]:
+        """Generate customers with their subscriptions, billing records and tickets into the MongoDB collections"""
+        collections = {filename[:-len('.json')]: collection
+                       for filename, collection in self.data_loader.MONGODB_FILES.items()}
+        decoders = {collection: ColumnDecoder() for collection in collections.values()}
+        counts = {collection: 0 for collection in collections.values()}
+        
+        self.logger.info(f"🔄 Streaming {num_customers:,} generated customers to MongoDB...")
+        # Customers are generated together with their related documents, so all generate time goes to customers
+        chunks = self._timed_chunks('customers', self._customer_chunks(num_customers))
+        for chunk in chunks:
+            for name, collection in collections.items():
+                documents = self._timed(collection, 'prepare', lambda: self.data_loader.prepare_records(
+                    chunk[name], 'mongodb', collection, decoder=decoders[collection]))
+                written = self._timed(collection, 'write', lambda: mongo_manager.upsert_batch_data(collection, documents))
+                counts[collection] += written
+                self._stats(collection)['written'] += written
+            self._log_progress()
+        
+        for collection, count in counts.items():
+            self.logger.info(f"✅ Streamed {count:,} records to {collection}")
+        return counts
+    
+    def _record_chunks(self, name: str, num_records: int) -> Iterator[List[Dict]]:
+        """The generator's blocks of a Cassandra dataset as records, chunk_size at a time"""
+        for columns in self.generator.iter_blocks(name, num_records, self.workers):
+            records = columns_to_records(columns)
+            for start in range(0, len(records), self.chunk_size):
+                yield records[start:start + self.chunk_size]
+    
+    def _customer_chunks(self, num_customers: int) -> Iterator[Dict[str, List[Dict]]]:
+        """
+        The generator's customer blocks, customer_chunk_size customers at a time
+        together with the subscriptions, billing records and tickets of those customers
+        """
+        for block in self.generator.iter_blocks('customers', num_customers, self.workers):
+            chunk_of = {customer['customer_id']: index // self.customer_chunk_size
+                        for index, customer in enumerate(block['customers'])}
+            chunks = [{name: [] for name in block} for _ in range(len(set(chunk_of.values())))]
+            for name, records in block.items():
+                for record in records:
+                    chunks[chunk_of[record['customer_id']]][name].append(record)
+            yield from chunks
+    
+    def _timed_chunks(self, target: str, chunks: Iterator) -> Iterator:
+        """Iterate chunks, charging the time spent producing them to target's generate phase"""
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            self._stats(target)['generate'] += time.perf_counter() - started
+            if chunk is None:
+                return
+            yield chunk
+    
+    def _timed(self, target: str, phase: str, work: Callable):
+        started = time.perf_counter()
+        try:
+            return work()
+        finally:
+            self._stats(target)[phase] += time.perf_counter() - started
+    
+    def _stats(self, target: str) -> Dict:
+        if target not in self.stats:
+            self.stats[target] = dict.fromkeys(PHASES, 0.0)
+            self.stats[target]['written'] = 0
+        return self.stats[target]
+    
+    def report(self) -> Dict[str, Dict]:
+        """Per target: records written, seconds spent per phase and overall records per second"""
+        report = {}
+        for target, stats in self.stats.items():
+            busy = sum(stats[phase] for phase in PHASES)
+            entry = {'written': stats['written']}
+            entry.update({f"{phase}_seconds": round(stats[phase], 3) for phase in PHASES})
+            entry['records_per_second'] = round(stats['written'] / busy, 1) if busy > 0 and stats['written'] else None
+            report[target] = entry
+        return report
+    
+    def _log_progress(self):
+        now = time.time()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        for target, entry in self.report().items():
+            if entry['records_per_second']:
+                self.logger.info(f"📈 {target}: {entry['written']:,} records ({entry['records_per_second']:,.0f} records/s)")
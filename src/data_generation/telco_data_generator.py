@@ -4,113 +4,175 @@ from faker import Faker
 from datetime import datetime, timedelta
 import random
 import json
+import os
 import uuid
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from .json_stream import json_default, write_ndjson
+from .columnar_format import write_parquet
+from .export_manifest import describe_dataset, update_manifest
+from .compression import COMPRESSIONS, open_text_output
+from .shard_writer import RollingShardWriter
+from .traffic_model import TrafficModel
+from .vectorized import uuid4_strings, random_datetimes, choice, prefixed_ids, columns_to_records
+
+def derive_seed(seed: int, name: str, block: int) -> int:
+    """Seed of one block of a dataset: an independent stream per (dataset, block) of the run's seed"""
+    spawn_key = (TelcoDataGenerator.DATASETS.index(name), block)
+    return int(np.random.SeedSequence(seed, spawn_key=spawn_key).generate_state(1, np.uint64)[0])
+
+def _generate_block(seed: int, reference_time: datetime, traffic_settings: Dict, name: str,
+                    block: int, blocks: int, start: int, end: int):
+    """Process pool worker: records start..end-1 of a dataset (see TelcoDataGenerator.iter_blocks)"""
+    generator = TelcoDataGenerator(derive_seed(seed, name, block), reference_time, time_slice=(block, blocks),
+                                   traffic_model=TrafficModel.from_settings(traffic_settings))
+    return generator.generate_block(name, start, end)
 
 class TelcoDataGenerator:
-    def __init__(self):
+    EXPORT_FORMATS = ('json', 'ndjson', 'parquet')
+    # Generated datasets; the position keys the seeds derived for a dataset's blocks
+    DATASETS = ('customers', 'cdr_data', 'sms_data', 'data_usage')
+    # Reference time of seeded runs that give none, so equal parameters give equal output
+    SEEDED_REFERENCE_TIME = datetime(2024, 1, 1)
+    
+    def __init__(self, seed: Optional[int] = None, reference_time: Optional[datetime] = None,
+                 block_size: int = 100000, customer_block_size: int = 5000, time_slice: Tuple[int, int] = (0, 1),
+                 traffic_model: Optional[TrafficModel] = None):
+        # Every random value comes from generators seeded with this (drawn when not given);
+        # timestamps are laid out backwards from reference_time instead of the clock
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        if reference_time is None:
+            reference_time = self.SEEDED_REFERENCE_TIME if seed is not None else datetime.now().replace(microsecond=0)
+        self.reference_time = reference_time
+        # Records (customers) per block of iter_blocks; each block has its own derived seed
+        self.block_size = block_size
+        self.customer_block_size = customer_block_size
+        # (index, count): this generator only covers slice index of count equal slices of its time windows
+        self.time_slice = time_slice
+        # Skew and seasonality of CDR, SMS and data usage traffic (uniform by default)
+        self.traffic_model = traffic_model or TrafficModel()
+        self.random = random.Random(self.seed)
         self.fake = Faker('id_ID')  # Indonesian locale
+        self.fake.seed_instance(self.seed)
         self.call_types = ['voice', 'video', 'conference']
         self.network_types = ['2G', '3G', '4G', '5G']
         self.plan_types = ['prepaid', 'postpaid']
         self.cities = ['Jakarta', 'Surabaya', 'Bandung', 'Medan', 'Semarang', 'Makassar', 'Palembang']
         self.app_categories = ['social_media', 'streaming', 'gaming', 'browsing', 'messaging', 'email']
+        # CDR, SMS and data usage columns are drawn from this NumPy generator
+        self.rng = np.random.default_rng(self.seed)
+        self.customer_ids = prefixed_ids('CUST_', 1, 50001, 6)
+        self.cell_ids = prefixed_ids('CELL_', 1000, 10000, 4)
     
     def generate_cdr_data(self, num_records=100000):
         """Generate Call Detail Records for Cassandra"""
         print(f"🔄 Generating {num_records} CDR records...")
-        cdr_data = []
-        customer_ids = [f"CUST_{str(i).zfill(6)}" for i in range(1, 50001)]
-        
-        for i in range(num_records):
-            call_start = self.fake.date_time_between(start_date='-1y', end_date='now')
-            duration = random.randint(10, 3600)  # 10 seconds to 1 hour
-            call_end = call_start + timedelta(seconds=duration)
-            
-            record = {
-                'call_id': str(uuid.uuid4()),
-                'caller_id': random.choice(customer_ids),
-                'callee_id': random.choice(customer_ids),
-                'call_start_time': call_start,
-                'call_end_time': call_end,
-                'duration_seconds': duration,
-                'call_type': random.choice(self.call_types),
-                'location_cell_id': f"CELL_{random.randint(1000, 9999)}",
-                'location_lat': float(self.fake.latitude()),
-                'location_lon': float(self.fake.longitude()),
-                'cost_amount': round(random.uniform(0.1, 10.0), 2),
-                'network_type': random.choice(self.network_types),
-                'quality_score': random.randint(1, 5),
-                'created_at': datetime.now()
-            }
-            
-            cdr_data.append(record)
-            
-            if i % 10000 == 0 and i > 0:
-                print(f"Generated {i} CDR records...")
-        
+        cdr_data = columns_to_records(self.cdr_columns(num_records))
         print(f"✅ Generated {len(cdr_data)} CDR records")
         return cdr_data
     
     def generate_sms_data(self, num_records=50000):
         """Generate SMS records for Cassandra"""
         print(f"🔄 Generating {num_records} SMS records...")
-        sms_data = []
-        customer_ids = [f"CUST_{str(i).zfill(6)}" for i in range(1, 50001)]
-        delivery_statuses = ['delivered', 'pending', 'failed']
-        
-        for i in range(num_records):
-            record = {
-                'sms_id': str(uuid.uuid4()),
-                'sender_id': random.choice(customer_ids),
-                'receiver_id': random.choice(customer_ids),
-                'message_length': random.randint(1, 160),
-                'sent_time': self.fake.date_time_between(start_date='-1y', end_date='now'),
-                'delivery_status': random.choice(delivery_statuses),
-                'cost_amount': round(random.uniform(0.05, 0.5), 2),
-                'network_type': random.choice(self.network_types),
-                'created_at': datetime.now()
-            }
-            
-            sms_data.append(record)
-            
-            if i % 10000 == 0 and i > 0:
-                print(f"Generated {i} SMS records...")
-        
+        sms_data = columns_to_records(self.sms_columns(num_records))
         print(f"✅ Generated {len(sms_data)} SMS records")
         return sms_data
     
     def generate_data_usage(self, num_records=75000):
         """Generate data usage records for Cassandra"""
         print(f"🔄 Generating {num_records} data usage records...")
-        data_usage = []
-        customer_ids = [f"CUST_{str(i).zfill(6)}" for i in range(1, 50001)]
-        
-        for i in range(num_records):
-            session_start = self.fake.date_time_between(start_date='-1y', end_date='now')
-            session_duration = random.randint(60, 7200)  # 1 minute to 2 hours
-            session_end = session_start + timedelta(seconds=session_duration)
-            
-            record = {
-                'usage_id': str(uuid.uuid4()),
-                'customer_id': random.choice(customer_ids),
-                'session_start': session_start,
-                'session_end': session_end,
-                'data_consumed_mb': random.randint(1, 1000),
-                'app_category': random.choice(self.app_categories),
-                'network_type': random.choice(self.network_types),
-                'cost_amount': round(random.uniform(0.01, 5.0), 2),
-                'created_at': datetime.now()
-            }
-            
-            data_usage.append(record)
-            
-            if i % 10000 == 0 and i > 0:
-                print(f"Generated {i} data usage records...")
-        
+        data_usage = columns_to_records(self.data_usage_columns(num_records))
         print(f"✅ Generated {len(data_usage)} data usage records")
         return data_usage
     
+    def _time_window(self, days: int) -> Tuple[datetime, datetime]:
+        """This generator's slice (see time_slice) of the days before the reference time"""
+        index, count = self.time_slice
+        span = timedelta(days=days) / count
+        start = self.reference_time - timedelta(days=days) + span * index
+        return start, start + span
+    
+    def _last_year(self) -> Tuple[np.datetime64, np.datetime64, np.datetime64]:
+        start, end = self._time_window(365)
+        return np.datetime64(start, 'us'), np.datetime64(end, 'us'), np.datetime64(self.reference_time, 'us')
+    
+    def _timestamps(self, num_records: int, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+        seasonal = self.traffic_model.timestamps(self.rng, num_records, start, end)
+        return random_datetimes(self.rng, num_records, start, end) if seasonal is None else seasonal
+    
+    def _call_durations(self, num_records: int) -> np.ndarray:
+        mixed = self.traffic_model.durations(self.rng, num_records, 10, 3600)
+        return self.rng.integers(10, 3601, size=num_records) if mixed is None else mixed  # 10 seconds to 1 hour
+    
+    def _active_customers(self, num_records: int) -> np.ndarray:
+        """Customers originating traffic: callers, SMS senders, data users"""
+        return self.traffic_model.pick(self.rng, self.customer_ids, num_records, self.traffic_model.caller_zipf_exponent)
+    
+    def cdr_columns(self, num_records: int) -> Dict[str, np.ndarray]:
+        """
+        Call Detail Records as columns: one NumPy array per field, every field
+        drawn for all records at once (see generate_cdr_data for rows)
+        """
+        rng = self.rng
+        start, end, now = self._last_year()
+        call_start = self._timestamps(num_records, start, end)
+        duration = self._call_durations(num_records)
+        
+        return {
+            'call_id': uuid4_strings(rng, num_records),
+            'caller_id': self._active_customers(num_records),
+            'callee_id': choice(rng, self.customer_ids, num_records),
+            'call_start_time': call_start,
+            'call_end_time': call_start + duration.astype('timedelta64[s]'),
+            'duration_seconds': duration,
+            'call_type': choice(rng, self.call_types, num_records),
+            'location_cell_id': self.traffic_model.pick(rng, self.cell_ids, num_records,
+                                                        self.traffic_model.cell_zipf_exponent),
+            'location_lat': rng.uniform(-90, 90, num_records).round(6),
+            'location_lon': rng.uniform(-180, 180, num_records).round(6),
+            'cost_amount': rng.uniform(0.1, 10.0, num_records).round(2),
+            'network_type': choice(rng, self.network_types, num_records),
+            'quality_score': rng.integers(1, 6, size=num_records),
+            'created_at': np.full(num_records, now)
+        }
+    
+    def sms_columns(self, num_records: int) -> Dict[str, np.ndarray]:
+        """SMS records as columns (see cdr_columns)"""
+        rng = self.rng
+        start, end, now = self._last_year()
+        
+        return {
+            'sms_id': uuid4_strings(rng, num_records),
+            'sender_id': self._active_customers(num_records),
+            'receiver_id': choice(rng, self.customer_ids, num_records),
+            'message_length': rng.integers(1, 161, size=num_records),
+            'sent_time': self._timestamps(num_records, start, end),
+            'delivery_status': choice(rng, ['delivered', 'pending', 'failed'], num_records),
+            'cost_amount': rng.uniform(0.05, 0.5, num_records).round(2),
+            'network_type': choice(rng, self.network_types, num_records),
+            'created_at': np.full(num_records, now)
+        }
+    
+    def data_usage_columns(self, num_records: int) -> Dict[str, np.ndarray]:
+        """Data usage records as columns (see cdr_columns)"""
+        rng = self.rng
+        start, end, now = self._last_year()
+        session_start = self._timestamps(num_records, start, end)
+        session_duration = rng.integers(60, 7201, size=num_records)  # 1 minute to 2 hours
+        
+        return {
+            'usage_id': uuid4_strings(rng, num_records),
+            'customer_id': self._active_customers(num_records),
+            'session_start': session_start,
+            'session_end': session_start + session_duration.astype('timedelta64[s]'),
+            'data_consumed_mb': rng.integers(1, 1001, size=num_records),
+            'app_category': choice(rng, self.app_categories, num_records),
+            'network_type': choice(rng, self.network_types, num_records),
+            'cost_amount': rng.uniform(0.01, 5.0, num_records).round(2),
+            'created_at': np.full(num_records, now)
+        }
+    
     def generate_customer_data(self, num_customers=50000):
         """Generate Customer data for MongoDB"""
         print(f"🔄 Generating {num_customers} customer records...")
@@ -120,99 +182,309 @@ class TelcoDataGenerator:
         support_tickets = []
         
         for i in range(1, num_customers + 1):
-            customer_id = f"CUST_{str(i).zfill(6)}"
-            
-            # Customer document
-            registration_date = self.fake.date_time_between(start_date='-2y', end_date='now')
-            customer = {
-                "customer_id": customer_id,
-                "personal_info": {
-                    "first_name": self.fake.first_name(),
-                    "last_name": self.fake.last_name(),
-                    "email": self.fake.email(),
-                    "phone_number": self.fake.phone_number(),
-                    "date_of_birth": self.fake.date_of_birth(minimum_age=18, maximum_age=80).isoformat(),
-                    "gender": random.choice(['M', 'F']),
-                    "id_number": self.fake.ssn()
-                },
-                "address": {
-                    "street": self.fake.street_address(),
-                    "city": random.choice(self.cities),
-                    "province": self.fake.state(),
-                    "postal_code": self.fake.postcode(),
-                    "country": "Indonesia"
-                },
-                "location": {
-                    "city": random.choice(self.cities),
-                    "coordinates": [float(self.fake.longitude()), float(self.fake.latitude())]
-                },
-                "registration_date": registration_date,
-                "status": random.choice(['active', 'inactive', 'suspended']),
-                "credit_score": random.randint(300, 850),
-                "customer_segment": random.choice(['basic', 'premium', 'enterprise']),
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
-            }
-            
+            customer, subscription, billing, tickets = self._customer_records(i)
             customers.append(customer)
+            subscriptions.append(subscription)
+            billing_records.extend(billing)
+            support_tickets.extend(tickets)
             
-            # Subscription document
-            subscription = {
+            if i % 5000 == 0:
+                print(f"Generated {i} customer records...")
+        
+        print(f"✅ Generated {len(customers)} customers, {len(subscriptions)} subscriptions, {len(billing_records)} billing records, {len(support_tickets)} support tickets")
+        return customers, subscriptions, billing_records, support_tickets
+    
+    def _date_of_birth(self):
+        """Birth date of an 18 to 80 year old customer at the reference time"""
+        today = self.reference_time.date()
+        return self.fake.date_between(start_date=today - timedelta(days=80 * 365), end_date=today - timedelta(days=18 * 365))
+    
+    def _customer_records(self, i: int) -> Tuple[Dict, Dict, List[Dict], List[Dict]]:
+        """Customer number i with its subscription, 12 monthly billing records and support tickets"""
+        customer_id = f"CUST_{str(i).zfill(6)}"
+        
+        # Customer document
+        registration_start, registration_end = self._time_window(730)
+        registration_date = self.fake.date_time_between(start_date=registration_start, end_date=registration_end)
+        customer = {
+            "customer_id": customer_id,
+            "personal_info": {
+                "first_name": self.fake.first_name(),
+                "last_name": self.fake.last_name(),
+                "email": self.fake.email(),
+                "phone_number": self.fake.phone_number(),
+                "date_of_birth": self._date_of_birth().isoformat(),
+                "gender": self.random.choice(['M', 'F']),
+                "id_number": self.fake.ssn()
+            },
+            "address": {
+                "street": self.fake.street_address(),
+                "city": self.random.choice(self.cities),
+                "province": self.fake.state(),
+                "postal_code": self.fake.postcode(),
+                "country": "Indonesia"
+            },
+            "location": {
+                "city": self.random.choice(self.cities),
+                "coordinates": [float(self.fake.longitude()), float(self.fake.latitude())]
+            },
+            "registration_date": registration_date,
+            "status": self.random.choice(['active', 'inactive', 'suspended']),
+            "credit_score": self.random.randint(300, 850),
+            "customer_segment": self.random.choice(['basic', 'premium', 'enterprise']),
+            "created_at": self.reference_time,
+            "updated_at": self.reference_time
+        }
+        
+        # Subscription document
+        subscription = {
+            "customer_id": customer_id,
+            "plan_type": self.random.choice(self.plan_types),
+            "plan_name": self.random.choice(['Basic', 'Standard', 'Premium', 'Unlimited']),
+            "monthly_fee": self.random.choice([50000, 100000, 150000, 200000, 300000]),
+            "data_quota_gb": self.random.choice([5, 10, 25, 50, 100]),
+            "voice_minutes": self.random.choice([300, 500, 1000, 2000, -1]),  # -1 for unlimited
+            "sms_quota": self.random.choice([100, 500, 1000, -1]),
+            "start_date": registration_date,
+            "end_date": None if customer["status"] == "active" else self.fake.date_time_between(start_date=registration_date, end_date=self.reference_time),
+            "status": customer["status"],
+            "features": self.random.sample(['5G', 'international_roaming', 'hotspot', 'music_streaming', 'video_streaming'], k=self.random.randint(1, 3)),
+            "created_at": self.reference_time
+        }
+        
+        # Generate billing records for last 12 months
+        billing_records = []
+        for month in range(12):
+            billing_date = self.reference_time - timedelta(days=30*month)
+            billing = {
                 "customer_id": customer_id,
-                "plan_type": random.choice(self.plan_types),
-                "plan_name": random.choice(['Basic', 'Standard', 'Premium', 'Unlimited']),
-                "monthly_fee": random.choice([50000, 100000, 150000, 200000, 300000]),
-                "data_quota_gb": random.choice([5, 10, 25, 50, 100]),
-                "voice_minutes": random.choice([300, 500, 1000, 2000, -1]),  # -1 for unlimited
-                "sms_quota": random.choice([100, 500, 1000, -1]),
-                "start_date": registration_date,
-                "end_date": None if customer["status"] == "active" else self.fake.date_time_between(start_date=registration_date, end_date='now'),
-                "status": customer["status"],
-                "features": random.sample(['5G', 'international_roaming', 'hotspot', 'music_streaming', 'video_streaming'], k=random.randint(1, 3)),
-                "created_at": datetime.now()
+                "billing_month": billing_date.strftime("%Y-%m"),
+                "amount": subscription["monthly_fee"] + self.random.randint(-10000, 50000),
+                "usage": {
+                    "data_used_gb": self.random.uniform(0, subscription["data_quota_gb"]),
+                    "voice_minutes_used": self.random.randint(0, subscription["voice_minutes"] if subscription["voice_minutes"] > 0 else 1000),
+                    "sms_sent": self.random.randint(0, subscription["sms_quota"] if subscription["sms_quota"] > 0 else 500)
+                },
+                "payment_status": self.random.choice(['paid', 'pending', 'overdue']),
+                "payment_date": billing_date + timedelta(days=self.random.randint(1, 30)) if self.random.random() > 0.1 else None,
+                "created_at": billing_date
             }
             
-            subscriptions.append(subscription)
-            
-            # Generate billing records for last 12 months
-            for month in range(12):
-                billing_date = datetime.now() - timedelta(days=30*month)
-                billing = {
+            billing_records.append(billing)
+        
+        # Generate support tickets (some customers)
+        support_tickets = []
+        if self.random.random() < 0.3:  # 30% of customers have support tickets
+            for _ in range(self.random.randint(1, 3)):
+                ticket = {
+                    "ticket_id": f"TKT_{self.random.randint(100000, 999999)}",
                     "customer_id": customer_id,
-                    "billing_month": billing_date.strftime("%Y-%m"),
-                    "amount": subscription["monthly_fee"] + random.randint(-10000, 50000),
-                    "usage": {
-                        "data_used_gb": random.uniform(0, subscription["data_quota_gb"]),
-                        "voice_minutes_used": random.randint(0, subscription["voice_minutes"] if subscription["voice_minutes"] > 0 else 1000),
-                        "sms_sent": random.randint(0, subscription["sms_quota"] if subscription["sms_quota"] > 0 else 500)
-                    },
-                    "payment_status": random.choice(['paid', 'pending', 'overdue']),
-                    "payment_date": billing_date + timedelta(days=random.randint(1, 30)) if random.random() > 0.1 else None,
-                    "created_at": billing_date
+                    "issue_type": self.random.choice(['billing', 'technical', 'service', 'complaint']),
+                    "priority": self.random.choice(['low', 'medium', 'high', 'urgent']),
+                    "status": self.random.choice(['open', 'in_progress', 'resolved', 'closed']),
+                    "description": self.fake.text(max_nb_chars=200),
+                    "ticket_date": self.fake.date_time_between(start_date=registration_date, end_date=self.reference_time),
+                    "resolution_date": self.fake.date_time_between(start_date=registration_date, end_date=self.reference_time) if self.random.random() > 0.3 else None,
+                    "agent_id": f"AGENT_{self.random.randint(1, 100)}",
+                    "created_at": self.reference_time
                 }
                 
-                billing_records.append(billing)
-            
-            # Generate support tickets (some customers)
-            if random.random() < 0.3:  # 30% of customers have support tickets
-                for _ in range(random.randint(1, 3)):
-                    ticket = {
-                        "ticket_id": f"TKT_{random.randint(100000, 999999)}",
-                        "customer_id": customer_id,
-                        "issue_type": random.choice(['billing', 'technical', 'service', 'complaint']),
-                        "priority": random.choice(['low', 'medium', 'high', 'urgent']),
-                        "status": random.choice(['open', 'in_progress', 'resolved', 'closed']),
-                        "description": self.fake.text(max_nb_chars=200),
-                        "ticket_date": self.fake.date_time_between(start_date=registration_date, end_date='now'),
-                        "resolution_date": self.fake.date_time_between(start_date=registration_date, end_date='now') if random.random() > 0.3 else None,
-                        "agent_id": f"AGENT_{random.randint(1, 100)}",
-                        "created_at": datetime.now()
-                    }
-                    
-                    support_tickets.append(ticket)
-            
-            if i % 5000 == 0:
-                print(f"Generated {i} customer records...")
+                support_tickets.append(ticket)
         
-        print(f"✅ Generated {len(customers)} customers, {len(subscriptions)} subscriptions, {len(billing_records)} billing records, {len(support_tickets)} support tickets")
-        return customers, subscriptions, billing_records, support_tickets
+        return customer, subscription, billing_records, support_tickets
+    
+    def generate_block(self, name: str, start: int, end: int):
+        """
+        Records start..end-1 of a dataset: columns (see cdr_columns) for the Cassandra
+        datasets, for customers the customers, subscriptions, billing_records and
+        support_tickets of customer numbers start+1..end
+        """
+        if name == 'customers':
+            block = {'customers': [], 'subscriptions': [], 'billing_records': [], 'support_tickets': []}
+            for i in range(start + 1, end + 1):
+                customer, subscription, billing, tickets = self._customer_records(i)
+                block['customers'].append(customer)
+                block['subscriptions'].append(subscription)
+                block['billing_records'].extend(billing)
+                block['support_tickets'].extend(tickets)
+            return block
+        return self.dataset_columns(name, end - start)
+    
+    def dataset_columns(self, name: str, num_records: int) -> Dict[str, np.ndarray]:
+        make_columns = {
+            'cdr_data': self.cdr_columns,
+            'sms_data': self.sms_columns,
+            'data_usage': self.data_usage_columns
+        }[name]
+        return make_columns(num_records)
+    
+    def block_ranges(self, name: str, count: int) -> List[Tuple[int, int]]:
+        size = self.customer_block_size if name == 'customers' else self.block_size
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+    
+    def iter_blocks(self, name: str, count: int, workers: int = 1) -> Iterator:
+        """
+        Generate a dataset as consecutive blocks (see generate_block), in order
+        Block i holds a disjoint range of record numbers, is drawn from a seed derived
+        from (seed, dataset, i) and gets slice i of the time window, so the output only
+        depends on seed, reference time, count and block size: with workers > 1 a
+        process pool generates the blocks and the result is identical
+        """
+        ranges = self.block_ranges(name, count)
+        arguments = [
+            (self.seed, self.reference_time, self.traffic_model.settings(), name, block, len(ranges), start, end)
+            for block, (start, end) in enumerate(ranges)
+        ]
+        if workers <= 1:
+            for args in arguments:
+                yield _generate_block(*args)
+            return
+        
+        # At most 2 * workers blocks in flight, so memory stays bounded when the consumer is slower
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for args in arguments:
+                pending.append(executor.submit(_generate_block, *args))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def generation_parameters(self) -> Dict[str, Any]:
+        """What reproduces a generated dataset, as recorded in the manifest"""
+        return {
+            'seed': self.seed,
+            'reference_time': self.reference_time.isoformat(),
+            'block_size': self.block_size,
+            'customer_block_size': self.customer_block_size,
+            'traffic_model': self.traffic_model.settings()
+        }
+    
+    def export_dataset(self, records: List[Dict], output_directory: str, name: str,
+                       format: str = 'json', shards: int = 1, compression: str = None) -> List[str]:
+        """
+        Write one dataset to output_directory and return the written paths
+        format='json' writes name.json (one array); format='ndjson' writes
+        name.ndjson, or name-00000.ndjson ... when shards > 1, each shard
+        holding a contiguous slice of the records; format='parquet' writes
+        name.parquet with typed columns (requires pyarrow).
+        compression='gz' or 'zst' (requires zstandard) compresses json and ndjson
+        files while they are written (name.json.gz, name-00000.ndjson.zst, ...).
+        The dataset's entry in output_directory/manifest.json is updated as well
+        """
+        paths = self._write_dataset(records, output_directory, name, format, shards, compression)
+        entry = describe_dataset(records, paths, format)
+        entry['generation'] = self.generation_parameters()
+        update_manifest(output_directory, name, entry)
+        return paths
+    
+    def _write_dataset(self, records: List[Dict], output_directory: str, name: str,
+                       format: str, shards: int, compression: str = None) -> List[str]:
+        if format not in self.EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {format!r}, expected one of {self.EXPORT_FORMATS}")
+        if format != 'ndjson' and shards != 1:
+            raise ValueError("Only the ndjson format can be sharded")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}")
+        if compression and format == 'parquet':
+            raise ValueError("Parquet files are compressed internally; compression applies to json and ndjson")
+        suffix = f".{compression}" if compression else ''
+        
+        os.makedirs(output_directory, exist_ok=True)
+        
+        if format == 'parquet':
+            path = os.path.join(output_directory, f"{name}.parquet")
+            write_parquet(records, path, name)
+            return [path]
+        
+        if format == 'json':
+            path = os.path.join(output_directory, f"{name}.json{suffix}")
+            with open_text_output(path) as f:
+                json.dump(records, f, default=json_default, ensure_ascii=False)
+            return [path]
+        
+        if shards == 1:
+            paths = [os.path.join(output_directory, f"{name}.ndjson{suffix}")]
+        else:
+            paths = [os.path.join(output_directory, f"{name}-{shard:05d}.ndjson{suffix}") for shard in range(shards)]
+        
+        for shard, path in enumerate(paths):
+            start = len(records) * shard // len(paths)
+            end = len(records) * (shard + 1) // len(paths)
+            with open_text_output(path) as f:
+                write_ndjson(records[start:end], f)
+        return paths
+    
+    def export_all(self, output_directory: str = 'telco_data_export', num_customers: int = 50000,
+                   num_cdr: int = 100000, num_sms: int = 50000, num_data_usage: int = 75000,
+                   format: str = 'json', shards: int = 1, compression: str = None,
+                   workers: int = 1) -> Dict[str, List[str]]:
+        """
+        Generate every dataset and export it in the layout TelcoDataLoader reads
+        Datasets are generated block by block (see iter_blocks), by workers processes;
+        with the same seed and reference time the files are byte-identical
+        """
+        print(f"🔄 Generating {num_customers} customer records (seed {self.seed})...")
+        datasets = {'customers': [], 'subscriptions': [], 'billing_records': [], 'support_tickets': []}
+        for block in self.iter_blocks('customers', num_customers, workers):
+            for name, records in block.items():
+                datasets[name].extend(records)
+        
+        written = {}
+        for name, records in datasets.items():
+            written[name] = self.export_dataset(records, output_directory, name, format, shards, compression)
+        del datasets
+        
+        # Cassandra datasets are generated one at a time to keep only one in memory
+        for name, count in [('cdr_data', num_cdr), ('sms_data', num_sms), ('data_usage', num_data_usage)]:
+            print(f"🔄 Generating {count} {name} records...")
+            records = []
+            for columns in self.iter_blocks(name, count, workers):
+                records.extend(columns_to_records(columns))
+            written[name] = self.export_dataset(records, output_directory, name, format, shards, compression)
+        
+        print(f"✅ Exported {len(written)} datasets to {output_directory} ({format})")
+        return written
+    
+    def export_all_chunked(self, output_directory: str = 'telco_data_export', num_customers: int = 50000,
+                           num_cdr: int = 100000, num_sms: int = 50000, num_data_usage: int = 75000,
+                           format: str = 'ndjson', compression: str = None, shard_records: int = 1000000,
+                           workers: int = 1) -> Dict[str, List[str]]:
+        """
+        export_all with constant memory whatever the counts: every block (see iter_blocks)
+        is written as soon as it is generated, NDJSON into shards rolled every
+        shard_records records (json: one array written incrementally), so at most
+        about 2 * workers blocks exist at a time. The blocks are those of export_all,
+        so the records and their order are the same
+        """
+        writers = {
+            name: RollingShardWriter(output_directory, name, format, compression, shard_records)
+            for name in ('customers', 'subscriptions', 'billing_records', 'support_tickets')
+        }
+        print(f"🔄 Generating {num_customers} customer records (seed {self.seed})...")
+        for block in self.iter_blocks('customers', num_customers, workers):
+            for name, records in block.items():
+                writers[name].write(records)
+        
+        written = {}
+        for name, writer in writers.items():
+            written[name] = self._finish_export(output_directory, name, writer)
+        
+        for name, count in [('cdr_data', num_cdr), ('sms_data', num_sms), ('data_usage', num_data_usage)]:
+            print(f"🔄 Generating {count} {name} records...")
+            writer = RollingShardWriter(output_directory, name, format, compression, shard_records)
+            for index, columns in enumerate(self.iter_blocks(name, count, workers), 1):
+                writer.write(columns_to_records(columns))
+                if index % 10 == 0:
+                    print(f"Generated {writer.describer.record_count} {name} records...")
+            written[name] = self._finish_export(output_directory, name, writer)
+        
+        print(f"✅ Exported {len(written)} datasets to {output_directory} ({format}, {shard_records} records per shard)")
+        return written
+    
+    def _finish_export(self, output_directory: str, name: str, writer: RollingShardWriter) -> List[str]:
+        paths = writer.close()
+        entry = writer.manifest_entry()
+        entry['generation'] = self.generation_parameters()
+        update_manifest(output_directory, name, entry)
+        return paths
@@ -0,0 +1,142 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Diurnal and weekly shape of mobile traffic: quiet nights, a late-morning
+# plateau and the evening peak; weekends somewhat lighter (Monday first)
+REALISTIC_HOURLY_WEIGHTS = [
+    0.30, 0.18, 0.12, 0.10, 0.12, 0.25, 0.50, 0.85, 1.10, 1.25, 1.35, 1.35,
+    1.25, 1.20, 1.20, 1.25, 1.30, 1.40, 1.55, 1.70, 1.65, 1.30, 0.90, 0.55
+]
+REALISTIC_WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 1.05, 0.85, 0.75]
+# Short "where are you" calls, ordinary conversations and a tail of long calls
+REALISTIC_DURATION_MIXTURE = [
+    {'weight': 0.55, 'median_seconds': 35, 'sigma': 0.6},
+    {'weight': 0.35, 'median_seconds': 180, 'sigma': 0.7},
+    {'weight': 0.10, 'median_seconds': 1200, 'sigma': 0.5}
+]
+
+class TrafficModel:
+    """
+    Distributions the generator draws traffic from; every setting left at None
+    keeps the uniform draw, so TrafficModel() reproduces the uniform generator.
+    
+    caller_zipf_exponent: subscriber activity (CDR callers, SMS senders, data usage
+        customers) follows a Zipf law over the customers with this exponent
+    cell_zipf_exponent:   calls per cell follow a Zipf law with this exponent
+    hourly_weights:       24 relative weights of the hours of the day
+    weekday_weights:      7 relative weights of the days of the week, Monday first
+    duration_mixture:     call durations from a mixture of log-normal components,
+                          each {'weight', 'median_seconds', 'sigma'}
+    hot_seed:             seed of the permutation choosing which customers and
+                          cells are the hot ones (the same in every block)
+    """
+    SETTINGS = ('caller_zipf_exponent', 'cell_zipf_exponent', 'hourly_weights', 'weekday_weights',
+                'duration_mixture', 'hot_seed')
+    
+    def __init__(self, caller_zipf_exponent: Optional[float] = None, cell_zipf_exponent: Optional[float] = None,
+                 hourly_weights: Optional[List[float]] = None, weekday_weights: Optional[List[float]] = None,
+                 duration_mixture: Optional[List[Dict[str, float]]] = None, hot_seed: int = 0):
+        if hourly_weights is not None and len(hourly_weights) != 24:
+            raise ValueError(f"hourly_weights needs 24 values, got {len(hourly_weights)}")
+        if weekday_weights is not None and len(weekday_weights) != 7:
+            raise ValueError(f"weekday_weights needs 7 values, got {len(weekday_weights)}")
+        if duration_mixture is not None and not duration_mixture:
+            raise ValueError("duration_mixture needs at least one component")
+        
+        self.caller_zipf_exponent = caller_zipf_exponent
+        self.cell_zipf_exponent = cell_zipf_exponent
+        self.hourly_weights = hourly_weights
+        self.weekday_weights = weekday_weights
+        self.duration_mixture = duration_mixture
+        self.hot_seed = hot_seed
+        # Cumulative Zipf probabilities per (exponent, population), in hot-first order
+        self._zipf_tables: Dict[tuple, tuple] = {}
+    
+    @classmethod
+    def realistic(cls) -> 'TrafficModel':
+        """Preset with hot subscribers and cells, diurnal/weekly peaks and a call duration mixture"""
+        return cls(
+            caller_zipf_exponent=0.9,
+            cell_zipf_exponent=0.8,
+            hourly_weights=list(REALISTIC_HOURLY_WEIGHTS),
+            weekday_weights=list(REALISTIC_WEEKDAY_WEIGHTS),
+            duration_mixture=[dict(component) for component in REALISTIC_DURATION_MIXTURE]
+        )
+    
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> 'TrafficModel':
+        settings = settings or {}
+        unknown = set(settings) - set(cls.SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown traffic model settings: {sorted(unknown)}")
+        return cls(**settings)
+    
+    @classmethod
+    def load(cls, name_or_path: str) -> 'TrafficModel':
+        """'uniform', 'realistic' or the path of a JSON file holding settings"""
+        if name_or_path == 'uniform':
+            return cls()
+        if name_or_path == 'realistic':
+            return cls.realistic()
+        with open(name_or_path, 'r', encoding='utf-8') as f:
+            return cls.from_settings(json.load(f))
+    
+    def settings(self) -> Dict[str, Any]:
+        """JSON-serializable settings, as recorded in the manifest"""
+        return {name: getattr(self, name) for name in self.SETTINGS}
+    
+    def pick(self, rng: np.random.Generator, values: np.ndarray, n: int, exponent: Optional[float]) -> np.ndarray:
+        """n values drawn uniformly, or Zipf-distributed over a fixed hot-first permutation of values"""
+        if exponent is None:
+            return values[rng.integers(0, len(values), size=n)]
+        
+        key = (exponent, len(values))
+        if key not in self._zipf_tables:
+            weights = np.arange(1, len(values) + 1, dtype=np.float64) ** -exponent
+            order = np.random.default_rng(self.hot_seed).permutation(len(values))
+            self._zipf_tables[key] = (np.cumsum(weights) / weights.sum(), order)
+        cumulative, order = self._zipf_tables[key]
+        ranks = np.minimum(np.searchsorted(cumulative, rng.random(n), side='right'), len(values) - 1)
+        return values[order[ranks]]
+    
+    def timestamps(self, rng: np.random.Generator, n: int, start: np.datetime64, end: np.datetime64) -> Optional[np.ndarray]:
+        """
+        n datetime64[us] values in [start, end) following the hour-of-day and weekday
+        weights: an hour slot is drawn by weight times its overlap with the window,
+        then a uniform moment inside it. None when the model has no seasonality
+        """
+        if self.hourly_weights is None and self.weekday_weights is None:
+            return None
+        
+        start, end = np.datetime64(start, 'us'), np.datetime64(end, 'us')
+        slots = np.arange(start.astype('datetime64[h]'), end, np.timedelta64(1, 'h')).astype('datetime64[us]')
+        low = np.maximum(slots, start)
+        high = np.minimum(slots + np.timedelta64(1, 'h'), end)
+        spans = (high - low).astype(np.int64)
+        
+        weights = spans.astype(np.float64)
+        if self.hourly_weights is not None:
+            weights *= np.asarray(self.hourly_weights)[slots.astype('datetime64[h]').astype(np.int64) % 24]
+        if self.weekday_weights is not None:
+            # Day 0 of the epoch (1970-01-01) was a Thursday
+            weekdays = (slots.astype('datetime64[D]').astype(np.int64) + 3) % 7
+            weights *= np.asarray(self.weekday_weights)[weekdays]
+        
+        cumulative = np.cumsum(weights)
+        chosen = np.minimum(np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side='right'), len(slots) - 1)
+        offsets = (rng.random(n) * spans[chosen]).astype(np.int64)
+        return low[chosen] + offsets.astype('timedelta64[us]')
+    
+    def durations(self, rng: np.random.Generator, n: int, low: int, high: int) -> Optional[np.ndarray]:
+        """n call durations in [low, high] seconds from the mixture, or None without one"""
+        if self.duration_mixture is None:
+            return None
+        
+        weights = np.array([component['weight'] for component in self.duration_mixture], dtype=np.float64)
+        components = rng.choice(len(weights), size=n, p=weights / weights.sum())
+        medians = np.log([component['median_seconds'] for component in self.duration_mixture])
+        sigmas = np.array([component['sigma'] for component in self.duration_mixture], dtype=np.float64)
+        seconds = rng.lognormal(medians[components], sigmas[components])
+        return np.clip(np.rint(seconds), low, high).astype(np.int64)
@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Generated string columns are ASCII, kept as fixed-width bytes (dtype S) until rows
+# are materialized: a quarter of the memory of numpy str (UCS-4) arrays
+
+# Positions of the 32 hex digits inside the 36 characters of a canonical UUID string
+_UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+def uuid4_strings(rng: np.random.Generator, n: int) -> np.ndarray:
+    """
+    n random (version 4) UUIDs as canonical strings (dtype S36), built without a Python loop:
+    random bytes get the version/variant bits, are hex encoded in one call and
+    the hex digits are scattered into a 36-character array around the hyphens
+    """
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    
+    digits = np.frombuffer(raw.tobytes().hex().encode('ascii'), dtype='S1').reshape(n, 32)
+    chars = np.full((n, 36), b'-', dtype='S1')
+    chars[:, _UUID_HEX_POSITIONS] = digits
+    return chars.view('S36').ravel()
+
+def random_datetimes(rng: np.random.Generator, n: int, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+    """n datetime64[us] values drawn uniformly from [start, end)"""
+    start = np.datetime64(start, 'us')
+    span = int((np.datetime64(end, 'us') - start) / np.timedelta64(1, 'us'))
+    return start + rng.integers(0, span, size=n).astype('timedelta64[us]')
+
+def choice(rng: np.random.Generator, values: Sequence, n: int) -> np.ndarray:
+    """n values picked uniformly (with replacement) from values"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'U':
+        values = values.astype('S')
+    return values[rng.integers(0, len(values), size=n)]
+
+def prefixed_ids(prefix: str, start: int, stop: int, width: int) -> np.ndarray:
+    """Lookup table of IDs like CUST_000001 for the numbers start..stop-1"""
+    return np.char.add(prefix, np.char.zfill(np.arange(start, stop).astype(str), width)).astype('S')
+
+def columns_to_records(columns: Dict[str, np.ndarray], names: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Materialize generated columns as row dicts with plain Python values
+    (datetime64 -> datetime, bytes -> str, numpy scalars -> int/float)
+    """
+    names = names or list(columns)
+    values = []
+    for name in names:
+        column = columns[name]
+        if np.issubdtype(column.dtype, np.datetime64):
+            values.append(column.astype('datetime64[us]').astype(datetime).tolist())
+        elif column.dtype.kind == 'S':
+            values.append(column.astype(str).tolist())
+        else:
+            values.append(column.tolist())
+    return [dict(zip(names, row)) for row in zip(*values)]
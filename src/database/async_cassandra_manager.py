@@ -0,0 +1,84 @@
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Optional
+from cassandra import ReadTimeout
+from cassandra.cluster import OperationTimedOut
+from cassandra.query import SimpleStatement
+from .cassandra_manager import CassandraManager
+from .deadline import Deadline, QueryDeadlineExceeded
+
+class AsyncCassandraManager(CassandraManager):
+    """
+    asyncio variant of CassandraManager
+    Connection and schema management are inherited (blocking, run once at setup);
+    queries go through the driver's execute_async futures so several requests can
+    be in flight on one event loop without threads
+    """
+    
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        if isinstance(row, dict):
+            return row
+        if hasattr(row, '_asdict'):
+            return dict(row._asdict())
+        return dict(row)
+    
+    async def stream_query(self, query: str, parameters: List = None, fetch_size: int = 5000,
+                           deadline: Optional[Deadline] = None) -> AsyncIterator[Dict]:
+        """
+        Yield result rows as dictionaries, awaiting one driver page at a time
+        With a deadline each page request is bounded by the remaining time, and
+        waiting for a page stops as soon as the deadline passes. Once the stream is
+        closed (deadline, cancellation, error or the consumer stopping early) no
+        further page is requested and late driver callbacks are dropped
+        """
+        loop = asyncio.get_running_loop()
+        pages = asyncio.Queue()
+        closed = False
+        
+        def on_page(rows):
+            if not closed:
+                loop.call_soon_threadsafe(pages.put_nowait, (rows, None))
+        
+        def on_error(exc):
+            if not closed:
+                loop.call_soon_threadsafe(pages.put_nowait, (None, exc))
+        
+        statement = SimpleStatement(query, fetch_size=fetch_size)
+        options = {}
+        if deadline and deadline.remaining() is not None:
+            options['timeout'] = deadline.cassandra_timeout()
+        response_future = self.session.execute_async(statement, parameters, **options)
+        response_future.add_callbacks(callback=on_page, errback=on_error)
+        
+        try:
+            while True:
+                try:
+                    rows, error = await asyncio.wait_for(pages.get(), deadline.remaining() if deadline else None)
+                except asyncio.TimeoutError as e:
+                    raise QueryDeadlineExceeded("Cassandra page not received before deadline") from e
+                
+                if error is not None:
+                    self.logger.error(f"❌ Query execution failed: {error}")
+                    if deadline and isinstance(error, (OperationTimedOut, ReadTimeout)):
+                        raise QueryDeadlineExceeded(f"Cassandra request exceeded deadline: {error}") from error
+                    raise error
+                
+                for row in rows:
+                    yield self._row_to_dict(row)
+                
+                if closed or not response_future.has_more_pages:
+                    break
+                # Only request the next page once this one is consumed
+                if deadline and deadline.remaining() is not None:
+                    response_future.timeout = deadline.cassandra_timeout('cassandra paging')
+                response_future.start_fetching_next_page()
+        finally:
+            # The driver's ResponseFuture has no cancel(); detaching the callbacks ends
+            # the paging chain and lets the in-flight page be discarded
+            closed = True
+            response_future.clear_callbacks()
+    
+    async def execute_query(self, query: str, parameters: List = None, fetch_size: int = 5000,
+                            deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Execute a query asynchronously and return all rows"""
+        return [row async for row in self.stream_query(query, parameters, fetch_size, deadline)]
@@ -0,0 +1,92 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, ExecutionTimeout
+import logging
+from typing import List, Dict, Any, Optional
+from .deadline import QueryDeadlineExceeded
+
+class AsyncMongoManager:
+    """asyncio variant of MongoManager backed by the Motor driver"""
+    
+    def __init__(self, uri='mongodb://localhost:27017/', database='telco_customers', connection_timeout=30000):
+        self.uri = uri
+        self.database_name = database
+        self.connection_timeout = connection_timeout
+        self.client = None
+        self.db = None
+        self.logger = logging.getLogger(__name__)
+    
+    async def connect(self) -> bool:
+        """Establish connection to MongoDB"""
+        try:
+            self.logger.info("🔄 Connecting to MongoDB (async)...")
+            
+            self.client = AsyncIOMotorClient(
+                self.uri,
+                serverSelectionTimeoutMS=self.connection_timeout
+            )
+            
+            # Test connection
+            await self.client.admin.command('ping')
+            self.db = self.client[self.database_name]
+            
+            self.logger.info("✅ Connected to MongoDB successfully")
+            return True
+        
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            self.logger.error(f"❌ Failed to connect to MongoDB: {e}")
+            return False
+        except Exception as e:
+            self.logger.error(f"❌ Unexpected error connecting to MongoDB: {e}")
+            return False
+    
+    async def execute_aggregation(self, collection_name: str, pipeline: List[Dict],
+                                  max_time_ms: Optional[int] = None) -> List[Dict]:
+        """Execute aggregation pipeline, killed server-side after max_time_ms if given"""
+        try:
+            options = {'maxTimeMS': max_time_ms} if max_time_ms else {}
+            cursor = self.db[collection_name].aggregate(pipeline, **options)
+            return await cursor.to_list(length=None)
+        
+        except ExecutionTimeout as e:
+            self.logger.error(f"❌ Aggregation on {collection_name} exceeded maxTimeMS={max_time_ms}")
+            raise QueryDeadlineExceeded(f"MongoDB aggregation exceeded deadline: {e}") from e
+        except Exception as e:
+            self.logger.error(f"❌ Aggregation failed on {collection_name}: {e}")
+            raise
+    
+    async def find_documents(self, collection_name: str, query: Dict = None, projection: Dict = None,
+                             sort: List = None, limit: int = None,
+                             max_time_ms: Optional[int] = None) -> List[Dict]:
+        """Find documents with optional query, projection, sort, limit and maxTimeMS"""
+        try:
+            cursor = self.db[collection_name].find(query or {}, projection)
+            
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(limit)
+            if max_time_ms:
+                cursor = cursor.max_time_ms(max_time_ms)
+            
+            return await cursor.to_list(length=None)
+        
+        except ExecutionTimeout as e:
+            self.logger.error(f"❌ Find on {collection_name} exceeded maxTimeMS={max_time_ms}")
+            raise QueryDeadlineExceeded(f"MongoDB find exceeded deadline: {e}") from e
+        except Exception as e:
+            self.logger.error(f"❌ Find operation failed on {collection_name}: {e}")
+            raise
+    
+    async def get_collection_count(self, collection_name: str, query: Dict = None) -> int:
+        """Get document count for a collection"""
+        try:
+            return await self.db[collection_name].count_documents(query or {})
+        except Exception as e:
+            self.logger.error(f"❌ Failed to get count for {collection_name}: {e}")
+            return 0
+    
+    def close(self):
+        """Close database connection"""
+        if self.client:
+            self.client.close()
+            self.logger.info("✅ MongoDB connection closed")
@@ -0,0 +1,352 @@
+import asyncio
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+from .async_cassandra_manager import AsyncCassandraManager
+from .async_mongodb_manager import AsyncMongoManager
+from .query_aggregator import QueryAggregatorBase
+from .query_profiler import QueryProfiler
+from .topk import TopK
+from .deadline import Deadline, QueryDeadlineExceeded
+
+class AsyncQueryAggregator(QueryAggregatorBase):
+    """
+    asyncio-native counterpart of QueryAggregator
+    Shares the I/O-free query builders and result processors of QueryAggregatorBase;
+    all database I/O is awaited so independent sub-queries overlap on one event loop.
+    Planner strategies, approximate mode and index benchmarks stay on QueryAggregator.
+    For asyncio callers: the eventlet web app still serves every endpoint through
+    the blocking QueryAggregator
+    """
+    
+    def __init__(self, cassandra_manager: AsyncCassandraManager, mongo_manager: AsyncMongoManager,
+                 performance_monitor=None, profile_batch_size: int = 50,
+                 default_timeout: Optional[float] = None, profile_cache=None,
+                 customer_filter=None, vectorized: bool = False, max_profile_batches: int = 4):
+        super().__init__(cassandra_manager, mongo_manager, performance_monitor, default_timeout,
+                         profile_cache, customer_filter, vectorized)
+        self.profile_batch_size = profile_batch_size
+        # Profile batches in flight at once; a segment trend can need thousands of batches
+        self.max_profile_batches = max(1, max_profile_batches)
+        self.logger = logging.getLogger(__name__)
+    
+    async def _within(self, awaitable, deadline: Deadline, operation: str):
+        """Await with the remaining time; on expiry the in-flight task is cancelled"""
+        try:
+            return await asyncio.wait_for(awaitable, deadline.remaining())
+        except asyncio.TimeoutError as e:
+            raise QueryDeadlineExceeded(f"Deadline of {deadline.timeout_seconds}s exceeded during {operation}") from e
+    
+    async def query_db1_call_analytics(self, start_date: datetime, end_date: datetime,
+                                       call_type: Optional[str] = None,
+                                       timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Query 1 (async): Analisis volume panggilan dari Cassandra (DB1)"""
+        self.logger.info(f"🔍 Query DB1 (async): Analyzing call volume from {start_date} to {end_date}")
+        start_time = time.time()
+        profiler = QueryProfiler()
+        deadline = self._deadline(timeout)
+        
+        try:
+            base_query, parameters = self._build_call_analytics_query(start_date, end_date, call_type)
+            
+            with profiler.stage('cassandra_query') as stage:
+                results = await self._within(
+                    self.cassandra.execute_query(base_query, parameters, deadline=deadline),
+                    deadline, 'cassandra_query'
+                )
+                stage.record(results)
+            
+            with profiler.stage('post_process') as stage:
+                processed_results, total_calls, total_revenue = self._process_call_analytics(results)
+                stage.record(processed_results)
+            
+            return {
+                'query_type': 'DB1_ONLY',
+                'database': 'Cassandra',
+                'table': 'call_records',
+                'results': processed_results,
+                'summary': {
+                    'total_calls': total_calls,
+                    'total_revenue': round(total_revenue, 2),
+                    'period': f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+                },
+                'execution_time': time.time() - start_time,
+                'record_count': len(processed_results),
+                'stages': self._finish_profile('DB1_ONLY', profiler)
+            }
+        
+        except Exception as e:
+            self.logger.error(f"❌ Query DB1 execution error: {e}")
+            return {
+                'query_type': 'DB1_ONLY',
+                'database': 'Cassandra',
+                'error': str(e),
+                'timed_out': isinstance(e, QueryDeadlineExceeded),
+                'execution_time': time.time() - start_time,
+                'stages': self._finish_profile('DB1_ONLY', profiler)
+            }
+    
+    async def query_db2_customer_insights(self, segment: Optional[str] = None,
+                                          plan_type: Optional[str] = None,
+                                          timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Query 2 (async): Analisis segmentasi pelanggan dari MongoDB (DB2)"""
+        self.logger.info(f"🔍 Query DB2 (async): Customer segmentation analysis")
+        start_time = time.time()
+        profiler = QueryProfiler()
+        deadline = self._deadline(timeout)
+        
+        try:
+            pipeline = self._build_customer_insights_pipeline(segment, plan_type)
+            
+            with profiler.stage('mongo_aggregation') as stage:
+                results = await self._within(
+                    self.mongo.execute_aggregation('customers', pipeline,
+                                                   max_time_ms=deadline.mongo_max_time_ms()),
+                    deadline, 'mongo_aggregation'
+                )
+                stage.record(results)
+            
+            with profiler.stage('post_process') as stage:
+                processed_results, total_customers, total_revenue = self._process_customer_insights(results)
+                stage.record(processed_results)
+            
+            return {
+                'query_type': 'DB2_ONLY',
+                'database': 'MongoDB',
+                'collections': ['customers', 'subscriptions', 'billing'],
+                'results': processed_results,
+                'summary': {
+                    'total_customers': total_customers,
+                    'total_revenue': round(total_revenue, 2),
+                    'segments_analyzed': len(set(r['segment'] for r in processed_results))
+                },
+                'execution_time': time.time() - start_time,
+                'record_count': len(processed_results),
+                'stages': self._finish_profile('DB2_ONLY', profiler)
+            }
+        
+        except Exception as e:
+            self.logger.error(f"❌ Query DB2 execution error: {e}")
+            return {
+                'query_type': 'DB2_ONLY',
+                'database': 'MongoDB',
+                'error': str(e),
+                'timed_out': isinstance(e, QueryDeadlineExceeded),
+                'execution_time': time.time() - start_time,
+                'stages': self._finish_profile('DB2_ONLY', profiler)
+            }
+    
+    async def _fetch_profile_batch(self, batch: List[str], deadline: Deadline,
+                                   semaphore: asyncio.Semaphore) -> List[Dict]:
+        """One profile batch; at most max_profile_batches run at once"""
+        async with semaphore:
+            return await self.mongo.execute_aggregation('customers', self._build_profile_pipeline(batch),
+                                                        max_time_ms=deadline.mongo_max_time_ms())
+    
+    async def _fetch_profiles(self, customer_ids: List[str], deadline: Deadline) -> List[Dict]:
+        """Serve cached profiles, fetch the misses in batches that run concurrently"""
+        customer_profiles, missing_ids = self._cached_profiles(customer_ids)
+        if not missing_ids:
+            return customer_profiles
+        
+        batches = [
+            missing_ids[i:i + self.profile_batch_size]
+            for i in range(0, len(missing_ids), self.profile_batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.max_profile_batches)
+        batch_results = await self._within(asyncio.gather(*[
+            self._fetch_profile_batch(batch, deadline, semaphore) for batch in batches
+        ]), deadline, 'mongo_profiles')
+        
+        fetched = [profile for batch in batch_results for profile in batch]
+        if self.profile_cache is not None:
+            self.profile_cache.put_many(fetched)
+        return customer_profiles + fetched
+    
+    async def query_combined_customer_behavior(self, month: str, limit: int = 50,
+                                               timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Query 3 (async): Analisis gabungan customer behavior dari kedua DB
+        Same deadline semantics as QueryAggregator.query_combined_customer_behavior;
+        profile batches still in flight at the deadline are cancelled
+        """
+        self.logger.info(f"🔍 Query Combined (async): Customer behavior analysis for {month}")
+        start_time = time.time()
+        profiler = QueryProfiler()
+        deadline = self._deadline(timeout)
+        partial = False
+        unknown_callers = 0
+        
+        try:
+            start_date, end_date = self._month_range(month)
+            call_query = self._build_caller_activity_query()
+            
+            with profiler.stage('cassandra_call_activity') as cassandra_stage:
+                top_callers = TopK(limit * 2, key=self._caller_rank_key)
+                
+                with profiler.stage('stream_top_k') as stage:
+                    async for row in self.cassandra.stream_query(call_query, [start_date, end_date],
+                                                                 deadline=deadline):
+                        if not row.get('caller_id'):
+                            continue
+                        if self._is_known_customer(row['caller_id']):
+                            top_callers.push(row)
+                        else:
+                            unknown_callers += 1
+                    stage.record(row_count=top_callers.seen)
+                
+                with profiler.stage('index_by_caller') as stage:
+                    call_activity = self._index_call_activity(top_callers.results())
+                    stage.record(row_count=len(call_activity))
+                
+                cassandra_stage.record(row_count=len(call_activity))
+            
+            try:
+                with profiler.stage('mongo_profiles') as stage:
+                    customer_profiles = await self._fetch_profiles(list(call_activity.keys()), deadline)
+                    stage.record(customer_profiles)
+            except QueryDeadlineExceeded as e:
+                self.logger.warning(f"⚠️ Profile lookup exceeded deadline, returning call activity only: {e}")
+                partial = True
+            
+            combined_results, summary = self._combine_behavior(
+                profiler, call_activity, None if partial else customer_profiles, limit, month
+            )
+            
+            result = {
+                'query_type': 'COMBINED',
+                'databases': ['Cassandra', 'MongoDB'],
+                'tables_collections': ['call_records', 'customers', 'subscriptions', 'billing'],
+                'results': combined_results,
+                'summary': summary,
+                'execution_time': time.time() - start_time,
+                'record_count': len(combined_results),
+                'stages': self._finish_profile('COMBINED', profiler)
+            }
+            if self.profile_cache is not None:
+                result['profile_cache'] = self.profile_cache.stats()
+            if self.customer_filter is not None:
+                result['unknown_callers_skipped'] = unknown_callers
+            if partial:
+                result.update({'partial': True, 'timed_out': True, 'missing': ['customer_profiles']})
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"❌ Combined query execution error: {e}")
+            return {
+                'query_type': 'COMBINED',
+                'databases': ['Cassandra', 'MongoDB'],
+                'error': str(e),
+                'timed_out': isinstance(e, QueryDeadlineExceeded),
+                'execution_time': time.time() - start_time,
+                'stages': self._finish_profile('COMBINED', profiler)
+            }
+    
+    async def _month_call_activity(self, month: str, deadline: Deadline, semaphore: asyncio.Semaphore):
+        """Per-caller activity of one month; at most max_workers months stream at once"""
+        async with semaphore:
+            start_date, end_date = self._month_range(month)
+            started = time.perf_counter()
+            call_activity = {}
+            
+            async for row in self.cassandra.stream_query(self._build_caller_activity_query(),
+                                                         [start_date, end_date], deadline=deadline):
+                if row.get('caller_id') and self._is_known_customer(row['caller_id']):
+                    call_activity.update(self._index_call_activity([row]))
+            
+            return call_activity, {
+                'name': month,
+                'duration': round(time.perf_counter() - started, 6),
+                'rows': len(call_activity),
+                'bytes': None,
+                'children': []
+            }
+    
+    async def query_customer_behavior_trend(self, start_month: str, end_month: str,
+                                            group_by: str = 'customer', limit: int = 20,
+                                            max_workers: int = 4,
+                                            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Query 4 (async): Tren customer behavior multi-bulan dari kedua DB"""
+        self.logger.info(f"🔍 Query Trend (async): Customer behavior from {start_month} to {end_month} by {group_by}")
+        start_time = time.time()
+        profiler = QueryProfiler()
+        deadline = self._deadline(timeout)
+        
+        try:
+            if group_by not in ('customer', 'segment'):
+                raise ValueError(f"group_by must be 'customer' or 'segment', got {group_by!r}")
+            months = self._month_sequence(start_month, end_month)
+            semaphore = asyncio.Semaphore(max(1, max_workers))
+            
+            with profiler.stage('cassandra_months') as stage:
+                month_results = await self._within(asyncio.gather(*[
+                    self._month_call_activity(month, deadline, semaphore) for month in months
+                ]), deadline, 'cassandra_months')
+                month_activity = {month: activity for month, (activity, _) in zip(months, month_results)}
+                stage.attach([month_stage for _, month_stage in month_results])
+                stage.record(row_count=sum(len(activity) for activity in month_activity.values()))
+            
+            with profiler.stage('select_customers') as stage:
+                customer_ids = self._trend_customer_ids(month_activity, group_by, limit)
+                stage.record(row_count=len(customer_ids))
+            
+            with profiler.stage('mongo_profiles') as stage:
+                customer_profiles = await self._fetch_profiles(customer_ids, deadline)
+                stage.record(customer_profiles)
+            
+            with profiler.stage('build_series') as stage:
+                series = self._build_trend_series(months, month_activity, customer_ids,
+                                                  customer_profiles, group_by, limit)
+                stage.record(series)
+            
+            with profiler.stage('summary'):
+                summary = self._summarize_trend(months, series)
+            
+            return {
+                'query_type': 'TREND',
+                'databases': ['Cassandra', 'MongoDB'],
+                'tables_collections': ['call_records', 'customers', 'subscriptions', 'billing'],
+                'group_by': group_by,
+                'months': months,
+                'results': series,
+                'summary': summary,
+                'execution_time': time.time() - start_time,
+                'record_count': len(series),
+                'stages': self._finish_profile('TREND', profiler)
+            }
+        
+        except Exception as e:
+            self.logger.error(f"❌ Trend query execution error: {e}")
+            return {
+                'query_type': 'TREND',
+                'databases': ['Cassandra', 'MongoDB'],
+                'error': str(e),
+                'timed_out': isinstance(e, QueryDeadlineExceeded),
+                'execution_time': time.time() - start_time,
+                'stages': self._finish_profile('TREND', profiler)
+            }
+    
+    async def dashboard_overview(self, start_date: datetime, end_date: datetime, month: str,
+                                 limit: int = 50, call_type: Optional[str] = None,
+                                 segment: Optional[str] = None,
+                                 plan_type: Optional[str] = None,
+                                 timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run all dashboard widgets concurrently
+        The three queries are independent, so their I/O overlaps on the event loop;
+        each one gets its own deadline of `timeout` seconds
+        """
+        start_time = time.time()
+        call_analytics, customer_insights, combined_behavior = await asyncio.gather(
+            self.query_db1_call_analytics(start_date, end_date, call_type, timeout=timeout),
+            self.query_db2_customer_insights(segment, plan_type, timeout=timeout),
+            self.query_combined_customer_behavior(month, limit, timeout=timeout)
+        )
+        
+        return {
+            'call_analytics': call_analytics,
+            'customer_insights': customer_insights,
+            'combined_behavior': combined_behavior,
+            'execution_time': time.time() - start_time
+        }
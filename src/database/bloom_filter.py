@@ -0,0 +1,144 @@
+import os
+import math
+import struct
+import hashlib
+import logging
+from typing import Iterable, Optional
+
+class BloomFilter:
+    """
+    Space-efficient set membership test with a configurable false-positive rate
+    Tidak pernah false negative: ID yang tidak ada di filter pasti tidak ada di MongoDB
+    """
+    
+    _MAGIC = b'TBLM1'
+    _HEADER = struct.Struct('<QQQd')
+    
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01):
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"false_positive_rate must be between 0 and 1, got {false_positive_rate}")
+        
+        expected_items = max(1, expected_items)
+        self.false_positive_rate = false_positive_rate
+        self.size = max(8, math.ceil(-expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item: str):
+        # Double hashing (Kirsch-Mitzenmacher): k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+    
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def add_many(self, items: Iterable[str]) -> 'BloomFilter':
+        for item in items:
+            self.add(item)
+        return self
+    
+    def on_write(self, collection_name: str, documents: Iterable[dict]):
+        """
+        MongoManager write hook: add customer IDs written after the filter was built
+        IDs already in the filter are skipped so count keeps tracking distinct customers
+        """
+        if collection_name != 'customers':
+            return
+        for document in documents:
+            customer_id = document.get('customer_id')
+            if customer_id is not None and customer_id not in self:
+                self.add(customer_id)
+    
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+    
+    def __len__(self):
+        return self.count
+    
+    def stats(self):
+        fill_ratio = sum(bin(byte).count('1') for byte in self.bits) / self.size
+        return {
+            'items': self.count,
+            'size_bits': self.size,
+            'size_bytes': len(self.bits),
+            'hash_count': self.hash_count,
+            'target_false_positive_rate': self.false_positive_rate,
+            'estimated_false_positive_rate': round(fill_ratio ** self.hash_count, 6)
+        }
+    
+    def save(self, path: str):
+        """Write the filter to disk atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self._MAGIC)
+            f.write(self._HEADER.pack(self.size, self.hash_count, self.count, self.false_positive_rate))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        with open(path, 'rb') as f:
+            if f.read(len(cls._MAGIC)) != cls._MAGIC:
+                raise ValueError(f"{path} is not a bloom filter file")
+            size, hash_count, count, false_positive_rate = cls._HEADER.unpack(f.read(cls._HEADER.size))
+            bits = bytearray(f.read())
+        
+        if len(bits) != (size + 7) // 8:
+            raise ValueError(f"{path} is truncated")
+        
+        bloom = cls.__new__(cls)
+        bloom.size = size
+        bloom.hash_count = hash_count
+        bloom.count = count
+        bloom.false_positive_rate = false_positive_rate
+        bloom.bits = bits
+        return bloom
+
+def build_customer_filter(mongo_manager, false_positive_rate: float = 0.01,
+                          path: Optional[str] = None) -> BloomFilter:
+    """Build a filter of customers.customer_id from MongoDB, optionally persisting it"""
+    logger = logging.getLogger(__name__)
+    expected_items = mongo_manager.get_collection_count('customers')
+    
+    bloom = BloomFilter(expected_items, false_positive_rate)
+    bloom.add_many(mongo_manager.iter_field_values('customers', 'customer_id'))
+    logger.info(f"✅ Built customer ID bloom filter: {bloom.count:,} IDs, {len(bloom.bits):,} bytes")
+    
+    if path:
+        bloom.save(path)
+    return bloom
+
+def load_or_build_customer_filter(mongo_manager, false_positive_rate: float = 0.01,
+                                  path: Optional[str] = None) -> BloomFilter:
+    """
+    Load the persisted filter if it still matches MongoDB, otherwise rebuild it
+    A filter whose ID count differs from the customers collection (customers written
+    while it was not loaded) or that was sized for another false-positive rate is stale
+    """
+    logger = logging.getLogger(__name__)
+    if path and os.path.exists(path):
+        try:
+            bloom = BloomFilter.load(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"⚠️ Could not load bloom filter from {path}, rebuilding: {e}")
+        else:
+            customer_count = mongo_manager.get_collection_count('customers')
+            if bloom.count != customer_count:
+                logger.warning(f"⚠️ Bloom filter at {path} holds {bloom.count:,} IDs but customers has "
+                               f"{customer_count:,} documents, rebuilding")
+            elif not math.isclose(bloom.false_positive_rate, false_positive_rate):
+                logger.warning(f"⚠️ Bloom filter at {path} was built for a false-positive rate of "
+                               f"{bloom.false_positive_rate}, not {false_positive_rate}, rebuilding")
+            else:
+                return bloom
+    return build_customer_filter(mongo_manager, false_positive_rate, path)
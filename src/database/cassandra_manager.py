@@ -1,12 +1,32 @@
-from cassandra.cluster import Cluster
+from cassandra import ReadTimeout
+from cassandra.cluster import Cluster, OperationTimedOut
+from cassandra.query import SimpleStatement
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.policies import DCAwareRoundRobinPolicy
 import logging
 import time
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from .deadline import Deadline, QueryDeadlineExceeded
 
 class CassandraManager:
+    # Insert column order per table; insert_rows takes tuples in this order
+    TABLE_COLUMNS = {
+        'call_records': (
+            'call_id', 'caller_id', 'callee_id', 'call_start_time', 'call_end_time',
+            'duration_seconds', 'call_type', 'location_cell_id', 'location_lat',
+            'location_lon', 'cost_amount', 'network_type', 'quality_score', 'created_at'
+        ),
+        'sms_records': (
+            'sms_id', 'sender_id', 'receiver_id', 'message_length', 'sent_time',
+            'delivery_status', 'cost_amount', 'network_type', 'created_at'
+        ),
+        'data_usage': (
+            'usage_id', 'customer_id', 'session_start', 'session_end',
+            'data_consumed_mb', 'app_category', 'network_type', 'cost_amount', 'created_at'
+        )
+    }
+    
     def __init__(self, hosts=['127.0.0.1'], port=9042, keyspace='telco_cdr', replication_factor=1):
         self.hosts = hosts
         self.port = port
@@ -14,6 +34,9 @@ class CassandraManager:
         self.replication_factor = replication_factor
         self.cluster = None
         self.session = None
+        self._rollup_statements = None
+        self._insert_statements = {}
+        self.rollup_failures = 0
         self.logger = logging.getLogger(__name__)
         
     def connect(self) -> bool:
@@ -111,10 +134,47 @@ class CassandraManager:
         )
         """
         
+        # Call volume rollup: one partition per day, maintained while loading call_records
+        create_call_volume_daily_table = """
+        CREATE TABLE IF NOT EXISTS call_volume_daily (
+            day DATE,
+            call_type TEXT,
+            network_type TEXT,
+            call_count COUNTER,
+            total_duration COUNTER,
+            total_cost_cents COUNTER,
+            PRIMARY KEY ((day), call_type, network_type)
+        )
+        """
+        
+        # Per-caller activity keyed by month, so a month is a single partition read
+        create_caller_activity_table = """
+        CREATE TABLE IF NOT EXISTS caller_activity_monthly (
+            month TEXT,
+            caller_id TEXT,
+            total_calls COUNTER,
+            total_duration COUNTER,
+            total_cost_cents COUNTER,
+            PRIMARY KEY ((month), caller_id)
+        )
+        """
+        
+        # Whether the rollups cover every row of call_records
+        create_rollup_state_table = """
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            complete BOOLEAN,
+            updated_at TIMESTAMP
+        )
+        """
+        
         tables = [
             ('call_records', create_cdr_table),
             ('sms_records', create_sms_table),
-            ('data_usage', create_data_table)
+            ('data_usage', create_data_table),
+            ('call_volume_daily', create_call_volume_daily_table),
+            ('caller_activity_monthly', create_caller_activity_table),
+            ('rollup_state', create_rollup_state_table)
         ]
         
         for table_name, table_query in tables:
@@ -174,96 +234,224 @@ class CassandraManager:
             except Exception as e:
                 self.logger.warning(f"⚠️ Index drop failed: {e}")
     
+    def _table_columns(self, table_name: str):
+        if table_name not in self.TABLE_COLUMNS:
+            raise ValueError(f"Unknown table: {table_name}")
+        return self.TABLE_COLUMNS[table_name]
+    
     def insert_batch_data(self, table_name: str, data: List[Dict], batch_size: int = 1000):
         """Insert data in batches for better performance"""
         if not data:
             return 0
         
-        # Prepare insert statements based on table
-        if table_name == 'call_records':
-            insert_query = """
-            INSERT INTO call_records (
-                call_id, caller_id, callee_id, call_start_time, call_end_time,
-                duration_seconds, call_type, location_cell_id, location_lat,
-                location_lon, cost_amount, network_type, quality_score, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-        elif table_name == 'sms_records':
-            insert_query = """
-            INSERT INTO sms_records (
-                sms_id, sender_id, receiver_id, message_length, sent_time,
-                delivery_status, cost_amount, network_type, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-        elif table_name == 'data_usage':
-            insert_query = """
-            INSERT INTO data_usage (
-                usage_id, customer_id, session_start, session_end,
-                data_consumed_mb, app_category, network_type, cost_amount, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-        else:
-            raise ValueError(f"Unknown table: {table_name}")
+        columns = self._table_columns(table_name)
+        rows = []
+        for record in data:
+            try:
+                rows.append(tuple(record[column] for column in columns))
+            except KeyError as e:
+                self.logger.error(f"❌ Failed to insert record: missing field {e}")
+        
+        return self.insert_rows(table_name, rows, batch_size)
+    
+    def insert_rows(self, table_name: str, rows: List[tuple], batch_size: int = 1000) -> int:
+        """Insert rows given as tuples in TABLE_COLUMNS order (the compact form loader workers produce)"""
+        if not rows:
+            return 0
         
-        prepared = self.session.prepare(insert_query)
+        columns = self._table_columns(table_name)
+        prepared = self._insert_statements.get(table_name)
+        if prepared is None:
+            prepared = self.session.prepare(f"""
+            INSERT INTO {table_name} ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+            """)
+            self._insert_statements[table_name] = prepared
         inserted_count = 0
         
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i+batch_size]
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i+batch_size]
+            inserted_calls = []
             
-            for record in batch:
+            for row in batch:
                 try:
-                    if table_name == 'call_records':
-                        self.session.execute(prepared, [
-                            record['call_id'], record['caller_id'], record['callee_id'],
-                            record['call_start_time'], record['call_end_time'],
-                            record['duration_seconds'], record['call_type'],
-                            record['location_cell_id'], record['location_lat'],
-                            record['location_lon'], record['cost_amount'],
-                            record['network_type'], record['quality_score'],
-                            record['created_at']
-                        ])
-                    elif table_name == 'sms_records':
-                        self.session.execute(prepared, [
-                            record['sms_id'], record['sender_id'], record['receiver_id'],
-                            record['message_length'], record['sent_time'],
-                            record['delivery_status'], record['cost_amount'],
-                            record['network_type'], record['created_at']
-                        ])
-                    elif table_name == 'data_usage':
-                        self.session.execute(prepared, [
-                            record['usage_id'], record['customer_id'],
-                            record['session_start'], record['session_end'],
-                            record['data_consumed_mb'], record['app_category'],
-                            record['network_type'], record['cost_amount'],
-                            record['created_at']
-                        ])
-                    
+                    self.session.execute(prepared, row)
                     inserted_count += 1
+                    if table_name == 'call_records':
+                        inserted_calls.append(dict(zip(columns, row)))
                     
                 except Exception as e:
                     self.logger.error(f"❌ Failed to insert record: {e}")
             
-            self.logger.info(f"Inserted {min(i+batch_size, len(data))}/{len(data)} records to {table_name}")
+            if inserted_calls:
+                self.update_call_rollups(inserted_calls)
+            
+            self.logger.info(f"Inserted {min(i+batch_size, len(rows))}/{len(rows)} records to {table_name}")
         
         return inserted_count
     
-    def execute_query(self, query: str, parameters: List = None) -> List[Dict]:
-        """Execute a query and return results"""
+    def execute_query(self, query: str, parameters: List = None, stream: bool = False,
+                      fetch_size: int = 5000, deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Execute a query and return results
+        
+        With stream=True an iterator is returned instead of a list; rows are
+        fetched page by page (fetch_size rows per page) as it is consumed.
+        With a deadline every page request gets the remaining time as its
+        request timeout, and paging stops once the deadline has passed.
+        """
+        rows = self._iter_rows(query, parameters, fetch_size, deadline)
+        if stream:
+            return rows
+        return list(rows)
+    
+    def _iter_rows(self, query: str, parameters: List = None, fetch_size: int = 5000,
+                   deadline: Optional[Deadline] = None):
+        """Yield result rows as dictionaries, one driver page at a time"""
         try:
-            if parameters:
-                result = self.session.execute(query, parameters)
-            else:
-                result = self.session.execute(query)
+            statement = SimpleStatement(query, fetch_size=fetch_size)
+            options = {}
+            if deadline and deadline.remaining() is not None:
+                options['timeout'] = deadline.cassandra_timeout()
             
-            # Convert result to list of dictionaries
+            result = self.session.execute(statement, parameters or None, **options)
             columns = result.column_names if hasattr(result, 'column_names') else []
-            return [dict(zip(columns, row)) for row in result]
             
+            while True:
+                for row in result.current_rows:
+                    yield dict(zip(columns, row))
+                
+                if not result.has_more_pages:
+                    break
+                if deadline and deadline.remaining() is not None:
+                    result.response_future.timeout = deadline.cassandra_timeout('cassandra paging')
+                result.fetch_next_page()
+        
+        except (OperationTimedOut, ReadTimeout) as e:
+            self.logger.error(f"❌ Query timed out: {e}")
+            if deadline:
+                raise QueryDeadlineExceeded(f"Cassandra request exceeded deadline: {e}") from e
+            raise
+        except QueryDeadlineExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"❌ Query execution failed: {e}")
             raise
     
+    def update_call_rollups(self, records: List[Dict]):
+        """Add call records to the call_volume_daily and caller_activity_monthly counters"""
+        if self._rollup_statements is None:
+            self._rollup_statements = (
+                self.session.prepare("""
+                UPDATE call_volume_daily
+                SET call_count = call_count + ?, total_duration = total_duration + ?,
+                    total_cost_cents = total_cost_cents + ?
+                WHERE day = ? AND call_type = ? AND network_type = ?
+                """),
+                self.session.prepare("""
+                UPDATE caller_activity_monthly
+                SET total_calls = total_calls + ?, total_duration = total_duration + ?,
+                    total_cost_cents = total_cost_cents + ?
+                WHERE month = ? AND caller_id = ?
+                """)
+            )
+        daily_statement, monthly_statement = self._rollup_statements
+        
+        # Pre-aggregate the batch so each counter is written once
+        daily = {}
+        monthly = {}
+        for record in records:
+            call_start = record.get('call_start_time')
+            if not isinstance(call_start, datetime):
+                continue
+            
+            duration = int(record.get('duration_seconds') or 0)
+            cost_cents = int(round(float(record.get('cost_amount') or 0) * 100))
+            
+            if record.get('call_type') and record.get('network_type'):
+                totals = daily.setdefault((call_start.date(), record['call_type'], record['network_type']), [0, 0, 0])
+                totals[0] += 1
+                totals[1] += duration
+                totals[2] += cost_cents
+            
+            if record.get('caller_id'):
+                totals = monthly.setdefault((call_start.strftime('%Y-%m'), record['caller_id']), [0, 0, 0])
+                totals[0] += 1
+                totals[1] += duration
+                totals[2] += cost_cents
+        
+        try:
+            for key, totals in daily.items():
+                self.session.execute(daily_statement, [*totals, *key])
+            for key, totals in monthly.items():
+                self.session.execute(monthly_statement, [*totals, *key])
+        except Exception as e:
+            self.logger.warning(f"⚠️ Rollup update failed, rollups are now incomplete: {e}")
+            self.rollup_failures += 1
+            self.set_rollup_state(False)
+    
+    def get_rollup_state(self, name: str = 'call_rollups') -> bool:
+        """True when the rollup tables cover every row of call_records"""
+        try:
+            row = self.session.execute("SELECT complete FROM rollup_state WHERE name = %s", [name]).one()
+            return bool(row and row[0])
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to read rollup state: {e}")
+            return False
+    
+    def set_rollup_state(self, complete: bool, name: str = 'call_rollups'):
+        try:
+            self.session.execute(
+                "INSERT INTO rollup_state (name, complete, updated_at) VALUES (%s, %s, %s)",
+                [name, complete, datetime.now()]
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to update rollup state: {e}")
+    
+    def get_size_estimates(self, table_name: str) -> Dict[str, int]:
+        """Partition count and mean partition size from system.size_estimates"""
+        try:
+            rows = self.session.execute(
+                "SELECT partitions_count, mean_partition_size FROM system.size_estimates "
+                "WHERE keyspace_name = %s AND table_name = %s",
+                [self.keyspace, table_name]
+            )
+            partitions = 0
+            weighted_size = 0
+            for row in rows:
+                partitions += row[0]
+                weighted_size += row[0] * row[1]
+            return {
+                'partitions': partitions,
+                'mean_partition_size': int(weighted_size / partitions) if partitions else 0
+            }
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to read size estimates for {table_name}: {e}")
+            return {'partitions': 0, 'mean_partition_size': 0}
+    
+    def get_index_names(self, table_name: str) -> List[str]:
+        """Names of the secondary indexes currently defined on a table"""
+        try:
+            rows = self.session.execute(
+                "SELECT index_name FROM system_schema.indexes WHERE keyspace_name = %s AND table_name = %s",
+                [self.keyspace, table_name]
+            )
+            return [row[0] for row in rows]
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to read indexes for {table_name}: {e}")
+            return []
+    
+    def is_table_empty(self, table_name: str) -> bool:
+        """
+        Cheap emptiness probe (reads at most one row, unlike COUNT(*))
+        Any error counts as non-empty, so callers err on the side of "has data"
+        """
+        try:
+            key_column = self._table_columns(table_name)[0]
+            return self.session.execute(f"SELECT {key_column} FROM {table_name} LIMIT 1").one() is None
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to probe {table_name} for rows, assuming it has data: {e}")
+            return False
+    
     def get_table_count(self, table_name: str) -> int:
         """Get record count for a table"""
         try:
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Tuple
+
+# Columnar (pandas) versions of the QueryAggregator result processors.
+# Each function produces the same rows and totals as its row-by-row
+# counterpart, but coerces, derives and sorts whole columns at once.
+
+def _frame(rows: List[Dict], columns: List[str]) -> pd.DataFrame:
+    """Build a frame with a fixed set of columns, missing keys becoming NaN"""
+    frame = pd.json_normalize(rows) if rows else pd.DataFrame()
+    return frame.reindex(columns=columns)
+
+def to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Serialize a frame to plain Python dicts (NaN becomes None)"""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+def process_call_analytics(results: List[Dict]) -> Tuple[List[Dict], int, float]:
+    """Columnar _process_call_analytics"""
+    frame = _frame(results, ['call_type', 'network_type', 'call_count', 'avg_duration', 'total_cost'])
+    
+    call_count = frame['call_count'].fillna(0).astype(np.int64)
+    total_cost = frame['total_cost'].fillna(0).astype(float)
+    
+    processed = pd.DataFrame({
+        'call_type': frame['call_type'],
+        'network_type': frame['network_type'],
+        'call_count': call_count,
+        'avg_duration': frame['avg_duration'].fillna(0).astype(float).round(2),
+        'total_cost': total_cost.round(2)
+    })
+    return to_records(processed), int(call_count.sum()), float(total_cost.sum())
+
+def process_customer_insights(results: List[Dict]) -> Tuple[List[Dict], int, float]:
+    """Columnar _process_customer_insights"""
+    frame = _frame(results, ['_id.segment', '_id.plan_type', '_id.city', 'customer_count',
+                             'avg_monthly_fee', 'avg_credit_score', 'total_revenue'])
+    
+    customer_count = frame['customer_count'].fillna(0).astype(np.int64)
+    revenue = frame['total_revenue'].fillna(0).astype(float)
+    
+    processed = pd.DataFrame({
+        'segment': frame['_id.segment'],
+        'plan_type': frame['_id.plan_type'],
+        'city': frame['_id.city'],
+        'customer_count': customer_count,
+        'avg_monthly_fee': frame['avg_monthly_fee'].fillna(0).astype(float).round(2),
+        'avg_credit_score': frame['avg_credit_score'].fillna(0).astype(float).round(2),
+        'total_revenue': revenue.round(2)
+    })
+    return to_records(processed), int(customer_count.sum()), float(revenue.sum())
+
+def join_behavior(call_activity: Dict[str, Dict[str, Any]], customer_profiles: List[Dict]) -> pd.DataFrame:
+    """Columnar _join_behavior: inner join of profiles with call activity, in profile order"""
+    activity = pd.DataFrame.from_dict(call_activity, orient='index',
+                                      columns=['total_calls', 'total_duration', 'total_cost'])
+    activity.index.name = 'customer_id'
+    
+    profiles = _frame(customer_profiles, [
+        'customer_id', 'personal_info.first_name', 'personal_info.last_name', 'customer_segment',
+        'subscription.plan_type', 'subscription.monthly_fee', 'location.city', 'status', 'billing_count'
+    ])
+    joined = profiles.merge(activity.reset_index(), on='customer_id', how='inner', sort=False)
+    
+    monthly_fee = joined['subscription.monthly_fee'].fillna(1)
+    efficiency = (joined['total_cost'] / monthly_fee.where(monthly_fee > 0) * 100).round(2)
+    
+    return pd.DataFrame({
+        'customer_id': joined['customer_id'],
+        'name': (joined['personal_info.first_name'].fillna('').astype(str) + ' ' +
+                 joined['personal_info.last_name'].fillna('').astype(str)).str.strip(),
+        'segment': joined['customer_segment'],
+        'plan_type': joined['subscription.plan_type'],
+        'city': joined['location.city'],
+        'monthly_fee': monthly_fee,
+        'status': joined['status'],
+        'total_calls': joined['total_calls'].astype(np.int64),
+        'total_call_duration': joined['total_duration'].astype(np.int64),
+        'total_call_cost': joined['total_cost'].astype(float).round(2),
+        'usage_efficiency': efficiency.fillna(0),
+        'billing_records': joined['billing_count'].fillna(0).astype(np.int64)
+    })
+
+def rank_behavior(frame: pd.DataFrame, limit: int) -> pd.DataFrame:
+    """Top `limit` rows by call count (descending), ties broken by customer_id"""
+    return frame.sort_values(['total_calls', 'customer_id'], ascending=[False, True],
+                             kind='mergesort').head(limit)
+
+def summarize_behavior(frame: pd.DataFrame, month: str) -> Dict[str, Any]:
+    """Columnar _summarize_behavior"""
+    return {
+        'total_calls': int(frame['total_calls'].sum()),
+        'total_revenue': round(float(frame['total_call_cost'].sum()), 2),
+        'avg_usage_efficiency': round(float(frame['usage_efficiency'].mean()), 2) if len(frame) else 0,
+        'month_analyzed': month
+    }
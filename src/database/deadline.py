@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+class QueryDeadlineExceeded(Exception):
+    """Raised when a query runs past its deadline"""
+
+class Deadline:
+    """
+    Absolute deadline for one aggregator request
+    Sisa waktu diteruskan ke setiap request Cassandra (timeout) dan
+    setiap operasi MongoDB (maxTimeMS)
+    """
+    
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = time.monotonic() + timeout_seconds if timeout_seconds else None
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when the request is unbounded"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+    
+    def check(self, operation: str = 'query'):
+        """Raise QueryDeadlineExceeded if the deadline has passed"""
+        if self.expired():
+            raise QueryDeadlineExceeded(f"Deadline of {self.timeout_seconds}s exceeded during {operation}")
+    
+    def cassandra_timeout(self, operation: str = 'cassandra request') -> Optional[float]:
+        """Request timeout (seconds) for the next Cassandra request"""
+        self.check(operation)
+        return self.remaining()
+    
+    def mongo_max_time_ms(self, operation: str = 'mongodb operation') -> Optional[int]:
+        """maxTimeMS for the next MongoDB operation"""
+        self.check(operation)
+        remaining = self.remaining()
+        return None if remaining is None else max(1, int(remaining * 1000))
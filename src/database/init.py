@@ -5,9 +5,27 @@ Database management module for Telco NoSQL Platform
 from .cassandra_manager import CassandraManager
 from .mongodb_manager import MongoManager
 from .query_aggregator import QueryAggregator
+from .query_profiler import QueryProfiler
+from .topk import TopK, top_k
+from .profile_cache import CustomerProfileCache
+from .bloom_filter import BloomFilter
+from .query_planner import QueryPlanner, ResultCache
+from .async_cassandra_manager import AsyncCassandraManager
+from .async_mongodb_manager import AsyncMongoManager
+from .async_query_aggregator import AsyncQueryAggregator
 
 __all__ = [
     'CassandraManager',
     'MongoManager',
-    'QueryAggregator'
+    'QueryAggregator',
+    'QueryProfiler',
+    'TopK',
+    'top_k',
+    'CustomerProfileCache',
+    'BloomFilter',
+    'QueryPlanner',
+    'ResultCache',
+    'AsyncCassandraManager',
+    'AsyncMongoManager',
+    'AsyncQueryAggregator'
 ]
@@ -1,8 +1,9 @@
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, ExecutionTimeout
 import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from .deadline import QueryDeadlineExceeded
 
 class MongoManager:
     def __init__(self, uri='mongodb://localhost:27017/', database='telco_customers', connection_timeout=30000):
@@ -11,8 +12,20 @@ class MongoManager:
         self.connection_timeout = connection_timeout
         self.client = None
         self.db = None
+        self.write_hooks = []
         self.logger = logging.getLogger(__name__)
     
+    def register_write_hook(self, hook):
+        """Register hook(collection_name, documents), called after every batch write"""
+        self.write_hooks.append(hook)
+    
+    def _notify_write(self, collection_name: str, documents: List[Dict]):
+        for hook in self.write_hooks:
+            try:
+                hook(collection_name, documents)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Write hook failed for {collection_name}: {e}")
+    
     def connect(self) -> bool:
         """Establish connection to MongoDB"""
         try:
@@ -126,23 +139,60 @@ class MongoManager:
                 
             except Exception as e:
                 self.logger.error(f"❌ Failed to insert batch to {collection_name}: {e}")
+            
+            # ordered=False may have written part of a failed batch, so notify either way
+            self._notify_write(collection_name, batch)
         
         return inserted_count
     
-    def execute_aggregation(self, collection_name: str, pipeline: List[Dict]) -> List[Dict]:
-        """Execute aggregation pipeline"""
+    def upsert_batch_data(self, collection_name: str, data: List[Dict], batch_size: int = 5000) -> int:
+        """
+        Idempotent batch write: documents carrying an _id replace any existing document
+        with that _id, so a chunk written twice (e.g. by a resumed load) is not duplicated
+        """
+        if not data:
+            return 0
+        
+        collection = self.db[collection_name]
+        written_count = 0
+        
+        for i in range(0, len(data), batch_size):
+            batch = data[i:i+batch_size]
+            
+            try:
+                result = collection.bulk_write(
+                    [ReplaceOne({'_id': document['_id']}, document, upsert=True) for document in batch],
+                    ordered=False
+                )
+                written_count += result.upserted_count + result.matched_count
+                self.logger.info(f"Upserted {min(i+batch_size, len(data))}/{len(data)} records to {collection_name}")
+                
+            except Exception as e:
+                self.logger.error(f"❌ Failed to upsert batch to {collection_name}: {e}")
+            
+            self._notify_write(collection_name, batch)
+        
+        return written_count
+    
+    def execute_aggregation(self, collection_name: str, pipeline: List[Dict],
+                            max_time_ms: Optional[int] = None) -> List[Dict]:
+        """Execute aggregation pipeline, killed server-side after max_time_ms if given"""
         try:
             collection = self.db[collection_name]
-            result = list(collection.aggregate(pipeline))
+            options = {'maxTimeMS': max_time_ms} if max_time_ms else {}
+            result = list(collection.aggregate(pipeline, **options))
             return result
             
+        except ExecutionTimeout as e:
+            self.logger.error(f"❌ Aggregation on {collection_name} exceeded maxTimeMS={max_time_ms}")
+            raise QueryDeadlineExceeded(f"MongoDB aggregation exceeded deadline: {e}") from e
         except Exception as e:
             self.logger.error(f"❌ Aggregation failed on {collection_name}: {e}")
             raise
     
     def find_documents(self, collection_name: str, query: Dict = None, projection: Dict = None, 
-                      sort: List = None, limit: int = None) -> List[Dict]:
-        """Find documents with optional query, projection, sort, and limit"""
+                      sort: List = None, limit: int = None, max_time_ms: Optional[int] = None) -> List[Dict]:
+        """Find documents with optional query, projection, sort, limit and maxTimeMS"""
         try:
             collection = self.db[collection_name]
             cursor = collection.find(query or {}, projection)
@@ -151,13 +201,26 @@ class MongoManager:
                 cursor = cursor.sort(sort)
             if limit:
                 cursor = cursor.limit(limit)
+            if max_time_ms:
+                cursor = cursor.max_time_ms(max_time_ms)
             
             return list(cursor)
             
+        except ExecutionTimeout as e:
+            self.logger.error(f"❌ Find on {collection_name} exceeded maxTimeMS={max_time_ms}")
+            raise QueryDeadlineExceeded(f"MongoDB find exceeded deadline: {e}") from e
         except Exception as e:
             self.logger.error(f"❌ Find operation failed on {collection_name}: {e}")
             raise
     
+    def iter_field_values(self, collection_name: str, field: str, batch_size: int = 10000):
+        """Stream the values of one field across a collection without materializing it"""
+        cursor = self.db[collection_name].find({}, {field: 1, '_id': 0}).batch_size(batch_size)
+        for doc in cursor:
+            value = doc.get(field)
+            if value is not None:
+                yield value
+    
     def get_collection_count(self, collection_name: str, query: Dict = None) -> int:
         """Get document count for a collection"""
         try:
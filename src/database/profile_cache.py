@@ -0,0 +1,103 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+class CustomerProfileCache:
+    """
+    Bounded LRU cache of customer profiles keyed by customer_id
+    Menyimpan profil hasil join customers/subscriptions/billing (segment, city,
+    plan, fee) agar query Combined tidak perlu ke MongoDB untuk setiap caller
+    """
+    
+    # Collections whose writes change a cached profile
+    SOURCE_COLLECTIONS = ('customers', 'subscriptions', 'billing')
+    
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get_many(self, customer_ids: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Return ({customer_id: profile} for fresh hits, [missing customer_ids])"""
+        found = {}
+        missing = []
+        now = time.monotonic()
+        
+        with self._lock:
+            for customer_id in customer_ids:
+                entry = self._entries.get(customer_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(customer_id)
+                    found[customer_id] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._entries[customer_id]
+                    missing.append(customer_id)
+            
+            self.hits += len(found)
+            self.misses += len(missing)
+        
+        return found, missing
+    
+    def put_many(self, profiles: Iterable[Dict[str, Any]]):
+        """Store profiles (documents with a customer_id), evicting least recently used"""
+        expires_at = time.monotonic() + self.ttl_seconds
+        
+        with self._lock:
+            for profile in profiles:
+                customer_id = profile.get('customer_id')
+                if customer_id is None:
+                    continue
+                
+                self._entries[customer_id] = (expires_at, {k: v for k, v in profile.items() if k != '_id'})
+                self._entries.move_to_end(customer_id)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, customer_ids: Optional[Iterable[str]] = None):
+        """Drop the given customers, or everything when customer_ids is None"""
+        with self._lock:
+            if customer_ids is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            
+            for customer_id in customer_ids:
+                if self._entries.pop(customer_id, None) is not None:
+                    self.invalidations += 1
+    
+    def on_write(self, collection_name: str, documents: List[Dict[str, Any]]):
+        """MongoManager write hook: invalidate profiles touched by a write"""
+        if collection_name not in self.SOURCE_COLLECTIONS:
+            return
+        
+        customer_ids = [doc.get('customer_id') for doc in documents]
+        if not documents or None in customer_ids:
+            self.invalidate()
+        else:
+            self.invalidate(customer_ids)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+    
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,333 @@
+import copy
+import math
+import time
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, time as dt_time
+from typing import Dict, List, Any, Optional, Tuple
+from .query_aggregator import QueryAggregatorBase
+
+class ResultCache:
+    """
+    Bounded LRU cache of finished query results with a TTL
+    Results are copied on the way in, so callers can modify what they get back
+    """
+    
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 60):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+    
+    def put(self, key: Tuple, result: Dict[str, Any]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+    
+    def __len__(self):
+        return len(self._entries)
+
+class QueryPlanner:
+    """
+    Cost-based choice of execution strategy for the aggregator queries
+    Setiap strategi diberi estimasi biaya dari lebar rentang waktu, jumlah baris
+    tabel (system.size_estimates), index yang tersedia dan statistik koleksi
+    MongoDB (collStats); strategi termurah yang berlaku yang dijalankan
+    
+    Strategies:
+    - cached_result: an identical query finished within the result cache TTL
+    - rollup_table: call_volume_daily, one partition per day (day-aligned ranges)
+    - partition_keyed_table: caller_activity_monthly, one partition per month
+    - secondary_index: the original query, served by a secondary index
+    - client_side_scan / collection_scan: read everything, filter while scanning
+    
+    Costs are in abstract row-read units; only their ordering matters.
+    """
+    
+    PARTITION_READ_COST = 10.0
+    ROW_READ_COST = 1.0
+    ROW_TRANSFER_COST = 0.5
+    # An index read plus the base-table read for every matching row
+    INDEX_ROW_COST = 3.0
+    # A range over a secondary index has to ask every token range
+    INDEX_FANOUT_COST = 200.0
+    # call_type x network_type combinations in one call_volume_daily partition
+    ROLLUP_ROWS_PER_DAY = 12
+    # Assumed size while system.size_estimates has not been computed yet
+    UNKNOWN_TABLE_ROWS = 1_000_000
+    
+    DOCUMENT_READ_COST = 1.0
+    INDEXED_DOCUMENT_COST = 1.5
+    # One indexed $lookup (subscriptions or billing) for one customer
+    LOOKUP_COST = 2.0
+    
+    CALL_TIME_INDEX = 'call_records_start_time_idx'
+    SEGMENT_INDEX = 'customer_segment_1'
+    
+    def __init__(self, cassandra_manager, mongo_manager, result_cache: Optional[ResultCache] = None,
+                 data_span_days: float = 365, stats_ttl: float = 300):
+        self.cassandra = cassandra_manager
+        self.mongo = mongo_manager
+        self.result_cache = result_cache
+        # How many days of call records the tables hold; turns a range width into a selectivity
+        self.data_span_days = data_span_days
+        self.stats_ttl = stats_ttl
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    # Statistics
+    
+    def _stat(self, key: Tuple, fetch):
+        """Value of fetch(), cached for stats_ttl seconds"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        
+        value = fetch()
+        with self._lock:
+            self._stats[key] = (now + self.stats_ttl, value)
+        return value
+    
+    def _table_rows(self, table_name: str) -> int:
+        estimates = self._stat(('size_estimates', table_name),
+                               lambda: self.cassandra.get_size_estimates(table_name))
+        return estimates.get('partitions') or self.UNKNOWN_TABLE_ROWS
+    
+    def _has_call_time_index(self) -> bool:
+        indexes = self._stat(('indexes', 'call_records'), lambda: self.cassandra.get_index_names('call_records'))
+        return self.CALL_TIME_INDEX in indexes
+    
+    def _rollups_complete(self) -> bool:
+        return self._stat(('rollup_state',), self.cassandra.get_rollup_state)
+    
+    def _collection_stats(self, collection_name: str) -> Dict[str, Any]:
+        return self._stat(('collStats', collection_name), lambda: self.mongo.get_collection_stats(collection_name))
+    
+    def _selectivity(self, start_date: datetime, end_date: datetime) -> float:
+        """Fraction of call records expected inside [start_date, end_date]"""
+        days = max((end_date - start_date).total_seconds() / 86400, 0)
+        return min(days / self.data_span_days, 1.0) if self.data_span_days else 1.0
+    
+    # Plan selection
+    
+    def _choose(self, query: str, cache_key: Tuple, candidates: List[Dict[str, Any]],
+                strategy: Optional[str] = None, allow_cache: bool = True) -> Dict[str, Any]:
+        """
+        Cheapest applicable candidate, or the forced strategy
+        A fresh cached result beats every candidate unless a strategy is forced.
+        Forcing an inapplicable strategy is refused unless the candidate has a
+        'fallback' (it still returns correct results, only slower).
+        """
+        applicable = [c for c in candidates if c['applicable']]
+        alternatives = [
+            {'strategy': c['strategy'], 'estimated_cost': round(c['estimated_cost'], 2)}
+            for c in sorted(applicable, key=lambda c: c['estimated_cost'])
+        ]
+        
+        if strategy is None and allow_cache and self.result_cache is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return {
+                    'query': query,
+                    'strategy': 'cached_result',
+                    'estimated_cost': 0.0,
+                    'reason': 'identical query answered within the result cache TTL',
+                    'alternatives': alternatives,
+                    'cache_key': cache_key,
+                    'result': cached
+                }
+        
+        if strategy is not None:
+            chosen = next((c for c in candidates if c['strategy'] == strategy), None)
+            if chosen is None:
+                raise ValueError(f"Unknown strategy {strategy!r} for {query}")
+            if chosen['applicable']:
+                reason = f"forced: {chosen['reason']}"
+            elif chosen.get('fallback'):
+                reason = f"forced: {chosen['reason']}, {chosen['fallback']}"
+            else:
+                raise ValueError(f"Strategy {strategy!r} is not applicable: {chosen['reason']}")
+        else:
+            if not applicable:
+                raise ValueError(f"No applicable strategy for {query}")
+            chosen = min(applicable, key=lambda c: c['estimated_cost'])
+            reason = chosen['reason']
+        
+        plan = {
+            'query': query,
+            'strategy': chosen['strategy'],
+            'estimated_cost': round(chosen['estimated_cost'], 2),
+            'reason': reason,
+            'alternatives': [a for a in alternatives if a['strategy'] != chosen['strategy']],
+            'cache_key': cache_key
+        }
+        self.logger.info(f"🧭 {query}: {plan['strategy']} (estimated cost {plan['estimated_cost']})")
+        return plan
+    
+    def _call_record_candidates(self, start_date: datetime, end_date: datetime,
+                                aggregated_rows: int) -> List[Dict[str, Any]]:
+        """Index and scan candidates over call_records for a time window"""
+        rows = self._table_rows('call_records')
+        matched = rows * self._selectivity(start_date, end_date)
+        has_index = self._has_call_time_index()
+        
+        return [
+            {
+                'strategy': 'secondary_index',
+                'applicable': has_index,
+                'estimated_cost': self.INDEX_FANOUT_COST + matched * self.INDEX_ROW_COST
+                                  + aggregated_rows * self.ROW_TRANSFER_COST,
+                'reason': (f"~{int(matched)} of ~{rows} call records in range via {self.CALL_TIME_INDEX}"
+                           if has_index else f"{self.CALL_TIME_INDEX} does not exist"),
+                'fallback': 'Cassandra filters every row instead'
+            },
+            {
+                'strategy': 'client_side_scan',
+                'applicable': True,
+                'estimated_cost': rows * self.ROW_READ_COST + matched * self.ROW_TRANSFER_COST,
+                'reason': f"scan ~{rows} call records, aggregate ~{int(matched)} in the client"
+            }
+        ]
+    
+    def plan_call_analytics(self, start_date: datetime, end_date: datetime,
+                            call_type: Optional[str] = None, strategy: Optional[str] = None) -> Dict[str, Any]:
+        """Plan for Query 1 (call volume by type and network)"""
+        cache_key = ('call_analytics', start_date.isoformat(), end_date.isoformat(), call_type)
+        
+        # The rollup holds whole days, so both bounds must fall on midnight;
+        # it answers [start_date, end_date), i.e. the end date itself is excluded
+        day_aligned = start_date.time() == dt_time.min and end_date.time() == dt_time.min
+        days = (end_date - start_date).days
+        rollups_complete = self._rollups_complete()
+        
+        if not rollups_complete:
+            rollup_reason = 'rollups do not cover every call record'
+        elif not day_aligned or days <= 0:
+            rollup_reason = 'range is not day-aligned'
+        else:
+            rollup_reason = f"{days} daily partitions of call_volume_daily"
+        
+        candidates = [{
+            'strategy': 'rollup_table',
+            'applicable': rollups_complete and day_aligned and days > 0,
+            'estimated_cost': days * (self.PARTITION_READ_COST + self.ROLLUP_ROWS_PER_DAY * self.ROW_READ_COST),
+            'reason': rollup_reason
+        }]
+        candidates.extend(self._call_record_candidates(start_date, end_date, self.ROLLUP_ROWS_PER_DAY))
+        return self._choose('call_analytics', cache_key, candidates, strategy)
+    
+    def plan_customer_behavior(self, month: str, limit: int, strategy: Optional[str] = None,
+                               allow_cache: bool = True) -> Dict[str, Any]:
+        """Plan for the call activity half of Query 3 (and each month of Query 4)"""
+        cache_key = ('customer_behavior', month, limit)
+        start_date, end_date = QueryAggregatorBase._month_range(month)
+        
+        rows = self._table_rows('call_records')
+        matched = rows * self._selectivity(start_date, end_date)
+        # Each caller is one row of the month partition; there are never more callers than calls
+        callers = min(matched, self._collection_stats('customers').get('count') or matched)
+        rollups_complete = self._rollups_complete()
+        
+        candidates = [{
+            'strategy': 'partition_keyed_table',
+            'applicable': rollups_complete,
+            'estimated_cost': self.PARTITION_READ_COST + callers * (self.ROW_READ_COST + self.ROW_TRANSFER_COST),
+            'reason': (f"single caller_activity_monthly partition, ~{int(callers)} callers"
+                       if rollups_complete else 'rollups do not cover every call record')
+        }]
+        candidates.extend(self._call_record_candidates(start_date, end_date, callers))
+        return self._choose('customer_behavior', cache_key, candidates, strategy, allow_cache)
+    
+    def plan_customer_insights(self, segment: Optional[str] = None, plan_type: Optional[str] = None,
+                               strategy: Optional[str] = None) -> Dict[str, Any]:
+        """Plan for Query 2 (customer segmentation)"""
+        cache_key = ('customer_insights', segment, plan_type)
+        
+        stats = self._collection_stats('customers')
+        customers = stats.get('count') or self.UNKNOWN_TABLE_ROWS
+        has_index = self.SEGMENT_INDEX in stats.get('indexSizes', {})
+        lookups = 2 * self.LOOKUP_COST
+        
+        if segment and has_index:
+            matched = self._stat(('segment_count', segment),
+                                 lambda: self.mongo.get_collection_count('customers', {'customer_segment': segment}))
+            index_cost = matched * (self.INDEXED_DOCUMENT_COST + lookups)
+            index_reason = f"~{matched} of {customers} customers in segment {segment!r} via {self.SEGMENT_INDEX}"
+        else:
+            index_cost = math.inf
+            index_reason = 'no segment filter' if not segment else f"{self.SEGMENT_INDEX} does not exist"
+        
+        candidates = [
+            {
+                'strategy': 'secondary_index',
+                'applicable': bool(segment) and has_index,
+                'estimated_cost': index_cost,
+                'reason': index_reason
+            },
+            {
+                'strategy': 'collection_scan',
+                'applicable': True,
+                'estimated_cost': customers * (self.DOCUMENT_READ_COST + lookups),
+                'reason': f"scan and join all {customers} customers"
+            }
+        ]
+        return self._choose('customer_insights', cache_key, candidates, strategy)
+    
+    # Result cache
+    
+    def remember(self, plan: Dict[str, Any], result: Dict[str, Any]):
+        """Store a successful, complete result for later identical queries"""
+        if self.result_cache is None or result.get('error') or result.get('partial'):
+            return
+        self.result_cache.put(plan['cache_key'], result)
+    
+    def invalidate(self, *args):
+        """Forget cached results and statistics; usable as a MongoManager write hook"""
+        if self.result_cache is not None:
+            self.result_cache.invalidate()
+        with self._lock:
+            self._stats.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'data_span_days': self.data_span_days,
+            'stats_ttl': self.stats_ttl,
+            'result_cache': self.result_cache.stats() if self.result_cache is not None else None
+        }
@@ -0,0 +1,94 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+
+def estimate_payload_bytes(rows: List[Any], sample_size: int = 20) -> int:
+    """Estimate the serialized size of a result set from a small sample"""
+    if not rows:
+        return 0
+    
+    sample = rows[:sample_size]
+    sample_bytes = len(json.dumps(sample, default=str).encode('utf-8'))
+    return int(sample_bytes * len(rows) / len(sample))
+
+class ProfiledStage:
+    def __init__(self, name: str):
+        self.name = name
+        self.duration = 0.0
+        self.rows = None
+        self.bytes = None
+        self.children = []
+    
+    def record(self, rows: Optional[List[Any]] = None, row_count: Optional[int] = None,
+               byte_count: Optional[int] = None):
+        """Record the row count and payload size produced by this stage"""
+        if rows is not None:
+            self.rows = len(rows)
+            self.bytes = estimate_payload_bytes(rows)
+        if row_count is not None:
+            self.rows = row_count
+        if byte_count is not None:
+            self.bytes = byte_count
+    
+    def attach(self, stages: Optional[Iterable[Dict[str, Any]]]):
+        """Attach already serialized stages (e.g. from a nested query result) as children"""
+        for stage in stages or []:
+            self.children.append(stage)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'duration': round(self.duration, 6),
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'children': [
+                child.to_dict() if isinstance(child, ProfiledStage) else child
+                for child in self.children
+            ]
+        }
+
+class QueryProfiler:
+    """
+    Nested stage timer for a single query execution
+    Mencatat durasi, jumlah baris dan ukuran data untuk setiap tahap query
+    """
+    
+    def __init__(self):
+        self.stages = []
+        self._stack = []
+    
+    @contextmanager
+    def stage(self, name: str):
+        stage = ProfiledStage(name)
+        if self._stack:
+            self._stack[-1].children.append(stage)
+        else:
+            self.stages.append(stage)
+        
+        self._stack.append(stage)
+        start_time = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.duration = time.perf_counter() - start_time
+            self._stack.pop()
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Serialize all recorded stages for the result payload"""
+        return [stage.to_dict() for stage in self.stages]
+
+def iter_stage_paths(stages: List[Dict[str, Any]], prefix: str = '') -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ('parent/child', {duration, rows, bytes}) for every nested stage, parents first"""
+    for stage in stages or []:
+        path = f"{prefix}/{stage['name']}" if prefix else stage['name']
+        yield path, {
+            'duration': stage.get('duration', 0),
+            'rows': stage.get('rows'),
+            'bytes': stage.get('bytes')
+        }
+        yield from iter_stage_paths(stage.get('children', []), path)
+
+def flatten_stages(stages: List[Dict[str, Any]], prefix: str = '') -> Dict[str, Dict[str, Any]]:
+    """Flatten nested stage dicts into {'parent/child': {...}} for aggregation"""
+    return dict(iter_stage_paths(stages, prefix))
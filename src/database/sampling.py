@@ -0,0 +1,137 @@
+import math
+import random
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Tuple
+
+# Murmur3Partitioner token ring bounds
+TOKEN_MIN = -2 ** 63
+TOKEN_MAX = 2 ** 63 - 1
+
+def split_token_ring(num_ranges: int) -> List[Tuple[int, int]]:
+    """Split the full token ring into num_ranges contiguous (start, end] ranges"""
+    if num_ranges < 1:
+        raise ValueError(f"num_ranges must be positive, got {num_ranges}")
+    
+    width = (TOKEN_MAX - TOKEN_MIN) // num_ranges
+    ranges = []
+    for i in range(num_ranges):
+        start = TOKEN_MIN + i * width
+        end = TOKEN_MAX if i == num_ranges - 1 else start + width
+        ranges.append((start, end))
+    return ranges
+
+def sample_token_ranges(num_ranges: int, sample_fraction: float, seed: int = 0) -> List[Tuple[int, int]]:
+    """
+    Deterministically choose a subset of token ranges
+    The same (num_ranges, sample_fraction, seed) always yields the same ranges,
+    so repeated approximate queries are reproducible. At least two ranges are
+    sampled when there are two, so a variance (and interval) can be estimated;
+    a single range is scanned whole and gets no interval
+    """
+    if not 0 < sample_fraction <= 1:
+        raise ValueError(f"sample_fraction must be in (0, 1], got {sample_fraction}")
+    
+    ranges = split_token_ring(num_ranges)
+    sample_size = min(num_ranges, max(2, math.ceil(num_ranges * sample_fraction)))
+    chosen = sorted(random.Random(seed).sample(range(num_ranges), sample_size))
+    return [ranges[i] for i in chosen]
+
+class ClusterSampleEstimator:
+    """
+    Scale-up estimator for grouped totals over a simple random sample of clusters
+    Setiap token range adalah satu cluster; total diestimasi dengan N * rata-rata
+    per cluster dan interval kepercayaan dari variansi antar cluster
+    """
+    
+    def __init__(self, total_clusters: int, confidence: float = 0.95):
+        self.total_clusters = total_clusters
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.clusters = []
+    
+    def add_cluster(self, group_totals: Dict[Any, Dict[str, float]]):
+        """Add per-group sums ({group: {'count': .., 'duration': .., 'cost': ..}}) of one sampled cluster"""
+        self.clusters.append(group_totals)
+    
+    def _total_estimate(self, values: List[float]) -> Tuple[float, Optional[float]]:
+        n = len(values)
+        N = self.total_clusters
+        mean = sum(values) / n
+        estimate = N * mean
+        if n < 2:
+            return estimate, None
+        
+        variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+        finite_population_correction = 1 - n / N
+        standard_error = N * math.sqrt(finite_population_correction * variance / n)
+        return estimate, standard_error
+    
+    def _ratio_estimate(self, numerators: List[float], denominators: List[float]) -> Tuple[float, Optional[float]]:
+        n = len(numerators)
+        total_denominator = sum(denominators)
+        if total_denominator == 0:
+            return 0.0, None
+        
+        ratio = sum(numerators) / total_denominator
+        if n < 2:
+            return ratio, None
+        
+        mean_denominator = total_denominator / n
+        residuals = [y - ratio * x for y, x in zip(numerators, denominators)]
+        residual_variance = sum(r ** 2 for r in residuals) / (n - 1)
+        finite_population_correction = 1 - n / self.total_clusters
+        standard_error = math.sqrt(finite_population_correction * residual_variance / n) / mean_denominator
+        return ratio, standard_error
+    
+    def _interval(self, estimate: float, standard_error: Optional[float], digits: int = 2,
+                  lower_bound: float = 0.0) -> Optional[List[float]]:
+        if standard_error is None:
+            return None
+        margin = self.z * standard_error
+        return [round(max(lower_bound, estimate - margin), digits), round(estimate + margin, digits)]
+    
+    def estimate(self) -> Dict[Any, Dict[str, Any]]:
+        """Estimate count, total cost and average duration (with intervals) per group"""
+        groups = set()
+        for cluster in self.clusters:
+            groups.update(cluster.keys())
+        
+        estimates = {}
+        for group in groups:
+            counts = [c.get(group, {}).get('count', 0) for c in self.clusters]
+            durations = [c.get(group, {}).get('duration', 0) for c in self.clusters]
+            costs = [c.get(group, {}).get('cost', 0) for c in self.clusters]
+            
+            count_estimate, count_se = self._total_estimate(counts)
+            cost_estimate, cost_se = self._total_estimate(costs)
+            avg_duration, avg_duration_se = self._ratio_estimate(durations, counts)
+            
+            estimates[group] = {
+                'call_count': int(round(count_estimate)),
+                'call_count_ci': self._interval(count_estimate, count_se, digits=0),
+                'total_cost': round(cost_estimate, 2),
+                'total_cost_ci': self._interval(cost_estimate, cost_se),
+                'avg_duration': round(avg_duration, 2),
+                'avg_duration_ci': self._interval(avg_duration, avg_duration_se),
+                'sampled_calls': sum(counts)
+            }
+        
+        return estimates
+    
+    def estimate_overall(self) -> Dict[str, Any]:
+        """Estimate total calls and revenue over all groups"""
+        if not self.clusters:
+            return {'total_calls': 0, 'total_calls_ci': None, 'total_revenue': 0.0, 'total_revenue_ci': None}
+        
+        counts = [sum(g.get('count', 0) for g in c.values()) for c in self.clusters]
+        costs = [sum(g.get('cost', 0) for g in c.values()) for c in self.clusters]
+        
+        count_estimate, count_se = self._total_estimate(counts)
+        cost_estimate, cost_se = self._total_estimate(costs)
+        
+        return {
+            'total_calls': int(round(count_estimate)),
+            'total_calls_ci': self._interval(count_estimate, count_se, digits=0),
+            'total_revenue': round(cost_estimate, 2),
+            'total_revenue_ci': self._interval(cost_estimate, cost_se)
+        }
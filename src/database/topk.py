@@ -0,0 +1,58 @@
+import heapq
+from itertools import count
+from typing import Any, Callable, Iterable, List, Optional
+
+class _RankedEntry:
+    """Heap entry ordered so that the worst-ranked item sits at the top of the heap"""
+    __slots__ = ('rank', 'item')
+    
+    def __init__(self, rank, item):
+        self.rank = rank
+        self.item = item
+    
+    def __lt__(self, other):
+        return self.rank > other.rank
+
+class TopK:
+    """
+    Bounded top-K selection over a stream of rows
+    Memory stays O(K); the result equals sorted(rows, key=key)[:k], including
+    tie-breaking: rows with equal keys keep their arrival order
+    """
+    
+    def __init__(self, k: int, key: Optional[Callable[[Any], Any]] = None):
+        if k < 0:
+            raise ValueError(f"k must be non-negative, got {k}")
+        self.k = k
+        self.key = key or (lambda item: item)
+        self._heap = []
+        self._sequence = count()
+        self.seen = 0
+    
+    def push(self, item: Any):
+        """Offer a single row to the operator"""
+        self.seen += 1
+        if self.k == 0:
+            return
+        
+        entry = _RankedEntry((self.key(item), next(self._sequence)), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry.rank < self._heap[0].rank:
+            heapq.heapreplace(self._heap, entry)
+    
+    def extend(self, items: Iterable[Any]) -> 'TopK':
+        for item in items:
+            self.push(item)
+        return self
+    
+    def results(self) -> List[Any]:
+        """Return the retained rows, best first"""
+        return [entry.item for entry in sorted(self._heap, key=lambda entry: entry.rank)]
+    
+    def __len__(self):
+        return len(self._heap)
+
+def top_k(items: Iterable[Any], k: int, key: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+    """Convenience wrapper: exact top-K of an iterable without materializing it"""
+    return TopK(k, key).extend(items).results()
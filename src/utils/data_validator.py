@@ -3,6 +3,9 @@ import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import uuid
+from ..data_generation.compression import is_ndjson, open_text
+from ..data_generation.json_stream import iter_json_array, iter_ndjson
+from .record_schemas import get_schema
 
 class DataValidator:
     def __init__(self):
@@ -10,48 +13,39 @@ class DataValidator:
     
     def validate_cassandra_record(self, record: Dict, table_name: str) -> bool:
         """Validate a single Cassandra record"""
-        try:
-            if table_name == 'call_records':
-                required_fields = ['call_id', 'caller_id', 'callee_id', 'call_start_time', 'call_end_time']
-                return all(field in record for field in required_fields)
-            
-            elif table_name == 'sms_records':
-                required_fields = ['sms_id', 'sender_id', 'receiver_id', 'sent_time']
-                return all(field in record for field in required_fields)
-            
-            elif table_name == 'data_usage':
-                required_fields = ['usage_id', 'customer_id', 'session_start', 'session_end']
-                return all(field in record for field in required_fields)
-            
-            return False
-            
-        except Exception as e:
-            self.logger.error(f"Validation error: {e}")
-            return False
+        return self.validate_record(record, table_name)
     
     def validate_mongodb_record(self, record: Dict, collection_name: str) -> bool:
         """Validate a single MongoDB record"""
+        return self.validate_record(record, collection_name)
+    
+    def validate_record(self, record: Dict, name: str) -> bool:
+        """Check a record against the compiled schema of its table or collection (unknown names fail)"""
+        schema = get_schema(name)
         try:
-            if collection_name == 'customers':
-                return 'customer_id' in record and 'personal_info' in record
-            
-            elif collection_name == 'subscriptions':
-                return 'customer_id' in record and 'plan_type' in record
-            
-            elif collection_name == 'billing':
-                return 'customer_id' in record and 'billing_month' in record
-            
-            elif collection_name == 'customer_support':
-                return 'customer_id' in record and 'ticket_id' in record
-            
-            return False
-            
+            return schema is not None and schema.is_valid(record)
         except Exception as e:
             self.logger.error(f"Validation error: {e}")
             return False
     
+    def validate_batch(self, records: List[Dict], name: str) -> Dict[str, Any]:
+        """Validate many records at once; reports how many each schema rule rejected"""
+        schema = get_schema(name)
+        if schema is None:
+            raise ValueError(f"No record schema for {name}")
+        valid, rejections = schema.filter(records)
+        return {
+            'valid_count': len(valid),
+            'rejected_count': len(records) - len(valid),
+            'rejections': dict(rejections)
+        }
+    
     def validate_json_file(self, filepath: str) -> Dict[str, Any]:
-        """Validate JSON file format and content"""
+        """
+        Validate JSON file format and content
+        Accepts JSON arrays and NDJSON, plain or .gz/.zst compressed; the file is
+        decompressed and parsed as a stream, so it is never held in memory whole
+        """
         validation_result = {
             'valid': False,
             'record_count': 0,
@@ -60,22 +54,22 @@ class DataValidator:
         }
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open_text(filepath) as f:
+                records = iter_ndjson(f) if is_ndjson(filepath) else iter_json_array(f)
+                record_count = sum(1 for _ in records)
             
-            if not isinstance(data, list):
-                validation_result['errors'].append("JSON must contain an array of records")
-                return validation_result
+            validation_result['record_count'] = record_count
             
-            validation_result['record_count'] = len(data)
-            
-            if len(data) == 0:
+            if record_count == 0:
                 validation_result['warnings'].append("File contains no records")
             
             validation_result['valid'] = True
             
         except json.JSONDecodeError as e:
-            validation_result['errors'].append(f"Invalid JSON format: {e}")
+            if e.msg == "Expected a JSON array":
+                validation_result['errors'].append("JSON must contain an array of records")
+            else:
+                validation_result['errors'].append(f"Invalid JSON format: {e}")
         except FileNotFoundError:
             validation_result['errors'].append("File not found")
         except Exception as e:
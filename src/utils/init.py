@@ -4,8 +4,12 @@ Utility modules for Telco NoSQL Platform
 
 from .performance_monitor import PerformanceMonitor
 from .data_validator import DataValidator
+from .record_schemas import RECORD_SCHEMAS, CompiledSchema, get_schema
 
 __all__ = [
     'PerformanceMonitor',
-    'DataValidator'
+    'DataValidator',
+    'RECORD_SCHEMAS',
+    'CompiledSchema',
+    'get_schema'
 ]
@@ -3,11 +3,13 @@ import json
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
 import threading
+from ..database.query_profiler import iter_stage_paths
 
 class PerformanceMonitor:
     def __init__(self):
         self.query_history = deque(maxlen=1000)  # Keep last 1000 queries
         self.performance_metrics = defaultdict(list)
+        self.stage_metrics = defaultdict(lambda: defaultdict(lambda: deque(maxlen=100)))
         self.lock = threading.Lock()
     
     def log_query_performance(self, query_type, execution_time, with_index=True):
@@ -30,6 +32,35 @@ class PerformanceMonitor:
                 'with_index': with_index
             })
     
+    def log_stage_timings(self, query_type, stages, prefix=''):
+        """Log per-stage durations, row counts and bytes of a query execution"""
+        with self.lock:
+            for path, metrics in iter_stage_paths(stages, prefix):
+                self.stage_metrics[query_type][path].append(metrics)
+    
+    def get_stage_breakdown(self, query_type=None):
+        """Get average time, rows and bytes per stage for one or all query types"""
+        with self.lock:
+            query_types = [query_type] if query_type else list(self.stage_metrics.keys())
+            breakdown = {}
+            
+            for qtype in query_types:
+                stages = {}
+                for path, records in self.stage_metrics.get(qtype, {}).items():
+                    if not records:
+                        continue
+                    rows = [r['rows'] for r in records if r['rows'] is not None]
+                    byte_counts = [r['bytes'] for r in records if r['bytes'] is not None]
+                    stages[path] = {
+                        'average_duration': round(sum(r['duration'] for r in records) / len(records) * 1000, 2),  # ms
+                        'average_rows': round(sum(rows) / len(rows), 2) if rows else None,
+                        'average_bytes': round(sum(byte_counts) / len(byte_counts), 2) if byte_counts else None,
+                        'samples': len(records)
+                    }
+                breakdown[qtype] = stages
+            
+            return breakdown
+    
     def get_recent_queries(self, limit=10):
         """Get recent query history"""
         with self.lock:
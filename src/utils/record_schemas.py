@@ -0,0 +1,100 @@
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+NUMBER = (int, float)
+
+# One declarative schema per Cassandra table / MongoDB collection:
+#   required: fields that must be present and not None
+#   fields:   per-field rules; 'type' (isinstance), 'min' (>=), 'gt' (>).
+#             A field with rules is checked even when absent, so it must exist
+RECORD_SCHEMAS = {
+    'call_records': {
+        'required': ['call_id', 'caller_id', 'callee_id', 'call_start_time', 'call_end_time'],
+        'fields': {'duration_seconds': {'type': NUMBER, 'min': 0}}
+    },
+    'sms_records': {
+        'required': ['sms_id', 'sender_id', 'receiver_id', 'sent_time'],
+        'fields': {'message_length': {'type': NUMBER, 'gt': 0}}
+    },
+    'data_usage': {
+        'required': ['usage_id', 'customer_id', 'session_start', 'session_end'],
+        'fields': {'data_consumed_mb': {'type': NUMBER, 'gt': 0}}
+    },
+    'customers': {
+        'required': ['customer_id', 'personal_info'],
+        'fields': {'personal_info': {'type': dict}}
+    },
+    'subscriptions': {
+        'required': ['customer_id', 'plan_type'],
+        'fields': {}
+    },
+    'billing': {
+        'required': ['customer_id', 'billing_month'],
+        'fields': {'amount': {'type': NUMBER, 'gt': 0}}
+    },
+    'customer_support': {
+        'required': ['customer_id', 'ticket_id'],
+        'fields': {}
+    }
+}
+
+class CompiledSchema:
+    """
+    A schema compiled into one generated Python function
+    check(record) returns None for a valid record, otherwise the name of the first
+    rule it breaks ('required:call_id', 'type:duration_seconds', 'min:...', 'gt:...').
+    The generated code inlines every rule with its constants, so a record costs a
+    few dict lookups and comparisons instead of walking if/elif chains
+    """
+    
+    def __init__(self, name: str, schema: Dict):
+        self.name = name
+        self.schema = schema
+        self.source, self.check = self._compile(schema)
+    
+    @staticmethod
+    def _compile(schema: Dict) -> Tuple[str, Callable[[Dict], Optional[str]]]:
+        lines = ['def check(record):', '    get = record.get']
+        namespace = {}
+        for field in schema.get('required', []):
+            lines += [f'    if get({field!r}) is None:', f'        return {"required:" + field!r}']
+        
+        for index, (field, rules) in enumerate(schema.get('fields', {}).items()):
+            lines.append(f'    value = get({field!r})')
+            if 'type' in rules:
+                namespace[f'_type{index}'] = rules['type']
+                lines += [f'    if not isinstance(value, _type{index}):', f'        return {"type:" + field!r}']
+            if 'min' in rules:
+                lines += [f'    if value < {rules["min"]!r}:', f'        return {"min:" + field!r}']
+            if 'gt' in rules:
+                lines += [f'    if value <= {rules["gt"]!r}:', f'        return {"gt:" + field!r}']
+        lines.append('    return None')
+        
+        source = '\n'.join(lines)
+        exec(compile(source, '<record schema>', 'exec'), namespace)
+        return source, namespace['check']
+    
+    def is_valid(self, record: Dict) -> bool:
+        return self.check(record) is None
+    
+    def filter(self, records: Iterable[Dict]) -> Tuple[List[Dict], Counter]:
+        """Batch mode: the valid records, in order, and how many records each rule rejected"""
+        check = self.check
+        valid = []
+        rejections = Counter()
+        for record in records:
+            failed = check(record)
+            if failed is None:
+                valid.append(record)
+            else:
+                rejections[failed] += 1
+        return valid, rejections
+
+_COMPILED = {name: CompiledSchema(name, schema) for name, schema in RECORD_SCHEMAS.items()}
+
+def get_schema(name: str) -> Optional[CompiledSchema]:
+    """Compiled schema of a table or collection (None for unknown names)"""
+    return _COMPILED.get(name)
+
+def format_rejections(rejections: Dict[str, int]) -> str:
+    return ', '.join(f"{rule}={count}" for rule, count in sorted(rejections.items())) or 'none'
@@ -14,9 +14,16 @@ import os
 from src.database.cassandra_manager import CassandraManager
 from src.database.mongodb_manager import MongoManager
 from src.database.query_aggregator import QueryAggregator
+from src.database.profile_cache import CustomerProfileCache
+from src.database.bloom_filter import build_customer_filter, load_or_build_customer_filter
+from src.database.query_planner import QueryPlanner, ResultCache
 from src.data_generation.data_loader import TelcoDataLoader
+from src.data_generation.load_pipeline import LoadPipeline
 from src.utils.performance_monitor import PerformanceMonitor
-from config.database_config import CASSANDRA_CONFIG, MONGODB_CONFIG, APP_CONFIG
+from config.database_config import (
+    CASSANDRA_CONFIG, MONGODB_CONFIG, APP_CONFIG, PERFORMANCE_CONFIG, PROFILE_CACHE_CONFIG,
+    BLOOM_FILTER_CONFIG, QUERY_PLANNER_CONFIG
+)
 
 # Configure logging
 logging.basicConfig(
@@ -33,6 +40,11 @@ cassandra_manager = None
 mongo_manager = None
 query_aggregator = None
 performance_monitor = PerformanceMonitor()
+profile_cache = CustomerProfileCache(**PROFILE_CACHE_CONFIG)
+result_cache = ResultCache(
+    max_size=QUERY_PLANNER_CONFIG['result_cache_size'],
+    ttl_seconds=QUERY_PLANNER_CONFIG['result_cache_ttl']
+)
 
 @app.route('/')
 def dashboard():
@@ -98,13 +110,39 @@ def setup_databases():
         if not mongo_manager.connect():
             raise Exception("Failed to connect to MongoDB")
         
+        # Loader writes to customers/subscriptions/billing invalidate cached profiles
+        profile_cache.invalidate()
+        mongo_manager.register_write_hook(profile_cache.on_write)
+        # New customers must reach the bloom filter, or their calls would be skipped
+        mongo_manager.register_write_hook(update_customer_filter)
+        
         emit_progress("Setting up MongoDB collections and indexes...", 70)
         mongo_manager.create_collections_and_indexes()
         
         emit_progress("Initializing Query Aggregator...", 90)
         
+        try:
+            customer_filter = load_or_build_customer_filter(mongo_manager, **BLOOM_FILTER_CONFIG)
+        except Exception as e:
+            app.logger.warning(f"Customer ID bloom filter unavailable: {e}")
+            customer_filter = None
+        
+        planner = QueryPlanner(
+            cassandra_manager, mongo_manager, result_cache,
+            data_span_days=QUERY_PLANNER_CONFIG['data_span_days'],
+            stats_ttl=QUERY_PLANNER_CONFIG['stats_ttl']
+        )
+        mongo_manager.register_write_hook(planner.invalidate)
+        
         # Initialize query aggregator
-        query_aggregator = QueryAggregator(cassandra_manager, mongo_manager)
+        query_aggregator = QueryAggregator(
+            cassandra_manager, mongo_manager, performance_monitor,
+            default_timeout=PERFORMANCE_CONFIG['timeout_seconds'],
+            profile_cache=profile_cache,
+            customer_filter=customer_filter,
+            vectorized=PERFORMANCE_CONFIG['vectorized_results'],
+            planner=planner
+        )
         
         emit_progress("Database setup completed!", 100)
         
@@ -124,11 +162,18 @@ def setup_databases():
             'message': str(e)
         }), 500
 
+def update_customer_filter(collection_name, documents):
+    """MongoManager write hook: keep the active customer ID bloom filter current"""
+    if query_aggregator and query_aggregator.customer_filter is not None:
+        query_aggregator.customer_filter.on_write(collection_name, documents)
+
 @app.route('/api/load-existing-data', methods=['POST'])
 def load_existing_data():
     """Load data from existing JSON files"""
     try:
         data_directory = request.json.get('data_directory', 'telco_data_export')
+        pipelined = request.json.get('pipelined', False)
+        resume = request.json.get('resume', False)
         
         # Check if databases are initialized
         if not cassandra_manager or not mongo_manager:
@@ -138,7 +183,7 @@ def load_existing_data():
             }), 400
         
         # Initialize data loader
-        data_loader = TelcoDataLoader(data_directory)
+        data_loader = TelcoDataLoader(data_directory, resume=resume)
         
         # Verify data directory first
         emit_progress("Verifying data directory...", 5)
@@ -152,24 +197,47 @@ def load_existing_data():
                 'verification': verification
             }), 400
         
-        # Load data to Cassandra
-        emit_progress("Loading data to Cassandra...", 20)
-        cassandra_results = data_loader.load_cassandra_data(cassandra_manager)
-        
-        emit_progress("Loading data to MongoDB...", 60)
-        # Load data to MongoDB
-        mongodb_results = data_loader.load_mongodb_data(mongo_manager)
+        stage_report = None
+        if pipelined:
+            # Cassandra and MongoDB load concurrently; progress carries the per-stage counts
+            emit_progress("Loading data to Cassandra and MongoDB...", 20)
+            pipeline = LoadPipeline(data_loader, progress_callback=emit_pipeline_progress)
+            pipeline_results = pipeline.run(cassandra_manager, mongo_manager)
+            cassandra_results = pipeline_results['cassandra']
+            mongodb_results = pipeline_results['mongodb']
+            stage_report = pipeline_results['stages']
+        else:
+            # Load data to Cassandra
+            emit_progress("Loading data to Cassandra...", 20)
+            cassandra_results = data_loader.load_cassandra_data(cassandra_manager)
+            
+            emit_progress("Loading data to MongoDB...", 60)
+            # Load data to MongoDB
+            mongodb_results = data_loader.load_mongodb_data(mongo_manager)
+        
+        emit_progress("Rebuilding customer ID bloom filter...", 95)
+        try:
+            customer_filter = build_customer_filter(mongo_manager, **BLOOM_FILTER_CONFIG)
+        except Exception as e:
+            # The data is loaded; without a filter every caller is looked up in MongoDB
+            app.logger.error(f"Customer ID bloom filter rebuild failed: {e}")
+            customer_filter = None
+        if query_aggregator:
+            query_aggregator.customer_filter = customer_filter
+            # New call records change results and table statistics
+            query_aggregator.planner.invalidate()
         
         emit_progress("Data loading completed!", 100)
         
-                total_records = sum(cassandra_results.values()) + sum(mongodb_results.values())
+        total_records = sum(cassandra_results.values()) + sum(mongodb_results.values())
         
         return jsonify({
             'status': 'success',
             'message': f'Successfully loaded {total_records:,} records from existing data',
             'cassandra_results': cassandra_results,
             'mongodb_results': mongodb_results,
-            'total_records': total_records
+            'total_records': total_records,
+            'pipeline_stages': stage_report
         })
         
     except Exception as e:
@@ -219,19 +287,41 @@ def execute_query():
             end_date = datetime.fromisoformat(parameters.get('end_date'))
             call_type = parameters.get('call_type')
             
-            result = query_aggregator.query_db1_call_analytics(start_date, end_date, call_type)
+            if parameters.get('approximate'):
+                result = query_aggregator.query_db1_call_analytics(
+                    start_date, end_date, call_type,
+                    approximate=True,
+                    sample_fraction=float(parameters.get('sample_fraction', 0.1))
+                )
+            else:
+                result = query_aggregator.query_db1_call_analytics(
+                    start_date, end_date, call_type, strategy=parameters.get('strategy')
+                )
             
         elif query_type == 'customer_insights':
             segment = parameters.get('segment')
             plan_type = parameters.get('plan_type')
             
-            result = query_aggregator.query_db2_customer_insights(segment, plan_type)
+            result = query_aggregator.query_db2_customer_insights(
+                segment, plan_type, strategy=parameters.get('strategy')
+            )
             
         elif query_type == 'combined_behavior':
             month = parameters.get('month')
             limit = parameters.get('limit', 50)
             
-            result = query_aggregator.query_combined_customer_behavior(month, limit)
+            result = query_aggregator.query_combined_customer_behavior(
+                month, limit, strategy=parameters.get('strategy')
+            )
+            
+        elif query_type == 'behavior_trend':
+            result = query_aggregator.query_customer_behavior_trend(
+                parameters.get('start_month'),
+                parameters.get('end_month'),
+                group_by=parameters.get('group_by', 'customer'),
+                limit=int(parameters.get('limit', 20)),
+                max_workers=int(parameters.get('max_workers', 4))
+            )
             
         else:
             return jsonify({
@@ -257,6 +347,65 @@ def execute_query():
             'message': str(e)
         }), 500
 
+@app.route('/api/stage-breakdown', methods=['GET'])
+def stage_breakdown():
+    """Average per-stage timings recorded by the query aggregator"""
+    try:
+        query_type = request.args.get('query_type')
+        
+        return jsonify({
+            'status': 'success',
+            'breakdown': performance_monitor.get_stage_breakdown(query_type)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/profile-cache', methods=['GET', 'DELETE'])
+def profile_cache_status():
+    """Customer profile cache statistics; DELETE clears the cache"""
+    try:
+        if request.method == 'DELETE':
+            profile_cache.invalidate()
+        
+        return jsonify({
+            'status': 'success',
+            'profile_cache': profile_cache.stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/query-planner', methods=['GET', 'DELETE'])
+def query_planner_status():
+    """Query planner settings and result cache statistics; DELETE clears cached results and statistics"""
+    try:
+        if not query_aggregator:
+            return jsonify({
+                'status': 'error',
+                'message': 'Query aggregator not initialized'
+            }), 400
+        
+        if request.method == 'DELETE':
+            query_aggregator.planner.invalidate()
+        
+        return jsonify({
+            'status': 'success',
+            'query_planner': query_aggregator.planner.stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/performance-test', methods=['POST'])
 def performance_test():
     """Run performance tests with and without indexes"""
@@ -359,6 +508,10 @@ def emit_progress(message, progress):
         'progress': progress
     })
 
+def emit_pipeline_progress(stage_report):
+    """Emit pipelined loader stage counts, queue depths and bottlenecks via WebSocket"""
+    socketio.emit('loading_stages', stage_report)
+
 def get_system_status():
     """Get current system status"""
     return {
@@ -36,6 +36,8 @@ def api_execute_query():
             result = execute_customer_insights_query(parameters)
         elif query_type == 'combined_behavior':
             result = execute_combined_query(parameters)
+        elif query_type == 'behavior_trend':
+            result = execute_trend_query(parameters)
         else:
             return jsonify({
                 'status': 'error',
@@ -64,7 +66,9 @@ def api_query_templates():
             'parameters': [
                 {'name': 'start_date', 'type': 'date', 'required': True},
                 {'name': 'end_date', 'type': 'date', 'required': True},
-                {'name': 'call_type', 'type': 'select', 'options': ['voice', 'video', 'conference'], 'required': False}
+                {'name': 'call_type', 'type': 'select', 'options': ['voice', 'video', 'conference'], 'required': False},
+                {'name': 'approximate', 'type': 'checkbox', 'default': False, 'required': False},
+                {'name': 'sample_fraction', 'type': 'number', 'default': 0.1, 'required': False}
             ]
         },
         'customer_insights': {
@@ -82,6 +86,17 @@ def api_query_templates():
                 {'name': 'month', 'type': 'month', 'required': True},
                 {'name': 'limit', 'type': 'number', 'default': 50, 'required': False}
             ]
+        },
+        'behavior_trend': {
+            'name': 'Customer Behavior Trend',
+            'description': 'Monthly call activity series per customer or segment',
+            'parameters': [
+                {'name': 'start_month', 'type': 'month', 'required': True},
+                {'name': 'end_month', 'type': 'month', 'required': True},
+                {'name': 'group_by', 'type': 'select', 'options': ['customer', 'segment'], 'default': 'customer', 'required': False},
+                {'name': 'limit', 'type': 'number', 'default': 20, 'required': False},
+                {'name': 'max_workers', 'type': 'number', 'default': 4, 'required': False}
+            ]
         }
     }
     
@@ -117,6 +132,13 @@ def execute_call_analytics_query(parameters):
     end_date = datetime.fromisoformat(parameters.get('end_date'))
     call_type = parameters.get('call_type')
     
+    if parameters.get('approximate'):
+        return query_aggregator.query_db1_call_analytics(
+            start_date, end_date, call_type,
+            approximate=True,
+            sample_fraction=float(parameters.get('sample_fraction', 0.1))
+        )
+    
     return query_aggregator.query_db1_call_analytics(start_date, end_date, call_type)
 
 def execute_customer_insights_query(parameters):
@@ -136,3 +158,15 @@ def execute_combined_query(parameters):
     limit = parameters.get('limit', 50)
     
     return query_aggregator.query_combined_customer_behavior(month, limit)
+
+def execute_trend_query(parameters):
+    """Execute multi-month behavior trend query"""
+    from src.web_app.app import query_aggregator
+    
+    return query_aggregator.query_customer_behavior_trend(
+        parameters.get('start_month'),
+        parameters.get('end_month'),
+        group_by=parameters.get('group_by', 'customer'),
+        limit=int(parameters.get('limit', 20)),
+        max_workers=int(parameters.get('max_workers', 4))
+    )
@@ -0,0 +1,729 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+from src.data_generation.data_loader import TelcoDataLoader
+from src.data_generation.load_pipeline import LoadPipeline, STAGES
+from src.data_generation.stream_loader import GeneratedDataStreamer
+from src.data_generation.export_manifest import read_manifest, file_checksum
+from src.data_generation.telco_data_generator import TelcoDataGenerator
+from src.data_generation.vectorized import uuid4_strings, columns_to_records
+from src.data_generation.shard_writer import RollingShardWriter
+from src.data_generation.traffic_model import TrafficModel
+from src.data_generation.json_stream import iter_json_array, iter_chunks, split_line_ranges, read_ndjson_range
+from src.data_generation import columnar_format, compression
+from src.utils.data_validator import DataValidator
+from src.utils.record_schemas import get_schema
+from src.data_generation.column_decoder import ColumnDecoder, parse_uuid_column, NAIVE, AWARE, NOT_ISO
+from src.database.cassandra_manager import CassandraManager
+
+def make_call(i):
+    return {
+        'call_id': str(uuid4()),
+        'caller_id': f"CUST_{i:06d}",
+        'callee_id': 'CUST_000001',
+        'call_start_time': f"2024-01-{i % 28 + 1:02d}T10:00:00",
+        'call_end_time': f"2024-01-{i % 28 + 1:02d}T10:05:00",
+        'duration_seconds': 300,
+        'call_type': 'voice',
+        'location_cell_id': 'CELL_0001',
+        'location_lat': -6.2,
+        'location_lon': 106.8,
+        'cost_amount': 1.5,
+        'network_type': '4G',
+        'quality_score': 4.5,
+        'created_at': "2024-01-01T00:00:00",
+        'description': 'Panggilan "keluar" ke ] [ , {}'
+    }
+
+def as_record(row, table_name='call_records'):
+    return dict(zip(CassandraManager.TABLE_COLUMNS[table_name], row))
+
+class TestJsonStream(unittest.TestCase):
+    
+    def test_elements_split_across_reads(self):
+        records = [make_call(i) for i in range(50)] + [123456789, 'teks é', None, [1, [2]]]
+        for text in (json.dumps(records), json.dumps(records, indent=2)):
+            for read_size in (1, 7, 4096):
+                self.assertEqual(list(iter_json_array(io.StringIO(text), read_size)), records)
+    
+    def test_malformed_arrays_raise(self):
+        for text in ('', '{"a": 1}', '[1, 2', '[1 2]', '[1,]', '[1] 2'):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_array(io.StringIO(text), 3))
+        self.assertEqual(list(iter_json_array(io.StringIO(' [ ] '))), [])
+    
+    def test_chunks(self):
+        self.assertEqual(list(iter_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+    
+    def test_line_ranges_hold_whole_lines(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'cdr_data.ndjson')
+            records = [make_call(i) for i in range(40)]
+            TelcoDataGenerator().export_dataset(records, directory, 'cdr_data', format='ndjson')
+            
+            for target_bytes in (1, 100, 1000, 10 ** 9):
+                ranges = split_line_ranges(path, target_bytes)
+                self.assertEqual([r for start, end in ranges for r in read_ndjson_range(path, start, end)], records)
+        finally:
+            shutil.rmtree(directory)
+
+class TestColumnDecoder(unittest.TestCase):
+    
+    def test_formats_detected_once_per_decoder(self):
+        decoder = ColumnDecoder()
+        first = decoder.decode([make_call(i) for i in range(3)])
+        second = decoder.decode([dict(make_call(5), created_at='2024-01-01T00:00:00Z', sent_time='2024-01-01')])
+        
+        self.assertEqual(decoder.formats['call_start_time'], NAIVE)
+        self.assertEqual(decoder.formats['sent_time'], NOT_ISO)
+        self.assertEqual(first[1]['call_start_time'], datetime(2024, 1, 2, 10, 0))
+        self.assertIsInstance(first[0]['call_id'], UUID)
+        # created_at was detected as naive: the aware value falls back per value
+        self.assertEqual(second[0]['created_at'], datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(second[0]['sent_time'], '2024-01-01')
+        self.assertEqual(decoder.fallbacks, 1)
+    
+    def test_columns_match_per_value_conversion(self):
+        """Mixed, missing and malformed values decode exactly as datetime.fromisoformat / UUID would"""
+        records = [
+            {'call_id': str(uuid4()), 'created_at': '2024-01-01T10:00:00.250000+07:00'},
+            {'call_id': 'not-a-uuid', 'created_at': '2024-01-01T10:00:00Z'},
+            {'call_id': None, 'created_at': 'kemarin'},
+            {'created_at': datetime(2024, 1, 1)}
+        ]
+        decoder = ColumnDecoder()
+        decoded = decoder.decode(records)
+        
+        self.assertEqual(decoder.formats['created_at'], AWARE)
+        self.assertEqual(decoded[0]['call_id'], UUID(records[0]['call_id']))
+        self.assertEqual(decoded[0]['created_at'], datetime.fromisoformat(records[0]['created_at']))
+        self.assertEqual(decoded[1], {'call_id': 'not-a-uuid', 'created_at': datetime(2024, 1, 1, 10, tzinfo=timezone.utc)})
+        self.assertEqual(decoded[2], records[2])
+        self.assertEqual(decoded[3], records[3])
+        self.assertIsInstance(records[0]['call_id'], str)
+    
+    def test_uuid_column_rejects_non_canonical_strings(self):
+        values = [str(uuid4()) for _ in range(3)]
+        self.assertEqual(parse_uuid_column(values), [UUID(value) for value in values])
+        
+        for bad in ('x' * 36, values[0].replace('-', '') + '----', values[0][:-1] + 'g', values[0][:-1]):
+            with self.assertRaises(ValueError):
+                parse_uuid_column(values[1:] + [bad])
+
+class TestRecordSchemas(unittest.TestCase):
+    
+    def test_first_failing_rule_is_reported(self):
+        schema = get_schema('call_records')
+        missing = make_call(1)
+        missing['caller_id'] = None
+        negative = make_call(2)
+        negative['duration_seconds'] = -1
+        text = make_call(3)
+        text['duration_seconds'] = '300'
+        
+        self.assertIsNone(schema.check(make_call(0)))
+        self.assertEqual(schema.check(missing), 'required:caller_id')
+        self.assertEqual(schema.check(negative), 'min:duration_seconds')
+        self.assertEqual(schema.check(text), 'type:duration_seconds')
+        self.assertEqual(get_schema('billing').check({'customer_id': 'C', 'billing_month': '2024-01', 'amount': 0}),
+                         'gt:amount')
+    
+    def test_batch_counts_rejections_per_rule(self):
+        records = [make_call(i) for i in range(6)]
+        records[1]['duration_seconds'] = -5
+        records[2]['duration_seconds'] = -1
+        del records[4]['call_end_time']
+        
+        valid, rejections = get_schema('call_records').filter(records)
+        
+        self.assertEqual(valid, [records[0], records[3], records[5]])
+        self.assertEqual(rejections, {'min:duration_seconds': 2, 'required:call_end_time': 1})
+    
+    def test_data_validator_shares_loader_schemas(self):
+        validator = DataValidator()
+        record = make_call(0)
+        record['duration_seconds'] = -1
+        
+        self.assertFalse(validator.validate_cassandra_record(record, 'call_records'))
+        self.assertEqual(TelcoDataLoader().validate_cassandra_data([record], 'call_records'), [])
+        self.assertTrue(validator.validate_mongodb_record({'customer_id': 'C', 'personal_info': {}}, 'customers'))
+        self.assertFalse(validator.validate_mongodb_record({'customer_id': 'C', 'personal_info': 'x'}, 'customers'))
+        self.assertFalse(validator.validate_cassandra_record(make_call(0), 'unknown_table'))
+        self.assertEqual(validator.validate_batch([record, make_call(1)], 'call_records'),
+                         {'valid_count': 1, 'rejected_count': 1, 'rejections': {'min:duration_seconds': 1}})
+
+class TestVectorizedGeneration(unittest.TestCase):
+    
+    def setUp(self):
+        self.generator = TelcoDataGenerator()
+    
+    def test_uuid_column_is_canonical_version_4(self):
+        values = uuid4_strings(self.generator.rng, 1000).astype(str)
+        
+        parsed = [UUID(value) for value in values]
+        self.assertEqual([str(value) for value in parsed], list(values))
+        self.assertTrue(all(value.version == 4 for value in parsed))
+        self.assertEqual(len(set(values)), 1000)
+    
+    def test_cdr_columns_respect_field_ranges(self):
+        columns = self.generator.cdr_columns(5000)
+        
+        self.assertTrue(all(len(column) == 5000 for column in columns.values()))
+        self.assertTrue(((columns['duration_seconds'] >= 10) & (columns['duration_seconds'] <= 3600)).all())
+        elapsed = (columns['call_end_time'] - columns['call_start_time']).astype('timedelta64[s]').astype(int)
+        self.assertTrue((elapsed == columns['duration_seconds']).all())
+        self.assertEqual(set(columns['call_type'].astype(str)), set(self.generator.call_types))
+        self.assertTrue((columns['call_start_time'] <= columns['created_at']).all())
+    
+    def test_rows_materialized_with_python_values(self):
+        records = self.generator.generate_sms_data(50)
+        
+        self.assertEqual(len(records), 50)
+        self.assertEqual(list(records[0]), list(self.generator.sms_columns(1)))
+        self.assertIsInstance(records[0]['sms_id'], str)
+        self.assertIsInstance(records[0]['sent_time'], datetime)
+        self.assertIs(type(records[0]['message_length']), int)
+        self.assertIs(type(records[0]['cost_amount']), float)
+        self.assertEqual(len(TelcoDataLoader().prepare_records(records, 'cassandra', 'sms_records')), 50)
+        self.assertEqual(columns_to_records(self.generator.sms_columns(3), ['sms_id'])[0].keys(), {'sms_id'})
+
+class TestDeterministicGeneration(unittest.TestCase):
+    
+    def setUp(self):
+        self.directories = []
+    
+    def tearDown(self):
+        for directory in self.directories:
+            shutil.rmtree(directory)
+    
+    def export(self, seed, workers):
+        directory = tempfile.mkdtemp()
+        self.directories.append(directory)
+        generator = TelcoDataGenerator(seed=seed, block_size=40, customer_block_size=4)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.export_all(directory, num_customers=10, num_cdr=100, num_sms=30, num_data_usage=30,
+                                 format='ndjson', shards=2, compression='gz', workers=workers)
+        return {name: open(os.path.join(directory, name), 'rb').read()
+                for name in sorted(os.listdir(directory))}
+    
+    def test_same_seed_gives_byte_identical_files(self):
+        sequential = self.export(seed=7, workers=1)
+        
+        # Data files plus manifest.json
+        self.assertEqual(len(sequential), 15)
+        self.assertEqual(self.export(seed=7, workers=2), sequential)
+        self.assertNotEqual(self.export(seed=8, workers=1), sequential)
+        self.assertEqual(read_manifest(self.directories[0])['datasets']['cdr_data']['generation']['seed'], 7)
+    
+    def test_blocks_cover_disjoint_ranges_and_time_slices(self):
+        generator = TelcoDataGenerator(seed=1, block_size=50, customer_block_size=3)
+        
+        blocks = list(generator.iter_blocks('cdr_data', 120))
+        customers = [block['customers'] for block in generator.iter_blocks('customers', 7)]
+        
+        self.assertEqual([len(block['call_id']) for block in blocks], [50, 50, 20])
+        for earlier, later in zip(blocks, blocks[1:]):
+            self.assertLess(earlier['call_start_time'].max(), later['call_start_time'].min())
+        self.assertTrue((blocks[-1]['call_start_time'] < blocks[-1]['created_at']).all())
+        self.assertEqual([[c['customer_id'] for c in block] for block in customers],
+                         [['CUST_000001', 'CUST_000002', 'CUST_000003'],
+                          ['CUST_000004', 'CUST_000005', 'CUST_000006'], ['CUST_000007']])
+        self.assertEqual(customers[0][0]['created_at'], TelcoDataGenerator.SEEDED_REFERENCE_TIME)
+    
+    def test_chunked_export_writes_the_same_records(self):
+        counts = {'num_customers': 10, 'num_cdr': 100, 'num_sms': 30, 'num_data_usage': 0}
+        in_memory, chunked = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.directories += [in_memory, chunked]
+        with contextlib.redirect_stdout(io.StringIO()):
+            TelcoDataGenerator(seed=3, block_size=40).export_all(in_memory, format='json', **counts)
+            TelcoDataGenerator(seed=3, block_size=40).export_all_chunked(chunked, format='json', **counts)
+            written = TelcoDataGenerator(seed=3, block_size=40).export_all_chunked(
+                chunked, format='ndjson', shard_records=30, **counts)
+        
+        for name in ('cdr_data.json', 'billing_records.json'):
+            with open(os.path.join(in_memory, name), 'rb') as expected, open(os.path.join(chunked, name), 'rb') as actual:
+                self.assertEqual(actual.read(), expected.read())
+        self.assertEqual([os.path.basename(path) for path in written['cdr_data']],
+                         [f"cdr_data-{shard:05d}.ndjson" for shard in range(4)])
+        self.assertEqual(read_manifest(chunked)['datasets']['billing_records']['record_count'], 120)
+
+class TestTrafficModel(unittest.TestCase):
+    
+    def test_uniform_model_draws_like_the_plain_generator(self):
+        plain = TelcoDataGenerator(seed=5).cdr_columns(200)
+        modelled = TelcoDataGenerator(seed=5, traffic_model=TrafficModel.from_settings({})).cdr_columns(200)
+        
+        for field, column in plain.items():
+            self.assertTrue((modelled[field] == column).all(), field)
+    
+    def test_zipf_callers_and_cells_are_skewed(self):
+        model = TrafficModel(caller_zipf_exponent=1.2, cell_zipf_exponent=1.0)
+        columns = TelcoDataGenerator(seed=5, traffic_model=model).cdr_columns(20000)
+        
+        callers = np.unique(columns['caller_id'], return_counts=True)[1]
+        cells = np.unique(columns['location_cell_id'], return_counts=True)[1]
+        self.assertGreater(callers.max(), 0.05 * 20000)
+        self.assertGreater(cells.max(), 0.05 * 20000)
+        uniform = np.unique(TelcoDataGenerator(seed=5).cdr_columns(20000)['caller_id'], return_counts=True)[1]
+        self.assertLess(uniform.max(), 10)
+    
+    def test_seasonality_and_duration_mixture(self):
+        hourly = [0.0] * 24
+        hourly[19] = 1.0
+        model = TrafficModel(hourly_weights=hourly, weekday_weights=[0, 0, 0, 0, 0, 1, 1],
+                             duration_mixture=[{'weight': 1, 'median_seconds': 60, 'sigma': 0.1}])
+        generator = TelcoDataGenerator(seed=5, traffic_model=model, block_size=500)
+        columns = next(generator.iter_blocks('cdr_data', 1000))
+        
+        starts = columns['call_start_time']
+        self.assertTrue((starts.astype('datetime64[h]').astype(np.int64) % 24 == 19).all())
+        self.assertTrue(np.isin((starts.astype('datetime64[D]').astype(np.int64) + 3) % 7, [5, 6]).all())
+        self.assertTrue((starts < np.datetime64(TelcoDataGenerator.SEEDED_REFERENCE_TIME - timedelta(days=182))).all())
+        self.assertTrue(((columns['duration_seconds'] > 40) & (columns['duration_seconds'] < 90)).all())
+    
+    def test_settings_recorded_in_manifest(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        generator = TelcoDataGenerator(seed=5, traffic_model=TrafficModel.realistic())
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.export_all(directory, num_customers=2, num_cdr=20, num_sms=2, num_data_usage=2)
+        
+        settings = read_manifest(directory)['datasets']['cdr_data']['generation']['traffic_model']
+        self.assertEqual(settings, TrafficModel.realistic().settings())
+        self.assertEqual(TrafficModel.from_settings(settings).settings(), settings)
+        with self.assertRaises(ValueError):
+            TrafficModel.from_settings({'caller_skew': 1})
+
+class TestRollingShardWriter(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_shards_roll_over_and_stale_shards_are_removed(self):
+        records = [make_call(i) for i in range(7)]
+        with RollingShardWriter(self.directory, 'cdr_data', shard_records=3) as writer:
+            writer.write(records[:2])
+            writer.write(records[2:])
+            paths = writer.close()
+        
+        self.assertEqual(len(paths), 3)
+        self.assertEqual([json.loads(line) for path in paths for line in open(path, encoding='utf-8')], records)
+        self.assertEqual(writer.manifest_entry()['record_count'], 7)
+        
+        with RollingShardWriter(self.directory, 'cdr_data', shard_records=5) as writer:
+            writer.write(records)
+            paths = writer.close()
+        self.assertEqual(TelcoDataLoader(self.directory).dataset_files('cdr_data.json'), paths)
+    
+    def test_json_array_written_incrementally(self):
+        records = [make_call(i) for i in range(4)]
+        with RollingShardWriter(self.directory, 'cdr_data', format='json') as writer:
+            writer.write(records[:1])
+            writer.write(records[1:])
+            writer.close()
+        
+        with open(os.path.join(self.directory, 'cdr_data.json'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps(records, ensure_ascii=False))
+        with self.assertRaises(ValueError):
+            RollingShardWriter(self.directory, 'cdr_data', format='parquet')
+
+class TestTelcoDataLoader(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.records = [make_call(i) for i in range(5)]
+        with open(os.path.join(self.directory, 'cdr_data.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, indent=2)
+        self.loader = TelcoDataLoader(self.directory, chunk_size=2)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_cassandra_load_streams_chunks(self):
+        """Records are converted, validated and inserted chunk by chunk"""
+        cassandra_manager = Mock(rollup_failures=0)
+        cassandra_manager.is_table_empty.return_value = True
+        cassandra_manager.insert_rows.side_effect = lambda table, rows: len(rows)
+        
+        results = self.loader.load_cassandra_data(cassandra_manager)
+        
+        self.assertEqual(results['call_records'], 5)
+        batches = [call[0][1] for call in cassandra_manager.insert_rows.call_args_list
+                   if call[0][0] == 'call_records']
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        row = as_record(batches[0][0])
+        self.assertIsInstance(row['call_id'], UUID)
+        self.assertIsInstance(row['call_start_time'], datetime)
+        cassandra_manager.set_rollup_state.assert_called_with(True)
+    
+    def test_reload_into_loaded_table_leaves_rollups_stale(self):
+        """Reloading upserts the same calls again, so the rollup counters must not be trusted"""
+        cassandra_manager = Mock(rollup_failures=0)
+        cassandra_manager.is_table_empty.return_value = True
+        cassandra_manager.insert_rows.side_effect = lambda table, rows: len(rows)
+        self.loader.load_cassandra_data(cassandra_manager)
+        cassandra_manager.set_rollup_state.assert_called_with(True)
+        
+        cassandra_manager.get_rollup_state.return_value = True
+        cassandra_manager.is_table_empty.return_value = False
+        cassandra_manager.set_rollup_state.reset_mock()
+        TelcoDataLoader(self.directory, chunk_size=2).load_cassandra_data(cassandra_manager)
+        
+        states = [args for args, _ in cassandra_manager.set_rollup_state.call_args_list]
+        self.assertEqual(states, [(False,), (False,)])
+    
+    def test_failed_emptiness_probe_leaves_rollups_stale(self):
+        """A probe that errors (e.g. times out on a large table) counts as existing rows"""
+        cassandra_manager = CassandraManager()
+        cassandra_manager.session = Mock()
+        cassandra_manager.session.execute.side_effect = RuntimeError("read timeout")
+        
+        rollup_state = self.loader.suspend_rollups(cassandra_manager, 'call_records')
+        cassandra_manager.session.execute.side_effect = None
+        self.loader.restore_rollups(cassandra_manager, rollup_state)
+        
+        self.assertEqual(rollup_state, (False, 0))
+        query, (name, complete, _) = cassandra_manager.session.execute.call_args[0]
+        self.assertIn('rollup_state', query)
+        self.assertFalse(complete)
+    
+    def test_resumed_load_leaves_rollups_stale(self):
+        """Rows of the rewritten chunk were counted by the failed run; the rollups stay stale"""
+        cassandra_manager = Mock(rollup_failures=0)
+        cassandra_manager.is_table_empty.return_value = True
+        cassandra_manager.insert_rows.side_effect = [2, 1]
+        self.loader.load_cassandra_data(cassandra_manager)
+        cassandra_manager.set_rollup_state.assert_called_once_with(False)
+        
+        cassandra_manager.insert_rows.side_effect = lambda table, rows: len(rows)
+        cassandra_manager.set_rollup_state.reset_mock()
+        resumed = TelcoDataLoader(self.directory, chunk_size=2, resume=True).load_cassandra_data(cassandra_manager)
+        
+        self.assertEqual(resumed['call_records'], 3)
+        states = [args for args, _ in cassandra_manager.set_rollup_state.call_args_list]
+        self.assertEqual(states, [(False,), (False,)])
+    
+    def test_resume_skips_checkpointed_chunks(self):
+        """A failed load resumes after the last fully written chunk; a finished target is skipped"""
+        cassandra_manager = Mock(rollup_failures=0)
+        cassandra_manager.is_table_empty.return_value = True
+        cassandra_manager.insert_rows.side_effect = [2, 1]
+        
+        self.assertEqual(self.loader.load_cassandra_data(cassandra_manager)['call_records'], 3)
+        # The partially written second chunk is not checkpointed
+        self.assertEqual(TelcoDataLoader(self.directory, chunk_size=2, resume=True)
+                         .checkpoint.get('call_records')['chunks_done'], 1)
+        
+        cassandra_manager.insert_rows.side_effect = lambda table, rows: len(rows)
+        cassandra_manager.insert_rows.reset_mock()
+        resumed = TelcoDataLoader(self.directory, chunk_size=2, resume=True).load_cassandra_data(cassandra_manager)
+        
+        self.assertEqual(resumed['call_records'], 3)
+        rows = [row for call in cassandra_manager.insert_rows.call_args_list for row in call[0][1]]
+        self.assertEqual([as_record(row)['caller_id'] for row in rows], ['CUST_000002', 'CUST_000003', 'CUST_000004'])
+        
+        cassandra_manager.insert_rows.reset_mock()
+        again = TelcoDataLoader(self.directory, chunk_size=2, resume=True).load_cassandra_data(cassandra_manager)
+        self.assertEqual(again['call_records'], 0)
+        cassandra_manager.insert_rows.assert_not_called()
+        
+        # A different chunk layout cannot reuse the checkpoint
+        relaid = TelcoDataLoader(self.directory, chunk_size=3, resume=True).load_cassandra_data(cassandra_manager)
+        self.assertEqual(relaid['call_records'], 5)
+    
+    def test_mongodb_documents_get_deterministic_ids(self):
+        documents = [{'customer_id': 'CUST_000001', 'personal_info': {}}, {'customer_id': 'CUST_000002', 'personal_info': {}}]
+        
+        first = self.loader.prepare_records([dict(d) for d in documents], 'mongodb', 'customers')
+        second = self.loader.prepare_records([dict(d) for d in documents], 'mongodb', 'customers')
+        
+        self.assertEqual([d['_id'] for d in first], [d['_id'] for d in second])
+        self.assertNotEqual(first[0]['_id'], first[1]['_id'])
+    
+    def test_sharded_ndjson_parsed_in_process_pool(self):
+        """NDJSON shards give the same records sequentially and with parallel byte ranges"""
+        os.remove(os.path.join(self.directory, 'cdr_data.json'))
+        records = [make_call(i) for i in range(30)]
+        TelcoDataGenerator().export_dataset(records, self.directory, 'cdr_data', format='ndjson', shards=3)
+        
+        sequential = list(self.loader.iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records'))
+        parallel = list(TelcoDataLoader(self.directory, workers=2, range_bytes=500)
+                        .iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records'))
+        
+        self.assertEqual(len(self.loader.dataset_files('cdr_data.json')), 3)
+        self.assertGreater(len(parallel), 3)
+        self.assertEqual([r for chunk in parallel for r in chunk], [r for chunk in sequential for r in chunk])
+        self.assertEqual([as_record(r)['caller_id'] for chunk in parallel for r in chunk],
+                         [r['caller_id'] for r in records])
+        self.assertIsInstance(as_record(parallel[0][0])['call_start_time'], datetime)
+        self.assertEqual(self.loader.get_data_summary()['estimated_records']['cdr_data.json'], 30)
+    
+    def test_json_array_chunks_prepared_in_process_pool(self):
+        """Workers convert and validate JSON array chunks into the same compact rows, in file order"""
+        sequential = list(self.loader.iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records'))
+        parallel = list(TelcoDataLoader(self.directory, chunk_size=2, workers=2)
+                        .iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records'))
+        
+        self.assertEqual(parallel, sequential)
+        self.assertEqual([len(chunk) for chunk in parallel], [2, 2, 1])
+        self.assertIsInstance(parallel[0][0], tuple)
+    
+    def test_pool_rejections_merged_per_rule(self):
+        self.records[0]['duration_seconds'] = -1
+        self.records[3]['call_id'] = None
+        with open(os.path.join(self.directory, 'cdr_data.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.records, f)
+        
+        loader = TelcoDataLoader(self.directory, chunk_size=2, workers=2)
+        rows = [row for chunk in loader.iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records')
+                for row in chunk]
+        
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(loader.rejections['call_records'], {'min:duration_seconds': 1, 'required:call_id': 1})
+    
+    def test_rows_missing_columns_are_dropped(self):
+        records = self.loader.prepare_records(self.records, 'cassandra', 'call_records')
+        del records[1]['cost_amount']
+        
+        rows = self.loader.to_rows(records, 'call_records')
+        
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(len(rows[0]), len(CassandraManager.TABLE_COLUMNS['call_records']))
+    
+    def test_compressed_exports_stream_into_loader(self):
+        """gzip JSON arrays and NDJSON shards load the same rows as the plain JSON export"""
+        plain = list(self.loader.iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records'))
+        generator = TelcoDataGenerator()
+        os.remove(os.path.join(self.directory, 'cdr_data.json'))
+        
+        for format, shards in (('json', 1), ('ndjson', 2)):
+            paths = generator.export_dataset(self.records, self.directory, 'cdr_data', format=format,
+                                             shards=shards, compression='gz')
+            self.assertEqual(self.loader.dataset_files('cdr_data.json'), paths)
+            self.assertTrue(all(path.endswith('.gz') for path in paths))
+            
+            rows = [row for chunk in self.loader.iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records')
+                    for row in chunk]
+            self.assertEqual(rows, [row for chunk in plain for row in chunk])
+            self.assertTrue(self.loader.verify_data_directory()['cdr_data.json'])
+            self.assertEqual(DataValidator().validate_json_file(paths[0])['record_count'], 5 // shards)
+            for path in paths:
+                os.remove(path)
+        
+        with self.assertRaises(ValueError):
+            generator.export_dataset(self.records, self.directory, 'cdr_data', format='json', compression='bz2')
+    
+    @unittest.skipUnless(compression.zstandard, "zstandard is not installed")
+    def test_zstd_ndjson_export_loads(self):
+        os.remove(os.path.join(self.directory, 'cdr_data.json'))
+        TelcoDataGenerator().export_dataset(self.records, self.directory, 'cdr_data', format='ndjson', compression='zst')
+        os.remove(os.path.join(self.directory, 'manifest.json'))
+        
+        self.assertEqual(self.loader.get_data_summary()['estimated_records']['cdr_data.json'], 5)
+        self.assertEqual(len(list(self.loader.iter_json_records('cdr_data.json'))), 5)
+    
+    def test_validator_reports_non_array_json(self):
+        path = os.path.join(self.directory, 'object.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'records': []}, f)
+        
+        result = DataValidator().validate_json_file(path)
+        self.assertFalse(result['valid'])
+        self.assertEqual(result['errors'], ["JSON must contain an array of records"])
+        self.assertTrue(DataValidator().validate_json_file(os.path.join(self.directory, 'cdr_data.json'))['valid'])
+    
+    @unittest.skipUnless(columnar_format.pa, "pyarrow is not installed")
+    def test_parquet_export_loads_typed_records(self):
+        """Parquet is preferred over JSON and yields UUID, datetime and Decimal values without parsing"""
+        generator = TelcoDataGenerator()
+        records = generator.generate_cdr_data(25)
+        generator.export_dataset(records, self.directory, 'cdr_data', format='parquet')
+        loader = TelcoDataLoader(self.directory, chunk_size=10)
+        
+        chunks = list(loader.iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records'))
+        
+        self.assertEqual(loader.dataset_files('cdr_data.json'), [os.path.join(self.directory, 'cdr_data.parquet')])
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        loaded = as_record(chunks[0][0])
+        self.assertEqual(loaded['call_id'], UUID(records[0]['call_id']))
+        self.assertEqual(loaded['call_start_time'], records[0]['call_start_time'])
+        self.assertEqual(float(loaded['cost_amount']), records[0]['cost_amount'])
+        self.assertEqual(loader.get_data_summary()['estimated_records']['cdr_data.json'], 25)
+    
+    def test_summary_counts_records_by_streaming(self):
+        summary = self.loader.get_data_summary()
+        
+        self.assertEqual(summary['estimated_records']['cdr_data.json'], 5)
+        self.assertEqual(summary['summary_source']['cdr_data.json'], 'scan')
+        self.assertEqual(summary['data_quality']['cdr_data.json']['field_count'], len(self.records[0]))
+    
+    def test_summary_reads_export_manifest(self):
+        """Exports record counts, schema, time ranges and checksums; the summary trusts them while sizes match"""
+        records = [make_call(i) for i in range(12)]
+        paths = TelcoDataGenerator().export_dataset(records, self.directory, 'cdr_data', format='ndjson', shards=2)
+        os.remove(os.path.join(self.directory, 'cdr_data.json'))
+        
+        entry = read_manifest(self.directory)['datasets']['cdr_data']
+        self.assertEqual(entry['record_count'], 12)
+        self.assertEqual(entry['fields']['duration_seconds'], ['integer'])
+        self.assertEqual(entry['time_ranges']['call_start_time'], ['2024-01-01T10:00:00', '2024-01-12T10:00:00'])
+        self.assertEqual(entry['files'][1]['checksum'], file_checksum(paths[1]))
+        
+        summary = self.loader.get_data_summary()
+        self.assertEqual(summary['summary_source']['cdr_data.json'], 'manifest')
+        self.assertEqual(summary['estimated_records']['cdr_data.json'], 12)
+        self.assertEqual(summary['data_quality']['cdr_data.json']['time_ranges'], entry['time_ranges'])
+        
+        # A shard rewritten behind the manifest's back is counted again
+        with open(paths[1], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(make_call(99)) + '\n')
+        summary = self.loader.get_data_summary()
+        self.assertEqual(summary['summary_source']['cdr_data.json'], 'scan')
+        self.assertEqual(summary['estimated_records']['cdr_data.json'], 13)
+
+class TestLoadPipeline(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, 'cdr_data.json'), 'w', encoding='utf-8') as f:
+            json.dump([make_call(i) for i in range(25)], f)
+        with open(os.path.join(self.directory, 'customers.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'customer_id': f"CUST_{i:06d}", 'personal_info': {}, 'created_at': '2024-01-01T00:00:00'}
+                       for i in range(7)], f)
+        self.loader = TelcoDataLoader(self.directory, chunk_size=4)
+        self.cassandra_manager = Mock(rollup_failures=0)
+        self.cassandra_manager.is_table_empty.return_value = True
+        self.cassandra_manager.insert_rows.side_effect = lambda table, rows: len(rows)
+        self.mongo_manager = Mock()
+        self.mongo_manager.upsert_batch_data.side_effect = lambda collection, documents: len(documents)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_loads_both_databases_like_sequential_loader(self):
+        results = LoadPipeline(self.loader, queue_size=1).run(self.cassandra_manager, self.mongo_manager)
+        
+        self.assertEqual(results['cassandra'], {'call_records': 25, 'sms_records': 0, 'data_usage': 0})
+        self.assertEqual(results['mongodb'], {'customers': 7, 'subscriptions': 0, 'billing': 0, 'customer_support': 0})
+        rows = [row for call in self.cassandra_manager.insert_rows.call_args_list for row in call[0][1]]
+        sequential = [row for chunk in self.loader.iter_prepared_chunks('cdr_data.json', 'cassandra', 'call_records')
+                      for row in chunk]
+        self.assertEqual(rows, sequential)
+        documents = [document for call in self.mongo_manager.upsert_batch_data.call_args_list for document in call[0][1]]
+        self.assertIsInstance(documents[0]['created_at'], datetime)
+        self.assertEqual(len({document['_id'] for document in documents}), 7)
+        self.cassandra_manager.set_rollup_state.assert_called_with(True)
+        
+        stages = results['stages']['call_records']
+        self.assertEqual([stages['stages'][stage]['chunks'] for stage in STAGES], [7, 7, 7, 7])
+        self.assertIn(stages['bottleneck'], STAGES)
+        self.assertLessEqual(stages['stages']['writer']['max_queue_depth'], 1)
+    
+    def test_failing_writer_aborts_file_without_hanging(self):
+        self.cassandra_manager.insert_rows.side_effect = [4, 4, RuntimeError("node down")]
+        pipeline = LoadPipeline(self.loader, queue_size=1)
+        
+        inserted = pipeline.load_file('cdr_data.json', 'cassandra', 'call_records', self.cassandra_manager)
+        
+        self.assertEqual(inserted, 8)
+        # Rollups stay marked stale after a failed call_records load
+        self.cassandra_manager.set_rollup_state.assert_called_once_with(False)
+        self.assertEqual(self.loader.checkpoint.get('call_records')['chunks_done'], 2)
+
+class TestGeneratedDataStreamer(unittest.TestCase):
+    
+    def setUp(self):
+        self.cassandra_manager = Mock(rollup_failures=0)
+        self.cassandra_manager.is_table_empty.return_value = True
+        self.cassandra_manager.insert_rows.side_effect = lambda table_name, rows: len(rows)
+        self.mongo_manager = Mock()
+        self.mongo_manager.upsert_batch_data.side_effect = lambda collection, documents: len(documents)
+        self.streamer = GeneratedDataStreamer(chunk_size=40, customer_chunk_size=3)
+    
+    def test_generated_chunks_written_without_files(self):
+        results = self.streamer.run(self.cassandra_manager, self.mongo_manager,
+                                    num_customers=7, num_cdr=100, num_sms=5, num_data_usage=0)
+        
+        self.assertEqual(results['cassandra'], {'call_records': 100, 'sms_records': 5, 'data_usage': 0})
+        self.assertEqual(results['mongodb']['customers'], 7)
+        self.assertEqual(results['mongodb']['billing'], 7 * 12)
+        self.assertEqual(results['total_records'], sum(results['cassandra'].values()) + sum(results['mongodb'].values()))
+        
+        calls = [call[0] for call in self.cassandra_manager.insert_rows.call_args_list if call[0][0] == 'call_records']
+        self.assertEqual([len(rows) for _, rows in calls], [40, 40, 20])
+        self.assertIsInstance(as_record(calls[0][1][0])['call_id'], UUID)
+        customer_chunks = [call[0][1] for call in self.mongo_manager.upsert_batch_data.call_args_list
+                           if call[0][0] == 'customers']
+        self.assertEqual([len(chunk) for chunk in customer_chunks], [3, 3, 1])
+        self.assertIn('_id', customer_chunks[0][0])
+        self.cassandra_manager.set_rollup_state.assert_called_with(True)
+        
+        throughput = results['throughput']['call_records']
+        self.assertEqual(throughput['written'], 100)
+        self.assertGreater(throughput['records_per_second'], 0)
+    
+    def test_seeded_stream_matches_file_export(self):
+        """A seeded stream writes exactly the rows a load of that seed's export files writes"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        counts = {'num_customers': 4, 'num_cdr': 30, 'num_sms': 0, 'num_data_usage': 0}
+        TelcoDataGenerator(seed=3, block_size=7, customer_block_size=3).export_all(directory, **counts)
+        file_cassandra, file_mongo = Mock(rollup_failures=0), Mock()
+        file_cassandra.insert_rows.side_effect = lambda table_name, rows: len(rows)
+        file_mongo.upsert_batch_data.side_effect = lambda collection, documents: len(documents)
+        loader = TelcoDataLoader(directory, chunk_size=10)
+        loader.load_cassandra_data(file_cassandra)
+        loader.load_mongodb_data(file_mongo)
+        
+        streamer = GeneratedDataStreamer(TelcoDataGenerator(seed=3, block_size=7, customer_block_size=3),
+                                         chunk_size=10, customer_chunk_size=2)
+        streamer.run(self.cassandra_manager, self.mongo_manager, **counts)
+        
+        def written(mock_method, target):
+            return [item for call in mock_method.call_args_list if call[0][0] == target for item in call[0][1]]
+        
+        streamed_rows = written(self.cassandra_manager.insert_rows, 'call_records')
+        self.assertEqual(len(streamed_rows), 30)
+        self.assertEqual([as_record(row) for row in streamed_rows],
+                         [as_record(row) for row in written(file_cassandra.insert_rows, 'call_records')])
+        self.assertEqual(len(written(self.mongo_manager.upsert_batch_data, 'customers')), 4)
+        for collection in ('customers', 'billing'):
+            self.assertEqual(written(self.mongo_manager.upsert_batch_data, collection),
+                             written(file_mongo.upsert_batch_data, collection))
+    
+    def test_replayed_stream_leaves_rollups_stale(self):
+        """Rerunning a seeded stream upserts the same rows but would count them twice in the rollups"""
+        streamer = GeneratedDataStreamer(TelcoDataGenerator(seed=3), chunk_size=40)
+        streamer.stream_records(self.cassandra_manager, 'cdr_data', 'call_records', 50)
+        self.cassandra_manager.set_rollup_state.assert_called_with(True)
+        
+        self.cassandra_manager.is_table_empty.return_value = False
+        self.cassandra_manager.set_rollup_state.reset_mock()
+        streamer.stream_records(self.cassandra_manager, 'cdr_data', 'call_records', 50)
+        
+        states = [args for args, _ in self.cassandra_manager.set_rollup_state.call_args_list]
+        self.assertEqual(states, [(False,), (False,)])
+    
+    def test_failed_write_leaves_rollups_stale(self):
+        self.cassandra_manager.insert_rows.side_effect = [40, RuntimeError("node down")]
+        
+        written = self.streamer.stream_records(self.cassandra_manager, 'cdr_data', 'call_records', 100)
+        
+        self.assertEqual(written, 40)
+        self.cassandra_manager.set_rollup_state.assert_called_once_with(False)
+
+if __name__ == '__main__':
+    unittest.main()
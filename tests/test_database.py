@@ -1,9 +1,12 @@
 import pytest
+import asyncio
 import unittest
 from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 
 from src.database.cassandra_manager import CassandraManager
+from src.database.async_cassandra_manager import AsyncCassandraManager
+from src.database.deadline import Deadline, QueryDeadlineExceeded
 from src.database.mongodb_manager import MongoManager
 from src.database.query_aggregator import QueryAggregator
 
@@ -35,6 +38,97 @@ class TestCassandraManager(unittest.TestCase):
             self.cassandra_manager.create_tables()
             # Should call execute multiple times for different tables
             self.assertGreater(mock_session.execute.call_count, 0)
+    
+    def test_call_rollups_are_pre_aggregated(self):
+        """Each rollup counter is updated once per batch, cost kept in cents"""
+        records = [
+            {'caller_id': 'A', 'call_type': 'voice', 'network_type': '4G', 'duration_seconds': 60,
+             'cost_amount': 1.25, 'call_start_time': datetime(2024, 1, 31, 23, 0)},
+            {'caller_id': 'A', 'call_type': 'voice', 'network_type': '4G', 'duration_seconds': 30,
+             'cost_amount': 0.5, 'call_start_time': datetime(2024, 1, 31, 23, 30)}
+        ]
+        with patch.object(self.cassandra_manager, 'session') as mock_session:
+            self.cassandra_manager.update_call_rollups(records)
+            
+            updates = [call[0][1] for call in mock_session.execute.call_args_list]
+            self.assertEqual(updates, [
+                [2, 90, 175, datetime(2024, 1, 31).date(), 'voice', '4G'],
+                [2, 90, 175, '2024-01', 'A']
+            ])
+    
+    def test_insert_rows_reuses_prepared_statement(self):
+        """Dict records and compact rows share one cached INSERT per table"""
+        record = {'sms_id': 1, 'sender_id': 'A', 'receiver_id': 'B', 'message_length': 20,
+                  'sent_time': datetime(2024, 1, 1), 'delivery_status': 'delivered',
+                  'cost_amount': 0.1, 'network_type': '4G', 'created_at': datetime(2024, 1, 1)}
+        row = tuple(record[column] for column in CassandraManager.TABLE_COLUMNS['sms_records'])
+        with patch.object(self.cassandra_manager, 'session') as mock_session:
+            self.assertEqual(self.cassandra_manager.insert_batch_data('sms_records', [record]), 1)
+            self.assertEqual(self.cassandra_manager.insert_rows('sms_records', [row, row]), 2)
+            
+            mock_session.prepare.assert_called_once()
+            self.assertEqual([call[0][1] for call in mock_session.execute.call_args_list], [row, row, row])
+            with self.assertRaises(ValueError):
+                self.cassandra_manager.insert_rows('unknown', [row])
+
+class FakePagingFuture:
+    """ResponseFuture stand-in: the first page arrives at once, later pages never do"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.has_more_pages = True
+        self.timeout = None
+        self.pages_requested = 0
+        self.callbacks = []
+        self.late_callback = None
+    
+    def add_callbacks(self, callback, errback):
+        self.callbacks.append((callback, errback))
+        # Kept to deliver a page after the stream is closed, as a racing driver thread would
+        self.late_callback = callback
+        callback(self.rows)
+    
+    def start_fetching_next_page(self):
+        self.pages_requested += 1
+    
+    def clear_callbacks(self):
+        self.callbacks = []
+
+class TestAsyncCassandraManager(unittest.TestCase):
+    
+    def setUp(self):
+        self.future = FakePagingFuture([{'caller_id': 'A'}, {'caller_id': 'B'}])
+        self.cassandra_manager = AsyncCassandraManager()
+        self.cassandra_manager.session = Mock()
+        self.cassandra_manager.session.execute_async.return_value = self.future
+    
+    def test_deadline_stops_paging(self):
+        """A page missing at the deadline ends the stream and detaches the driver callbacks"""
+        async def consume():
+            rows = []
+            with self.assertRaises(QueryDeadlineExceeded):
+                async for row in self.cassandra_manager.stream_query('SELECT', deadline=Deadline(0.2)):
+                    rows.append(row)
+            return rows
+        
+        rows = asyncio.run(consume())
+        
+        self.assertEqual(rows, [{'caller_id': 'A'}, {'caller_id': 'B'}])
+        self.assertEqual(self.future.pages_requested, 1)
+        self.assertEqual(self.future.callbacks, [])
+        # The event loop is gone; a late page must be dropped, not scheduled on it
+        self.future.late_callback([{'caller_id': 'C'}])
+    
+    def test_consumer_stopping_early_requests_no_more_pages(self):
+        async def first_row():
+            stream = self.cassandra_manager.stream_query('SELECT')
+            row = await stream.__anext__()
+            await stream.aclose()
+            return row
+        
+        self.assertEqual(asyncio.run(first_row()), {'caller_id': 'A'})
+        self.assertEqual(self.future.pages_requested, 0)
+        self.assertEqual(self.future.callbacks, [])
 
 class TestMongoManager(unittest.TestCase):
     
@@ -60,6 +154,28 @@ class TestMongoManager(unittest.TestCase):
             
             self.mongo_manager.create_collections_and_indexes()
             mock_collection.create_index.assert_called()
+    
+    def test_write_hooks(self):
+        """Batch writes are reported to registered hooks"""
+        hook = Mock()
+        self.mongo_manager.register_write_hook(hook)
+        with patch.object(self.mongo_manager, 'db') as mock_db:
+            mock_db.__getitem__.return_value.insert_many.return_value.inserted_ids = [1, 2]
+            
+            self.mongo_manager.insert_batch_data('customers', [{'customer_id': 'A'}, {'customer_id': 'B'}])
+            hook.assert_called_once_with('customers', [{'customer_id': 'A'}, {'customer_id': 'B'}])
+    
+    def test_upsert_replaces_by_id(self):
+        """Upserts key on _id, so writing the same chunk twice does not duplicate documents"""
+        documents = [{'_id': 1, 'customer_id': 'A'}, {'_id': 2, 'customer_id': 'B'}]
+        with patch.object(self.mongo_manager, 'db') as mock_db:
+            collection = mock_db.__getitem__.return_value
+            collection.bulk_write.return_value = Mock(upserted_count=1, matched_count=1)
+            
+            self.assertEqual(self.mongo_manager.upsert_batch_data('customers', documents), 2)
+            operations = collection.bulk_write.call_args[0][0]
+            self.assertEqual([operation._filter for operation in operations], [{'_id': 1}, {'_id': 2}])
+            self.assertTrue(all(operation._upsert for operation in operations))
 
 class TestQueryAggregator(unittest.TestCase):
     
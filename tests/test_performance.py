@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 
 from src.utils.performance_monitor import PerformanceMonitor
 from src.database.query_aggregator import QueryAggregator
+from src.database.query_profiler import QueryProfiler, flatten_stages
 
 class TestPerformanceMonitor(unittest.TestCase):
     
@@ -74,6 +75,70 @@ class TestPerformanceMonitor(unittest.TestCase):
         # Should show significant improvement
         self.assertGreater(comparison['improvement_percent'], 50)
 
+    def test_stage_breakdown(self):
+        """Test per-stage metrics aggregation"""
+        stages = [
+            {'name': 'cassandra', 'duration': 0.2, 'rows': 10, 'bytes': 500, 'children': [
+                {'name': 'execute', 'duration': 0.15, 'rows': 10, 'bytes': 500, 'children': []}
+            ]},
+            {'name': 'join', 'duration': 0.05, 'rows': 5, 'bytes': None, 'children': []}
+        ]
+        
+        self.performance_monitor.log_stage_timings('COMBINED', stages)
+        self.performance_monitor.log_stage_timings('COMBINED', stages)
+        
+        breakdown = self.performance_monitor.get_stage_breakdown('COMBINED')['COMBINED']
+        
+        self.assertIn('cassandra/execute', breakdown)
+        self.assertEqual(breakdown['cassandra']['average_duration'], 200.0)
+        self.assertEqual(breakdown['cassandra']['samples'], 2)
+        self.assertIsNone(breakdown['join']['average_bytes'])
+
+class TestQueryProfiler(unittest.TestCase):
+    
+    def test_nested_stages(self):
+        """Test nested stage timers record durations, rows and bytes"""
+        profiler = QueryProfiler()
+        
+        with profiler.stage('outer') as outer:
+            with profiler.stage('inner') as inner:
+                time.sleep(0.01)
+                inner.record([{'a': 1}, {'a': 2}])
+            outer.record(row_count=2)
+        
+        stages = profiler.to_list()
+        
+        self.assertEqual(len(stages), 1)
+        self.assertEqual(stages[0]['children'][0]['name'], 'inner')
+        self.assertEqual(stages[0]['children'][0]['rows'], 2)
+        self.assertGreater(stages[0]['children'][0]['bytes'], 0)
+        self.assertGreaterEqual(stages[0]['duration'], stages[0]['children'][0]['duration'])
+        self.assertIn('outer/inner', flatten_stages(stages))
+        
+        monitor = PerformanceMonitor()
+        monitor.log_stage_timings('DB1_ONLY', stages)
+        self.assertEqual(sorted(monitor.get_stage_breakdown('DB1_ONLY')['DB1_ONLY']), sorted(flatten_stages(stages)))
+    
+    def test_aggregator_reports_stages(self):
+        """Test that aggregator results and the monitor carry stage timings"""
+        monitor = PerformanceMonitor()
+        cassandra_manager = Mock()
+        cassandra_manager.execute_query.return_value = [
+            {'call_type': 'voice', 'network_type': '4G', 'call_count': 10,
+             'avg_duration': 60.0, 'total_cost': 5.0}
+        ]
+        aggregator = QueryAggregator(cassandra_manager, Mock(), monitor)
+        
+        result = aggregator.query_db1_call_analytics(
+            datetime.now() - timedelta(days=30),
+            datetime.now()
+        )
+        
+        stage_names = [stage['name'] for stage in result['stages']]
+        self.assertEqual(stage_names, ['cassandra_query', 'post_process'])
+        self.assertEqual(result['stages'][0]['rows'], 1)
+        self.assertIn('cassandra_query', monitor.get_stage_breakdown('DB1_ONLY')['DB1_ONLY'])
+
 class TestQueryPerformance(unittest.TestCase):
     
     def setUp(self):
@@ -1,9 +1,18 @@
 import pytest
+import asyncio
+import time
 import unittest
 from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 
 from src.database.query_aggregator import QueryAggregator
+from src.database.topk import TopK, top_k
+from src.database.async_query_aggregator import AsyncQueryAggregator
+from src.database.sampling import ClusterSampleEstimator, sample_token_ranges, split_token_ring, TOKEN_MIN, TOKEN_MAX
+from src.database.deadline import Deadline, QueryDeadlineExceeded
+from src.database.profile_cache import CustomerProfileCache
+from src.database.bloom_filter import BloomFilter, load_or_build_customer_filter
+from src.database.query_planner import QueryPlanner, ResultCache
 
 class TestQueries(unittest.TestCase):
     
@@ -139,5 +148,652 @@ class TestQueries(unittest.TestCase):
             self.assertIn('with_index', query_result)
             self.assertIn('improvement_percent', query_result)
 
+class TestTopK(unittest.TestCase):
+    
+    def test_matches_full_sort(self):
+        """Top-K equals a stable full sort, including ties"""
+        import random
+        rng = random.Random(7)
+        rows = [{'id': i, 'calls': rng.randint(0, 20)} for i in range(500)]
+        key = lambda r: -r['calls']
+        
+        for k in (0, 1, 10, 499, 600):
+            self.assertEqual(top_k(rows, k, key=key), sorted(rows, key=key)[:k])
+    
+    def test_memory_bounded(self):
+        """Operator never retains more than K rows"""
+        operator = TopK(5, key=lambda x: -x)
+        operator.extend(iter(range(10000)))
+        
+        self.assertEqual(len(operator), 5)
+        self.assertEqual(operator.seen, 10000)
+        self.assertEqual(operator.results(), [9999, 9998, 9997, 9996, 9995])
+    
+    def test_combined_query_ranks_streamed_callers(self):
+        """Combined query keeps exact top callers with caller_id tie-break"""
+        cassandra_manager = Mock()
+        mongo_manager = Mock()
+        cassandra_manager.execute_query.return_value = iter([
+            {'caller_id': f'CUST_{i:06d}', 'total_calls': i % 3, 'total_duration': 60, 'total_cost': 1.0}
+            for i in range(1, 101)
+        ])
+        mongo_manager.execute_aggregation.side_effect = lambda collection, pipeline, **kwargs: [
+            {'customer_id': cid, 'subscription': {'monthly_fee': 100000}}
+            for cid in pipeline[0]['$match']['customer_id']['$in']
+        ]
+        
+        result = QueryAggregator(cassandra_manager, mongo_manager).query_combined_customer_behavior('2024-01', limit=3)
+        
+        self.assertEqual(
+            [r['customer_id'] for r in result['results']],
+            ['CUST_000002', 'CUST_000005', 'CUST_000008']
+        )
+        requested_ids = mongo_manager.execute_aggregation.call_args[0][1][0]['$match']['customer_id']['$in']
+        self.assertEqual(len(requested_ids), 6)
+
+class TestApproximateCallAnalytics(unittest.TestCase):
+    
+    def test_token_range_sample_is_deterministic(self):
+        """Same seed yields the same ranges; ranges cover the whole ring"""
+        ranges = split_token_ring(64)
+        self.assertEqual(ranges[0][0], TOKEN_MIN)
+        self.assertEqual(ranges[-1][1], TOKEN_MAX)
+        self.assertEqual(sample_token_ranges(64, 0.25, seed=3), sample_token_ranges(64, 0.25, seed=3))
+        self.assertEqual(len(sample_token_ranges(64, 0.25)), 16)
+    
+    def test_single_token_range_is_sampled_whole(self):
+        """One range cannot give two samples; it is scanned without a variance estimate"""
+        self.assertEqual(sample_token_ranges(1, 0.1), [(TOKEN_MIN, TOKEN_MAX)])
+        self.assertEqual(len(sample_token_ranges(3, 0.1)), 2)
+        
+        estimator = ClusterSampleEstimator(total_clusters=1)
+        estimator.add_cluster({('voice', '4G'): {'count': 10, 'duration': 600, 'cost': 15.0}})
+        estimate = estimator.estimate()[('voice', '4G')]
+        self.assertEqual(estimate['call_count'], 10)
+        self.assertIsNone(estimate['call_count_ci'])
+        self.assertIsNone(estimator.estimate_overall()['total_revenue_ci'])
+    
+    def test_estimator_interval_covers_truth(self):
+        """Scaled-up totals land near the true totals with an interval around them"""
+        import random
+        rng = random.Random(1)
+        clusters = [
+            {('voice', '4G'): {'count': c, 'duration': c * 100, 'cost': c * 2.0}}
+            for c in (rng.randint(90, 110) for _ in range(200))
+        ]
+        true_count = sum(c[('voice', '4G')]['count'] for c in clusters)
+        
+        estimator = ClusterSampleEstimator(total_clusters=200)
+        for index in rng.sample(range(200), 40):
+            estimator.add_cluster(clusters[index])
+        estimate = estimator.estimate()[('voice', '4G')]
+        
+        low, high = estimate['call_count_ci']
+        self.assertLessEqual(low, true_count)
+        self.assertGreaterEqual(high, true_count)
+        self.assertEqual(estimate['avg_duration'], 100.0)
+    
+    def test_approximate_query_scales_up_sample(self):
+        """Approximate mode scans only sampled ranges and reports intervals"""
+        cassandra_manager = Mock()
+        cassandra_manager.execute_query.side_effect = lambda query, parameters, stream=False, **kwargs: iter([
+            {'call_type': 'voice', 'network_type': '4G', 'duration_seconds': 60, 'cost_amount': 1.5}
+        ] * 10)
+        aggregator = QueryAggregator(cassandra_manager, Mock())
+        
+        result = aggregator.query_db1_call_analytics(
+            datetime.now() - timedelta(days=365), datetime.now(),
+            approximate=True, sample_fraction=0.25, token_ranges=16
+        )
+        
+        self.assertTrue(result['approximate'])
+        self.assertEqual(cassandra_manager.execute_query.call_count, 4)
+        self.assertEqual(result['results'][0]['call_count'], 160)
+        self.assertEqual(result['results'][0]['call_count_ci'], [160, 160])
+        self.assertEqual(result['summary']['total_revenue'], 240.0)
+        self.assertEqual(result['sampling']['rows_scanned'], 40)
+
+class TestCustomerProfileCache(unittest.TestCase):
+    
+    def test_lru_eviction_and_ttl(self):
+        """Least recently used profiles are evicted; expired ones count as misses"""
+        cache = CustomerProfileCache(max_size=2, ttl_seconds=60)
+        cache.put_many([{'customer_id': 'A'}, {'customer_id': 'B'}])
+        cache.get_many(['A'])
+        cache.put_many([{'customer_id': 'C'}])
+        
+        found, missing = cache.get_many(['A', 'B', 'C'])
+        self.assertEqual(sorted(found), ['A', 'C'])
+        self.assertEqual(missing, ['B'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+        
+        cache.ttl_seconds = 0
+        cache.put_many([{'customer_id': 'A'}])
+        self.assertEqual(cache.get_many(['A'])[1], ['A'])
+    
+    def test_loader_writes_invalidate_profiles(self):
+        """Writes to profile source collections drop the affected customers"""
+        cache = CustomerProfileCache()
+        cache.put_many([{'customer_id': 'A'}, {'customer_id': 'B'}])
+        
+        cache.on_write('call_records', [{'customer_id': 'A'}])
+        self.assertEqual(len(cache), 2)
+        cache.on_write('subscriptions', [{'customer_id': 'A'}])
+        self.assertEqual(cache.get_many(['A', 'B'])[1], ['A'])
+        cache.on_write('customers', [{'name': 'no id'}])
+        self.assertEqual(len(cache), 0)
+    
+    def test_combined_query_fetches_only_misses(self):
+        """Repeated combined queries are served from the cache"""
+        cassandra_manager = Mock()
+        mongo_manager = Mock()
+        cassandra_manager.execute_query.side_effect = lambda *args, **kwargs: iter([
+            {'caller_id': f'CUST_{i:06d}', 'total_calls': i, 'total_duration': 60, 'total_cost': 1.0}
+            for i in range(1, 6)
+        ])
+        mongo_manager.execute_aggregation.side_effect = lambda collection, pipeline, **kwargs: [
+            {'customer_id': cid, 'customer_segment': 'basic', 'subscription': {'monthly_fee': 100000}}
+            for cid in pipeline[0]['$match']['customer_id']['$in']
+        ]
+        cache = CustomerProfileCache()
+        aggregator = QueryAggregator(cassandra_manager, mongo_manager, profile_cache=cache)
+        
+        first = aggregator.query_combined_customer_behavior('2024-01', limit=5)
+        cache.invalidate(['CUST_000003'])
+        second = aggregator.query_combined_customer_behavior('2024-01', limit=5)
+        
+        self.assertEqual(first['results'], second['results'])
+        requested_ids = mongo_manager.execute_aggregation.call_args[0][1][0]['$match']['customer_id']['$in']
+        self.assertEqual(requested_ids, ['CUST_000003'])
+        self.assertEqual(second['profile_cache']['hits'], 4)
+
+class TestCustomerBloomFilter(unittest.TestCase):
+    
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        """Every added ID is found; unknown IDs rarely are"""
+        bloom = BloomFilter(5000, false_positive_rate=0.01)
+        bloom.add_many(f'CUST_{i:06d}' for i in range(1, 5001))
+        
+        self.assertTrue(all(f'CUST_{i:06d}' in bloom for i in range(1, 5001)))
+        false_positives = sum(f'OFFNET_{i:06d}' in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.02)
+    
+    def test_save_and_load(self):
+        """Persisted filter answers the same membership queries"""
+        import os
+        import tempfile
+        bloom = BloomFilter(100, false_positive_rate=0.001).add_many(['CUST_000001', 'CUST_000002'])
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'customer_ids.bloom')
+            bloom.save(path)
+            loaded = BloomFilter.load(path)
+        
+        self.assertEqual(loaded.bits, bloom.bits)
+        self.assertEqual(loaded.hash_count, bloom.hash_count)
+        self.assertIn('CUST_000002', loaded)
+        self.assertEqual(len(loaded), 2)
+    
+    def test_write_hook_adds_new_customers(self):
+        """Customers written after the filter was built are no longer skipped"""
+        bloom = BloomFilter(100).add_many(['CUST_000001'])
+        
+        bloom.on_write('customers', [{'customer_id': 'CUST_000001'}, {'customer_id': 'CUST_000002'}])
+        bloom.on_write('billing', [{'customer_id': 'CUST_000003'}])
+        
+        self.assertIn('CUST_000002', bloom)
+        self.assertEqual(len(bloom), 2)
+    
+    def test_stale_persisted_filter_is_rebuilt(self):
+        """A saved filter is reused only while its count and false-positive rate still match"""
+        import os
+        import tempfile
+        mongo_manager = Mock()
+        mongo_manager.get_collection_count.return_value = 2
+        mongo_manager.iter_field_values.side_effect = lambda *args: iter(['CUST_000001', 'CUST_000002'])
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'customer_ids.bloom')
+            BloomFilter(100, false_positive_rate=0.01).add_many(['CUST_000001']).save(path)
+            
+            rebuilt = load_or_build_customer_filter(mongo_manager, 0.01, path)
+            self.assertIn('CUST_000002', rebuilt)
+            self.assertEqual(mongo_manager.iter_field_values.call_count, 1)
+            
+            load_or_build_customer_filter(mongo_manager, 0.01, path)
+            self.assertEqual(mongo_manager.iter_field_values.call_count, 1)
+            
+            reconfigured = load_or_build_customer_filter(mongo_manager, 0.001, path)
+            self.assertEqual(reconfigured.false_positive_rate, 0.001)
+            self.assertEqual(mongo_manager.iter_field_values.call_count, 2)
+    
+    def test_combined_query_skips_unknown_callers(self):
+        """Off-net callers never reach the MongoDB $in list"""
+        cassandra_manager = Mock()
+        mongo_manager = Mock()
+        cassandra_manager.execute_query.return_value = iter([
+            {'caller_id': 'OFFNET_000001', 'total_calls': 99, 'total_duration': 60, 'total_cost': 1.0},
+            {'caller_id': 'CUST_000001', 'total_calls': 5, 'total_duration': 60, 'total_cost': 1.0}
+        ])
+        mongo_manager.execute_aggregation.return_value = [
+            {'customer_id': 'CUST_000001', 'subscription': {'monthly_fee': 100000}}
+        ]
+        bloom = BloomFilter(100).add_many(['CUST_000001'])
+        aggregator = QueryAggregator(cassandra_manager, mongo_manager, customer_filter=bloom)
+        
+        result = aggregator.query_combined_customer_behavior('2024-01', limit=1)
+        
+        requested_ids = mongo_manager.execute_aggregation.call_args[0][1][0]['$match']['customer_id']['$in']
+        self.assertEqual(requested_ids, ['CUST_000001'])
+        self.assertEqual(result['unknown_callers_skipped'], 1)
+        self.assertEqual(result['results'][0]['customer_id'], 'CUST_000001')
+
+class TestVectorizedPostProcessing(unittest.TestCase):
+    
+    def setUp(self):
+        self.cassandra_manager = Mock()
+        self.mongo_manager = Mock()
+    
+    def _run_both(self, run):
+        row_result = run(QueryAggregator(self.cassandra_manager, self.mongo_manager))
+        vectorized_result = run(QueryAggregator(self.cassandra_manager, self.mongo_manager, vectorized=True))
+        return row_result, vectorized_result
+    
+    def test_call_analytics_matches_row_path(self):
+        """Columnar coercion and rounding give the same rows and totals"""
+        self.cassandra_manager.execute_query.return_value = [
+            {'call_type': 'voice', 'network_type': '4G', 'call_count': 150, 'avg_duration': 120.456, 'total_cost': 2500.75},
+            {'call_type': 'sms', 'network_type': '5G', 'call_count': 80, 'avg_duration': 0, 'total_cost': 40.125}
+        ]
+        row_result, vectorized_result = self._run_both(
+            lambda aggregator: aggregator.query_db1_call_analytics(datetime.now() - timedelta(days=7), datetime.now())
+        )
+        
+        self.assertEqual(vectorized_result['results'], row_result['results'])
+        self.assertEqual(vectorized_result['summary'], row_result['summary'])
+    
+    def test_customer_insights_matches_row_path(self):
+        """Nested _id groups are flattened the same way"""
+        self.mongo_manager.execute_aggregation.return_value = [
+            {'_id': {'segment': 'premium', 'plan_type': 'postpaid', 'city': 'Jakarta'},
+             'customer_count': 25, 'avg_monthly_fee': 250000.333, 'avg_credit_score': 720.5, 'total_revenue': 6250000},
+            {'_id': {'segment': 'basic', 'plan_type': 'prepaid'},
+             'customer_count': 3, 'avg_monthly_fee': 50000, 'avg_credit_score': 600.25, 'total_revenue': 150000}
+        ]
+        row_result, vectorized_result = self._run_both(lambda aggregator: aggregator.query_db2_customer_insights())
+        
+        self.assertEqual(vectorized_result['results'], row_result['results'])
+        self.assertEqual(vectorized_result['summary'], row_result['summary'])
+    
+    def test_combined_matches_row_path(self):
+        """Join, derived metrics, ranking and summary match the row-by-row join"""
+        self.cassandra_manager.execute_query.side_effect = lambda *args, **kwargs: iter([
+            {'caller_id': 'CUST_000001', 'total_calls': 5, 'total_duration': 300, 'total_cost': 12500.5},
+            {'caller_id': 'CUST_000002', 'total_calls': 9, 'total_duration': 100, 'total_cost': 4000.0},
+            {'caller_id': 'CUST_000003', 'total_calls': 5, 'total_duration': 50, 'total_cost': 100.25}
+        ])
+        self.mongo_manager.execute_aggregation.return_value = [
+            {'customer_id': 'CUST_000003', 'personal_info': {'first_name': 'Budi'},
+             'customer_segment': 'basic', 'location': {'city': 'Bandung'},
+             'subscription': {'plan_type': 'prepaid', 'monthly_fee': 50000}, 'status': 'active', 'billing_count': 2},
+            {'customer_id': 'CUST_000001', 'personal_info': {'first_name': 'Siti', 'last_name': 'Rahayu'},
+             'customer_segment': 'premium', 'subscription': {'plan_type': 'postpaid', 'monthly_fee': 250000},
+             'status': 'active', 'billing_count': 6},
+            {'customer_id': 'CUST_000002', 'subscription': {'plan_type': 'prepaid', 'monthly_fee': 0}}
+        ]
+        row_result, vectorized_result = self._run_both(
+            lambda aggregator: aggregator.query_combined_customer_behavior('2024-01', limit=3)
+        )
+        
+        self.assertEqual(vectorized_result['results'], row_result['results'])
+        self.assertEqual(vectorized_result['summary'], row_result['summary'])
+        self.assertEqual([r['customer_id'] for r in vectorized_result['results']],
+                         ['CUST_000002', 'CUST_000001', 'CUST_000003'])
+    
+    def test_combined_empty_join_matches_row_path(self):
+        """Callers without a matching profile give an empty result rather than a dtype error"""
+        self.cassandra_manager.execute_query.side_effect = lambda *args, **kwargs: iter([
+            {'caller_id': 'CUST_000001', 'total_calls': 5, 'total_duration': 300, 'total_cost': 12500.5}
+        ])
+        self.mongo_manager.execute_aggregation.return_value = [
+            {'customer_id': 'CUST_000009', 'subscription': {'plan_type': 'prepaid', 'monthly_fee': 50000}}
+        ]
+        row_result, vectorized_result = self._run_both(
+            lambda aggregator: aggregator.query_combined_customer_behavior('2024-01', limit=3)
+        )
+        
+        self.assertEqual(vectorized_result['results'], [])
+        self.assertEqual(vectorized_result['results'], row_result['results'])
+        self.assertEqual(vectorized_result['summary'], row_result['summary'])
+
+class TestBehaviorTrend(unittest.TestCase):
+    
+    def setUp(self):
+        self.cassandra_manager = Mock()
+        self.mongo_manager = Mock()
+        
+        def month_rows(query, parameters, **kwargs):
+            time.sleep(0.1)
+            month = parameters[0].month
+            rows = [{'caller_id': 'CUST_000001', 'total_calls': month, 'total_duration': 60, 'total_cost': 1.5}]
+            if month % 2 == 0:
+                rows.append({'caller_id': 'CUST_000002', 'total_calls': 10, 'total_duration': 30, 'total_cost': 2.0})
+            return iter(rows)
+        
+        self.cassandra_manager.execute_query.side_effect = month_rows
+        self.mongo_manager.execute_aggregation.side_effect = lambda collection, pipeline, **kwargs: [
+            {'customer_id': cid, 'customer_segment': 'premium' if cid == 'CUST_000001' else 'basic',
+             'subscription': {'monthly_fee': 100000}}
+            for cid in pipeline[0]['$match']['customer_id']['$in']
+        ]
+        self.aggregator = QueryAggregator(self.cassandra_manager, self.mongo_manager)
+    
+    def test_month_sequence_crosses_year(self):
+        self.assertEqual(QueryAggregator._month_sequence('2023-11', '2024-02'),
+                         ['2023-11', '2023-12', '2024-01', '2024-02'])
+    
+    def test_customer_series_runs_months_in_parallel(self):
+        """Six months take about as long as one; profiles are fetched once"""
+        start_time = time.time()
+        result = self.aggregator.query_customer_behavior_trend('2024-01', '2024-06', limit=2, max_workers=6)
+        elapsed = time.time() - start_time
+        
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(self.mongo_manager.execute_aggregation.call_count, 1)
+        self.assertEqual([s['customer_id'] for s in result['results']], ['CUST_000002', 'CUST_000001'])
+        self.assertEqual([p['total_calls'] for p in result['results'][0]['points']], [0, 10, 0, 10, 0, 10])
+        self.assertEqual(result['summary']['total_calls'], 51)
+        self.assertEqual([stage['name'] for stage in result['stages'][0]['children']],
+                         ['2024-01', '2024-02', '2024-03', '2024-04', '2024-05', '2024-06'])
+    
+    def test_segment_series(self):
+        """group_by='segment' sums callers per segment and month"""
+        result = self.aggregator.query_customer_behavior_trend('2024-01', '2024-02', group_by='segment')
+        
+        self.assertEqual([s['segment'] for s in result['results']], ['basic', 'premium'])
+        self.assertEqual([p['active_customers'] for p in result['results'][0]['points']], [0, 1])
+        self.assertEqual(result['results'][1]['total_calls'], 3)
+        self.assertEqual(result['summary']['busiest_month'], '2024-02')
+
+class TestQueryPlanner(unittest.TestCase):
+    
+    def setUp(self):
+        self.cassandra_manager = Mock()
+        self.mongo_manager = Mock()
+        self.cassandra_manager.get_size_estimates.return_value = {'partitions': 1000000, 'mean_partition_size': 200}
+        self.cassandra_manager.get_index_names.return_value = ['call_records_start_time_idx']
+        self.cassandra_manager.get_rollup_state.return_value = True
+        self.mongo_manager.get_collection_stats.return_value = {
+            'count': 50000, 'indexSizes': {'_id_': 4096, 'customer_segment_1': 2048}
+        }
+        self.mongo_manager.get_collection_count.return_value = 5000
+        self.planner = QueryPlanner(self.cassandra_manager, self.mongo_manager, ResultCache())
+        self.aggregator = QueryAggregator(self.cassandra_manager, self.mongo_manager, planner=self.planner)
+    
+    def test_day_aligned_range_uses_rollup(self):
+        plan = self.planner.plan_call_analytics(datetime(2024, 1, 1), datetime(2024, 1, 8))
+        
+        self.assertEqual(plan['strategy'], 'rollup_table')
+        self.assertEqual({a['strategy'] for a in plan['alternatives']}, {'secondary_index', 'client_side_scan'})
+    
+    def test_range_width_decides_between_index_and_scan(self):
+        narrow = self.planner.plan_call_analytics(datetime(2024, 1, 1, 12), datetime(2024, 1, 8, 12))
+        wide = self.planner.plan_call_analytics(datetime(2023, 1, 1, 12), datetime(2023, 12, 1, 12))
+        
+        self.assertEqual(narrow['strategy'], 'secondary_index')
+        self.assertEqual(wide['strategy'], 'client_side_scan')
+        
+        self.cassandra_manager.get_index_names.return_value = []
+        self.cassandra_manager.get_rollup_state.return_value = False
+        self.planner.invalidate()
+        plan = self.planner.plan_call_analytics(datetime(2024, 1, 1), datetime(2024, 1, 8))
+        self.assertEqual(plan['strategy'], 'client_side_scan')
+    
+    def test_forcing_incomplete_rollup_is_refused(self):
+        self.cassandra_manager.get_rollup_state.return_value = False
+        
+        with self.assertRaises(ValueError):
+            self.planner.plan_call_analytics(datetime(2024, 1, 1), datetime(2024, 1, 8), strategy='rollup_table')
+        plan = self.planner.plan_customer_behavior('2024-01', 10, strategy='secondary_index')
+        self.assertEqual(plan['strategy'], 'secondary_index')
+    
+    def test_rollup_query_sums_daily_partitions(self):
+        self.cassandra_manager.execute_query.side_effect = lambda query, parameters, **kwargs: iter([
+            {'call_type': 'voice', 'network_type': '4G', 'call_count': 10,
+             'total_duration': 600, 'total_cost_cents': 1250}
+        ])
+        
+        result = self.aggregator.query_db1_call_analytics(datetime(2024, 1, 1), datetime(2024, 1, 4))
+        
+        self.assertEqual(result['plan']['strategy'], 'rollup_table')
+        self.assertIn('estimated_cost', result['plan'])
+        self.assertEqual(self.cassandra_manager.execute_query.call_count, 3)
+        self.assertIn('call_volume_daily', self.cassandra_manager.execute_query.call_args[0][0])
+        self.assertEqual(result['results'], [{'call_type': 'voice', 'network_type': '4G', 'call_count': 30,
+                                              'avg_duration': 60.0, 'total_cost': 37.5}])
+    
+    def test_client_side_scan_matches_grouped_rows(self):
+        self.cassandra_manager.get_rollup_state.return_value = False
+        self.cassandra_manager.execute_query.side_effect = lambda query, parameters, **kwargs: iter([
+            {'caller_id': 'CUST_000001', 'duration_seconds': 60, 'cost_amount': 1.5},
+            {'caller_id': 'CUST_000002', 'duration_seconds': 30, 'cost_amount': 0.5},
+            {'caller_id': 'CUST_000001', 'duration_seconds': 90, 'cost_amount': 2.5}
+        ])
+        self.mongo_manager.execute_aggregation.return_value = [
+            {'customer_id': 'CUST_000001', 'subscription': {'monthly_fee': 100}},
+            {'customer_id': 'CUST_000002', 'subscription': {'monthly_fee': 100}}
+        ]
+        
+        result = self.aggregator.query_combined_customer_behavior('2024-01', limit=2, strategy='client_side_scan')
+        
+        self.assertEqual(result['plan']['strategy'], 'client_side_scan')
+        self.assertEqual([(r['customer_id'], r['total_calls'], r['total_call_duration'], r['total_call_cost'])
+                          for r in result['results']],
+                         [('CUST_000001', 2, 150, 4.0), ('CUST_000002', 1, 30, 0.5)])
+    
+    def test_segment_filter_moves_ahead_of_lookups(self):
+        self.mongo_manager.execute_aggregation.return_value = []
+        
+        result = self.aggregator.query_db2_customer_insights(segment='premium')
+        
+        pipeline = self.mongo_manager.execute_aggregation.call_args[0][1]
+        self.assertEqual(result['plan']['strategy'], 'secondary_index')
+        self.assertEqual(pipeline[0], {"$match": {"customer_segment": "premium"}})
+    
+    def test_repeated_query_is_served_from_result_cache(self):
+        self.mongo_manager.execute_aggregation.return_value = [
+            {'_id': {'segment': 'premium', 'plan_type': 'postpaid', 'city': 'Jakarta'},
+             'customer_count': 25, 'avg_monthly_fee': 250000, 'avg_credit_score': 720, 'total_revenue': 6250000}
+        ]
+        
+        first = self.aggregator.query_db2_customer_insights()
+        second = self.aggregator.query_db2_customer_insights()
+        
+        self.assertEqual(self.mongo_manager.execute_aggregation.call_count, 1)
+        self.assertEqual(first['plan']['strategy'], 'collection_scan')
+        self.assertEqual(second['plan']['strategy'], 'cached_result')
+        self.assertEqual(second['results'], first['results'])
+        
+        self.planner.invalidate()
+        self.aggregator.query_db2_customer_insights()
+        self.assertEqual(self.mongo_manager.execute_aggregation.call_count, 2)
+
+class FakeAsyncCassandra:
+    
+    def __init__(self, rows, delay=0.1):
+        self.rows = rows
+        self.delay = delay
+    
+    async def execute_query(self, query, parameters=None, deadline=None):
+        await asyncio.sleep(self.delay)
+        return list(self.rows)
+    
+    async def stream_query(self, query, parameters=None, deadline=None):
+        await asyncio.sleep(self.delay)
+        for row in self.rows:
+            yield row
+
+class FakeAsyncMongo:
+    
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def execute_aggregation(self, collection_name, pipeline, max_time_ms=None):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        if '$in' in str(pipeline[0]):
+            return [
+                {'customer_id': cid, 'subscription': {'monthly_fee': 100000}}
+                for cid in pipeline[0]['$match']['customer_id']['$in']
+            ]
+        return [{'_id': {'segment': 'basic'}, 'customer_count': 10, 'total_revenue': 100}]
+
+class TestAsyncQueryAggregator(unittest.TestCase):
+    
+    def setUp(self):
+        rows = [
+            {'caller_id': f'CUST_{i:06d}', 'total_calls': i, 'total_duration': 60, 'total_cost': 1.0,
+             'call_type': 'voice', 'network_type': '4G', 'call_count': i}
+            for i in range(1, 21)
+        ]
+        self.mongo = FakeAsyncMongo()
+        self.aggregator = AsyncQueryAggregator(FakeAsyncCassandra(rows), self.mongo, profile_batch_size=10)
+    
+    def test_combined_query_batches_profiles_concurrently(self):
+        """Profile batches overlap instead of running one after another"""
+        start_time = time.time()
+        result = asyncio.run(self.aggregator.query_combined_customer_behavior('2024-01', limit=10))
+        elapsed = time.time() - start_time
+        
+        self.assertEqual(result['record_count'], 10)
+        self.assertEqual(result['results'][0]['customer_id'], 'CUST_000020')
+        self.assertEqual(self.mongo.calls, 2)
+        self.assertLess(elapsed, 0.3)
+    
+    def test_dashboard_overview_overlaps_queries(self):
+        """Independent widgets run concurrently on one event loop"""
+        start_time = time.time()
+        overview = asyncio.run(self.aggregator.dashboard_overview(
+            datetime.now() - timedelta(days=30), datetime.now(), '2024-01', limit=5
+        ))
+        elapsed = time.time() - start_time
+        
+        self.assertEqual(overview['call_analytics']['query_type'], 'DB1_ONLY')
+        self.assertEqual(overview['customer_insights']['query_type'], 'DB2_ONLY')
+        self.assertEqual(overview['combined_behavior']['query_type'], 'COMBINED')
+        self.assertLess(elapsed, 0.3)
+    
+    def test_trend_query(self):
+        """Async trend streams months concurrently and fetches profiles once"""
+        result = asyncio.run(self.aggregator.query_customer_behavior_trend('2024-01', '2024-03', limit=3))
+        
+        self.assertEqual(result['query_type'], 'TREND')
+        self.assertEqual([s['customer_id'] for s in result['results']], ['CUST_000020', 'CUST_000019', 'CUST_000018'])
+        self.assertEqual(len(result['results'][0]['points']), 3)
+        self.assertEqual(self.mongo.calls, 1)
+    
+    def test_segment_trend_bounds_concurrent_profile_batches(self):
+        """Every caller needs a profile, but only max_profile_batches batches are in flight"""
+        rows = [{'caller_id': f'CUST_{i:06d}', 'total_calls': 1, 'total_duration': 60, 'total_cost': 1.0}
+                for i in range(200)]
+        self.mongo.delay = 0.01
+        aggregator = AsyncQueryAggregator(FakeAsyncCassandra(rows, delay=0), self.mongo,
+                                          profile_batch_size=10, max_profile_batches=3)
+        
+        result = asyncio.run(aggregator.query_customer_behavior_trend('2024-01', '2024-02', group_by='segment'))
+        
+        self.assertNotIn('error', result)
+        self.assertEqual(self.mongo.calls, 20)
+        self.assertEqual(self.mongo.max_in_flight, 3)
+    
+    def test_deadline_cancels_slow_profile_lookup(self):
+        """Profile batches still running at the deadline are cancelled; call activity is kept"""
+        self.mongo.delay = 5
+        start_time = time.time()
+        result = asyncio.run(self.aggregator.query_combined_customer_behavior('2024-01', limit=5, timeout=0.3))
+        elapsed = time.time() - start_time
+        
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['missing'], ['customer_profiles'])
+        self.assertEqual(result['results'][0]['customer_id'], 'CUST_000020')
+        self.assertLess(elapsed, 1)
+    
+    def test_inherits_no_blocking_io(self):
+        """Only the I/O-free helpers are shared; every method doing I/O is a coroutine"""
+        self.assertNotIsInstance(self.aggregator, QueryAggregator)
+        for name in ('_plan', '_call_analytics_rows', '_approximate_call_analytics', 'performance_comparison'):
+            self.assertFalse(hasattr(self.aggregator, name), name)
+        for name in ('query_db1_call_analytics', 'query_db2_customer_insights', '_fetch_profiles',
+                     'query_combined_customer_behavior', 'query_customer_behavior_trend'):
+            self.assertTrue(asyncio.iscoroutinefunction(getattr(self.aggregator, name)), name)
+
+class TestQueryDeadlines(unittest.TestCase):
+    
+    def setUp(self):
+        self.cassandra_manager = Mock()
+        self.mongo_manager = Mock()
+        self.aggregator = QueryAggregator(self.cassandra_manager, self.mongo_manager, default_timeout=30)
+    
+    def test_deadline_budget(self):
+        """Remaining time is handed out as Cassandra timeout and MongoDB maxTimeMS"""
+        self.assertIsNone(Deadline().remaining())
+        self.assertIsNone(Deadline().mongo_max_time_ms())
+        
+        deadline = Deadline(10)
+        self.assertLessEqual(deadline.cassandra_timeout(), 10)
+        self.assertGreater(deadline.mongo_max_time_ms(), 9000)
+        
+        expired = Deadline(0.001)
+        time.sleep(0.01)
+        self.assertTrue(expired.expired())
+        with self.assertRaises(QueryDeadlineExceeded):
+            expired.mongo_max_time_ms()
+    
+    def test_deadline_reaches_both_databases(self):
+        """Every request carries the same deadline"""
+        self.cassandra_manager.execute_query.return_value = []
+        self.mongo_manager.execute_aggregation.return_value = []
+        
+        self.aggregator.query_db1_call_analytics(datetime.now() - timedelta(days=1), datetime.now())
+        self.aggregator.query_db2_customer_insights(timeout=5)
+        
+        deadline = self.cassandra_manager.execute_query.call_args[1]['deadline']
+        self.assertEqual(deadline.timeout_seconds, 30)
+        max_time_ms = self.mongo_manager.execute_aggregation.call_args[1]['max_time_ms']
+        self.assertTrue(0 < max_time_ms <= 5000)
+    
+    def test_timeout_on_cassandra_is_an_error(self):
+        """No partial ranking is returned from an incomplete scan"""
+        self.cassandra_manager.execute_query.side_effect = QueryDeadlineExceeded("Cassandra request exceeded deadline")
+        
+        result = self.aggregator.query_combined_customer_behavior('2024-01')
+        
+        self.assertTrue(result['timed_out'])
+        self.assertIn('error', result)
+        self.assertNotIn('results', result)
+    
+    def test_timeout_on_profiles_returns_partial_result(self):
+        """Call activity is returned without profile fields"""
+        self.cassandra_manager.execute_query.return_value = iter([
+            {'caller_id': 'CUST_000001', 'total_calls': 5, 'total_duration': 300, 'total_cost': 10.0},
+            {'caller_id': 'CUST_000002', 'total_calls': 9, 'total_duration': 100, 'total_cost': 4.0}
+        ])
+        self.mongo_manager.execute_aggregation.side_effect = QueryDeadlineExceeded("MongoDB aggregation exceeded deadline")
+        
+        result = self.aggregator.query_combined_customer_behavior('2024-01', limit=1)
+        
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['missing'], ['customer_profiles'])
+        self.assertEqual(result['record_count'], 1)
+        self.assertEqual(result['results'][0]['customer_id'], 'CUST_000002')
+        self.assertIsNone(result['results'][0]['segment'])
+        self.assertEqual(result['summary']['total_calls'], 9)
+
 if __name__ == '__main__':
     unittest.main()